@@ -4,7 +4,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .views import (
     LoginView, LogoutView, RefreshTokenView, CurrentUserView,
-    DashboardStatsView, DashboardActivitiesView, DashboardChartDataView
+    DashboardStatsView, DashboardActivitiesView, DashboardChartDataView,
+    GlobalSearchView, CacheStatsView
 )
 from utilisateurs.views import (
     UserViewSet, PosteViewSet, DepartmentViewSet,
@@ -44,6 +45,12 @@ urlpatterns = [
     path('dashboard/activities/', DashboardActivitiesView.as_view(), name='dashboard_activities'),
     path('dashboard/charts/', DashboardChartDataView.as_view(), name='dashboard_charts'),
     
+    # Recherche
+    path('search/', GlobalSearchView.as_view(), name='global_search'),
+    
+    # Cache
+    path('cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
+    
     # API Router
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -4,17 +4,26 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import logout
+from .permissions import IsDirector
 from .serializers import LoginSerializer, TokenResponseSerializer, UserProfileSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q, Sum
+from rest_framework.utils.urls import replace_query_param
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
+from core import search
+from core.caching import cache_stats, get_or_compute, register_counter, tagged_key
+from core.mixins import CachedResponseMixin
 from utilisateurs.models import User, UserActivity
-from taches.models import Project, Task, Notification
+from taches.models import Project, Task, TaskComment, Notification
+from taches import activity, charts
+from taches.caching import PROJECT_STATS_TAG
+from taches.visibility import visibility_scope, visible_projects, visible_tasks
 from utilisateurs.serializers import UserActivitySerializer
-from taches.serializers import TaskListSerializer, NotificationSerializer
+from taches.serializers import ActivityFeedEntrySerializer, TaskListSerializer, NotificationSerializer
 class LoginView(APIView):
     permission_classes = [AllowAny]
     
@@ -113,157 +122,166 @@ class CurrentUserView(APIView):
 
 
 class DashboardStatsView(APIView):
+    """
+    Statistiques du tableau de bord dans le périmètre de visibilité de l'utilisateur :
+    une agrégation conditionnelle par modèle, mise en cache par périmètre (un seul
+    recalcul à la fois, invalidée par les écritures sur les modèles lus, voir
+    core.caching). Les notifications non lues, propres à chaque utilisateur, sont
+    comptées à chaque requête.
+    """
     permission_classes = [IsAuthenticated]
+    cache_timeout = 60
+    cache_name = register_counter('DashboardStatsView')
+    cache_tags = ['model:taches.project', 'model:taches.task', PROJECT_STATS_TAG]
+    
+    def get_cache_tags(self, user):
+        """Étiquettes de l'équipe lue (get_team) : tous les utilisateurs pour le directeur"""
+        if user.role == 'directeur':
+            return self.cache_tags + ['model:utilisateurs.user', 'model:utilisateurs.department']
+        if user.role in ['coordinateur', 'responsable_section'] and user.department_id:
+            return self.cache_tags + [f'department:{user.department_id}']
+        return self.cache_tags
     
     def get(self, request):
         user = request.user
-        today = timezone.now().date()
-        week_ago = today - timedelta(days=7)
-        
-        # Statistiques de base
+        stats = get_or_compute(
+            tagged_key('dashboard:stats', self.get_cache_tags(user), visibility_scope(user)),
+            lambda: self.compute_stats(user),
+            self.cache_timeout,
+            name=self.cache_name
+        )
         stats = {
-            'projects': {
-                'total': Project.objects.count(),
-                'active': Project.objects.filter(status='active').count(),
-                'completed': Project.objects.filter(status='completed').count(),
-            },
-            'tasks': {
-                'total': Task.objects.count(),
-                'todo': Task.objects.filter(status='todo').count(),
-                'in_progress': Task.objects.filter(status='in_progress').count(),
-                'completed': Task.objects.filter(is_completed=True).count(),
-                'overdue': Task.objects.filter(due_date__lt=today, is_completed=False).count(),
-            },
-            'users': {
-                'total': User.objects.count(),
-                'active_today': User.objects.filter(last_active__date=today).count(),
-            },
+            **stats,
             'notifications': {
                 'unread': Notification.objects.filter(user=user, is_read=False).count(),
             }
         }
+        return Response({'status': 'success', 'data': stats})
+    
+    def compute_stats(self, user):
+        now = timezone.now()
+        start_of_day = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        team = self.get_team(user)
+        with_team = user.role in ['directeur', 'coordinateur']
         
-        # Statistiques personnalisées selon le rôle
-        if user.role in ['directeur', 'coordinateur']:
-            stats['team_performance'] = self.get_team_performance(user)
+        projects = visible_projects(Project.objects.all(), user).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            completed=Count('id', filter=Q(status='completed')),
+        )
         
-        if user.role == 'directeur':
-            stats['department_stats'] = self.get_department_stats()
+        tasks = visible_tasks(Task.objects.order_by(), user)
+        is_open = Q(is_completed=False)
+        is_overdue = is_open & Q(due_date__lt=now)
+        counts = {
+            'total': Count('id'),
+            'todo': Count('id', filter=Q(status='todo')),
+            'in_progress': Count('id', filter=Q(status='in_progress')),
+            'completed': Count('id', filter=Q(is_completed=True)),
+            'overdue': Count('id', filter=is_overdue),
+        }
+        if with_team:
+            # Tâches visibles assignées à un membre de l'équipe, dans la même agrégation
+            tasks = tasks.annotate(in_team=Exists(
+                Task.assigned_to.through.objects.filter(task=OuterRef('pk'), user__in=team.values('pk'))
+            ))
+            in_team = Q(in_team=True)
+            counts.update(
+                team_tasks=Count('id', filter=in_team),
+                team_completed=Count('id', filter=in_team & Q(is_completed=True)),
+                team_overdue=Count('id', filter=in_team & is_overdue),
+            )
+        task_counts = tasks.aggregate(**counts)
         
-        return Response({'status': 'success', 'data': stats})
-    
-    def get_team_performance(self, user):
-        team = user.get_team_members()
-        tasks = Task.objects.filter(assigned_to__in=team)
+        users = team.aggregate(
+            total=Count('id'),
+            active_today=Count('id', filter=Q(last_active__gte=start_of_day)),
+        )
         
-        return {
-            'team_tasks': tasks.count(),
-            'team_completed': tasks.filter(is_completed=True).count(),
-            'team_overdue': tasks.filter(due_date__lt=timezone.now(), is_completed=False).count(),
+        stats = {
+            'projects': projects,
+            'tasks': {key: task_counts[key] for key in ['total', 'todo', 'in_progress', 'completed', 'overdue']},
+            'users': users,
         }
+        if with_team:
+            stats['team_performance'] = {
+                key: task_counts[key] for key in ['team_tasks', 'team_completed', 'team_overdue']
+            }
+        if user.role == 'directeur':
+            stats['department_stats'] = self.get_department_stats()
+        return stats
+    
+    def get_team(self, user):
+        """Équipe de l'utilisateur (get_team_members) ; aucune pour les rôles sans équipe"""
+        if (
+            user.role == 'directeur'
+            or (user.role == 'coordinateur' and user.department_id)
+            or (user.role == 'responsable_section' and user.section_id)
+        ):
+            return user.get_team_members()
+        return User.objects.none()
     
     def get_department_stats(self):
         from utilisateurs.models import Department
-        return Department.objects.annotate(
-            user_count=Count('utilisateurs'),
-            project_count=Count('projects')
-        ).values('name', 'user_count', 'project_count', 'color')
+        return list(Department.objects.annotate(
+            user_count=Count('utilisateurs', distinct=True),
+            project_count=Count('projects', distinct=True)
+        ).values('name', 'user_count', 'project_count', 'color'))
 
-class DashboardActivitiesView(APIView):
+class DashboardActivitiesView(CachedResponseMixin, APIView):
+    """
+    Flux d'activité (taches.activity) : une requête sur les périmètres de l'utilisateur,
+    paginée par curseur (?limit=, ?cursor=)
+    """
     permission_classes = [IsAuthenticated]
+    cache_timeout = 60
+    cache_tags = ['model:taches.task', 'model:taches.project']
+    default_limit = 10
+    max_limit = 50
     
     def get(self, request):
-        user = request.user
-        limit = int(request.query_params.get('limit', 10))
-        
-        activities = []
-        
-        # Activités des tâches récentes
-        if user.role == 'directeur':
-            tasks = Task.objects.filter(is_completed=True).order_by('-completed_date')[:limit]
-        elif user.role == 'coordinateur' and user.department:
-            tasks = Task.objects.filter(
-                project__department=user.department,
-                is_completed=True
-            ).order_by('-completed_date')[:limit]
-        else:
-            tasks = Task.objects.filter(assigned_to=user, is_completed=True).order_by('-completed_date')[:limit]
-        
-        for task in tasks:
-            activities.append({
-                'type': 'task_completed',
-                'title': f'Tâche terminée: {task.title}',
-                'project': task.project.name,
-                'user': task.assigned_to.first().get_full_name() if task.assigned_to.exists() else None,
-                'date': task.completed_date,
-                'icon': 'fa-check-circle',
-                'color': 'success'
-            })
-        
-        # Projets récents
-        projects = Project.objects.order_by('-created_at')[:limit]
-        for project in projects:
-            activities.append({
-                'type': 'project_created',
-                'title': f'Nouveau projet: {project.name}',
-                'department': project.department.name,
-                'user': project.created_by.get_full_name() if project.created_by else None,
-                'date': project.created_at,
-                'icon': 'fa-folder-open',
-                'color': 'info'
-            })
-        
-        # Notifications non lues
-        notifications = Notification.objects.filter(user=user, is_read=False).order_by('-created_at')[:limit]
-        for notif in notifications:
-            activities.append({
-                'type': notif.notification_type,
-                'title': notif.title,
-                'message': notif.message,
-                'date': notif.created_at,
-                'icon': 'fa-bell',
-                'color': 'warning'
-            })
-        
-        # Trier par date
-        activities.sort(key=lambda x: x['date'], reverse=True)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            limit = self.default_limit
+        try:
+            entries, next_cursor = activity.feed(
+                activity.scopes_for(request.user), limit, request.query_params.get('cursor')
+            )
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'status': 'success',
-            'data': activities[:limit]
+            'next': replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor) if next_cursor else None,
+            'data': ActivityFeedEntrySerializer(entries, many=True).data
         })
 
-class DashboardChartDataView(APIView):
+class DashboardChartDataView(CachedResponseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    # Séries globales, identiques pour tous les utilisateurs
+    cache_timeout = 60
+    cache_tags = ['model:taches.task', 'model:taches.project']
+    cache_per_user = False
     
     def get(self, request):
-        today = timezone.now()
-        last_30_days = [today - timedelta(days=x) for x in range(29, -1, -1)]
-        
-        # Évolution des tâches
-        tasks_timeline = []
-        for day in last_30_days:
-            tasks = Task.objects.filter(
-                created_at__date=day.date()
-            ).aggregate(
-                created=Count('id'),
-                completed=Count('id', filter=Q(completed_date__date=day.date()))
+        # Chronologie lue dans les agrégats quotidiens, ?range= et ?granularity=
+        try:
+            tasks_timeline = charts.task_timeline(
+                request.query_params.get('range'), request.query_params.get('granularity')
             )
-            tasks_timeline.append({
-                'date': day.strftime('%d/%m'),
-                'created': tasks['created'],
-                'completed': tasks['completed']
-            })
-        
-        # Répartition par statut
-        tasks_by_status = Task.objects.values('status').annotate(
-            count=Count('id')
-        ).order_by('status')
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Tâches par projet (top 5)
-        tasks_by_project = Project.objects.annotate(
-            task_count=Count('tasks')
-        ).order_by('-task_count')[:5].values('name', 'task_count')
+        # Répartition par statut et par projet (top 5) : compteurs par projet
+        tasks_by_status = charts.tasks_by_status()
+        tasks_by_project = charts.tasks_by_project(5)
         
         return Response({
             'status': 'success',
@@ -273,3 +291,93 @@ class DashboardChartDataView(APIView):
                 'tasks_by_project': list(tasks_by_project),
             }
         })   
+
+
+class GlobalSearchView(APIView):
+    """
+    Recherche unifiée (saisie semi-automatique) : utilisateurs, projets, tâches et commentaires.
+    Chaque type est filtré selon la visibilité du rôle, interrogé en mode préfixe sur son
+    index plein texte, puis les résultats sont fusionnés par pertinence.
+    """
+    permission_classes = [IsAuthenticated]
+    TYPES = ('user', 'project', 'task', 'comment')
+    MIN_LENGTH = 2
+    DEFAULT_LIMIT = 5
+    MAX_LIMIT = 20
+
+    def get(self, request):
+        text = request.query_params.get('q', '')
+        if len(text.strip()) < self.MIN_LENGTH:
+            return Response({
+                'status': 'error',
+                'message': f'La recherche doit contenir au moins {self.MIN_LENGTH} caractères'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        types = request.query_params.get('types')
+        types = [t for t in types.split(',') if t in self.TYPES] if types else self.TYPES
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+
+        backend = search.get_backend(connection)
+        results = []
+        for type_name in types:
+            queryset = getattr(self, f'{type_name}_queryset')(request.user)
+            spec = search.get_spec(queryset.model)
+            if backend is not None:
+                matches = backend.search(queryset, spec, text, prefix=True)
+            else:
+                # Sans moteur plein texte : LIKE sur les champs indexés, sans classement
+                condition = Q()
+                for field in spec.fields:
+                    condition |= Q(**{f'{field}__icontains': text.strip()})
+                matches = queryset.filter(condition).order_by('-pk')
+            for obj in matches[:limit]:
+                label, subtitle = getattr(self, f'{type_name}_labels')(obj)
+                results.append({
+                    'type': type_name,
+                    'id': obj.pk,
+                    'label': label,
+                    'subtitle': subtitle,
+                    'rank': getattr(obj, 'search_rank', 0.0),
+                })
+
+        results.sort(key=lambda item: -item['rank'])
+        return Response({'status': 'success', 'data': results})
+
+    # Même visibilité que les viewsets correspondants
+    def user_queryset(self, user):
+        if user.role in ['directeur', 'coordinateur']:
+            return User.objects.all()
+        return User.objects.none()
+
+    def project_queryset(self, user):
+        return visible_projects(Project.objects.all(), user)
+
+    def task_queryset(self, user):
+        return visible_tasks(Task.objects.select_related('project'), user)
+
+    def comment_queryset(self, user):
+        return visible_tasks(TaskComment.objects.select_related('task', 'user'), user, task_ref='task')
+
+    def user_labels(self, obj):
+        return obj.get_full_name() or obj.email, obj.email
+
+    def project_labels(self, obj):
+        return obj.name, obj.code
+
+    def task_labels(self, obj):
+        return obj.title, obj.project.name
+
+    def comment_labels(self, obj):
+        return obj.comment[:80], obj.task.title
+
+
+class CacheStatsView(APIView):
+    """Succès et échecs du cache par lecture déclarée (voir core.caching)"""
+    permission_classes = [IsDirector]
+    
+    def get(self, request):
+        return Response({'status': 'success', 'data': cache_stats()})
+
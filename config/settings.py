@@ -4,6 +4,7 @@ Django settings for project_management project.
 
 from pathlib import Path
 import os
+import sys
 from decouple import config
 from django.urls import reverse_lazy
 from django.conf.urls.static import static
@@ -208,6 +209,37 @@ REST_FRAMEWORK = {
     #'EXCEPTION_HANDLER': 'api.utils.custom_exception_handler',
 }
 
+# Optimiseur de querysets (core.optimizer) : en mode strict, une requête émise pendant
+# la sérialisation d'une liste ou d'un détail lève UnoptimizedRelationError (tests, CI)
+QUERYSET_OPTIMIZER_STRICT = config('QUERYSET_OPTIMIZER_STRICT', default=False, cast=bool)
+
+# Notifications : mises en file par les vues et écrites par le worker `manage.py
+# process_notifications --loop` (service notifications de docker-compose.yml).
+# NOTIFICATIONS_INLINE=1 (développement sans worker) traite la file à la fin de chaque
+# transaction, dans la requête : sa durée croît alors avec le nombre de destinataires.
+NOTIFICATIONS_INLINE = config('NOTIFICATIONS_INLINE', default=False, cast=bool)
+
+# Recherche plein texte (core.search) : moteur choisi selon la base (FTS5 / tsvector),
+# ou classe imposée par SEARCH_BACKEND ; SEARCH_CONFIG = configuration PostgreSQL
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='')
+SEARCH_CONFIG = config('SEARCH_CONFIG', default='french')
+
+# Cache (core.caching) : tout backend Django via CACHE_BACKEND / CACHE_LOCATION, p. ex.
+# django.core.cache.backends.redis.RedisCache et redis://redis:6379/1 ; mémoire locale par
+# défaut et toujours pendant les tests. Avec plusieurs processus, seul un cache partagé
+# rend les invalidations visibles de tous.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+CACHES = {
+    'default': {
+        'BACKEND': (
+            'django.core.cache.backends.locmem.LocMemCache' if TESTING
+            else config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+        ),
+        'LOCATION': '' if TESTING else config('CACHE_LOCATION', default=''),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='pm'),
+    }
+}
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
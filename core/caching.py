@@ -0,0 +1,217 @@
+"""
+Cache des lectures de l'API.
+
+Rafales de recalcul (cache stampede) :
+
+get_or_compute() conserve avec la valeur son échéance « douce » (timeout) ; l'entrée
+reste dans le cache `grace` secondes de plus. Passé l'échéance douce, un seul
+processus obtient le verrou (cache.add, atomique) et recalcule, pendant que les
+autres continuent de servir la valeur précédente. Cache froid : le détenteur du
+verrou calcule, les autres attendent sa valeur au plus `wait` secondes, puis la
+calculent eux-mêmes plutôt que d'échouer.
+
+Invalidation par étiquettes (tags) : chaque étiquette (model:taches.task, project:12,
+department:3, user:5…) a une version dans le cache, et la clé d'une entrée contient
+l'empreinte des versions de ses étiquettes (tagged_key). Une écriture incrémente les
+versions des étiquettes touchées (bump_tags) : les entrées qui en dépendent ne sont
+plus jamais lues et expirent d'elles-mêmes. Une version absente (cache vidé, éviction)
+est recréée à partir de l'horloge, jamais à une valeur déjà utilisée.
+
+register() branche les signaux d'un modèle (post_save, post_delete, m2m_changed) ;
+les opérations en masse des QuerySet appellent bump_model() elles-mêmes.
+
+Compteurs : chaque lecture nommée (vue, get_or_set) compte ses succès et ses échecs
+dans le cache, partagés par tous les processus (cache_stats).
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+POLL_INTERVAL = 0.05
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _store(key, value, timeout, grace):
+    cache.set(key, (value, time.time() + timeout), timeout + grace)
+    return value
+
+
+def get_or_compute(key, compute, timeout, grace=None, lock_timeout=30, wait=3.0, name=None):
+    """
+    Valeur en cache de `key`, recalculée par compute() par un seul processus à la fois.
+    `name` : lecture comptée dans cache_stats() (valeur servie depuis le cache ou calculée).
+    """
+    grace = timeout if grace is None else grace
+    entry = cache.get(key)
+    if entry is not None:
+        value, soft_expiry = entry
+        if time.time() < soft_expiry or not cache.add(_lock_key(key), 1, lock_timeout):
+            # Valeur fraîche, ou un autre processus la recalcule déjà : servir la précédente
+            _record(name, True)
+            return value
+        _record(name, False)
+        try:
+            return _store(key, compute(), timeout, grace)
+        finally:
+            cache.delete(_lock_key(key))
+
+    _record(name, False)
+    if cache.add(_lock_key(key), 1, lock_timeout):
+        try:
+            return _store(key, compute(), timeout, grace)
+        finally:
+            cache.delete(_lock_key(key))
+
+    # Cache froid, calcul en cours ailleurs : attendre son résultat
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return compute()
+
+
+# Invalidation par étiquettes
+
+TAG_PREFIX = 'cache:tag:'
+STATS_PREFIX = 'cache:stats:'
+_counter_names = set()
+
+
+def model_tag(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def tag_versions(tags):
+    """Versions courantes des étiquettes (créées si absentes), dans l'ordre donné"""
+    keys = [f'{TAG_PREFIX}{tag}' for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = _new_version()
+            # Un autre processus a pu la créer entre-temps : garder la sienne
+            versions[key] = version if cache.add(key, version, None) else cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+def tagged_key(prefix, tags, *parts):
+    """Clé dont la validité dépend des versions de `tags`"""
+    versions = ':'.join(str(version) for version in tag_versions(tags))
+    digest = hashlib.md5(versions.encode()).hexdigest()
+    return ':'.join([prefix, *(str(part) for part in parts), digest])
+
+
+def _bump(tags):
+    for tag in tags:
+        key = f'{TAG_PREFIX}{tag}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def bump_tags(tags):
+    """Invalide les entrées dépendant de `tags`, après validation de la transaction en cours"""
+    tags = set(tags)
+    if tags:
+        transaction.on_commit(partial(_bump, tags))
+
+
+def bump_model(model, tags=()):
+    """Écriture sur `model` (en masse) : son étiquette de modèle et `tags`"""
+    bump_tags([model_tag(model), *tags])
+
+
+def register(model, tags=None, ignore_fields=()):
+    """
+    Invalide à chaque écriture de `model` son étiquette de modèle et tags(instance)
+    (étiquettes de l'instance, p. ex. de son projet ou de son département).
+    Une sauvegarde limitée à `ignore_fields` (update_fields, p. ex. last_login à la
+    connexion) n'invalide rien.
+    """
+    label = model._meta.label
+    ignore_fields = frozenset(ignore_fields)
+
+    def saved(sender, instance, update_fields=None, **kwargs):
+        if update_fields and ignore_fields.issuperset(update_fields):
+            return
+        bump_model(model, tags(instance) if tags else ())
+
+    def m2m(sender, instance, reverse, **kwargs):
+        if kwargs['action'] not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        if reverse:
+            bump_tags([model_tag(model), model_tag(type(instance))])
+        else:
+            saved(model, instance)
+
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=f'cache:{label}:save')
+    post_delete.connect(saved, sender=model, weak=False, dispatch_uid=f'cache:{label}:delete')
+    for field in model._meta.many_to_many:
+        m2m_changed.connect(
+            m2m, sender=field.remote_field.through, weak=False, dispatch_uid=f'cache:{label}:{field.name}'
+        )
+
+
+# Compteurs
+
+def _count(name, outcome):
+    key = f'{STATS_PREFIX}{name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def record(name, hit):
+    _count(name, 'hits' if hit else 'misses')
+
+
+def _record(name, hit):
+    if name is not None:
+        record(name, hit)
+
+
+def register_counter(name):
+    """Déclare une lecture nommée, pour qu'elle figure dans cache_stats()"""
+    _counter_names.add(name)
+    return name
+
+
+def cache_stats():
+    """{nom: {hits, misses, hit_ratio}} des lectures déclarées"""
+    names = sorted(_counter_names)
+    counters = cache.get_many([f'{STATS_PREFIX}{name}:{outcome}' for name in names for outcome in ('hits', 'misses')])
+    stats = {}
+    for name in names:
+        hits = counters.get(f'{STATS_PREFIX}{name}:hits', 0)
+        misses = counters.get(f'{STATS_PREFIX}{name}:misses', 0)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return stats
+
+
+def get_or_set(name, key, compute, timeout):
+    """cache.get_or_set compté sous `name` (entrées éventuellement nulles exclues)"""
+    value = cache.get(key)
+    record(name, value is not None)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
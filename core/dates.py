@@ -0,0 +1,25 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_window_bound(value, end=False):
+    """
+    Convertit un paramètre de requête (date ou date/heure ISO) en datetime aware.
+    Une date seule couvre toute la journée : minuit pour un début, 23:59:59 pour une fin.
+    Retourne None si la valeur est absente ; lève ValueError si elle est invalide.
+    """
+    if not value:
+        return None
+    
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Date invalide : {value}')
+        moment = datetime.combine(day, time.max if end else time.min)
+    
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
@@ -1,4 +1,16 @@
+import hashlib
+from contextlib import ExitStack
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
 from django.utils import timezone
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+from core import caching
+from core.optimizer import forbid_queries, optimize_queryset
+from core.serializers import DynamicFieldsMixin
 
 class ActivityLoggerMixin:
     """Mixin pour logger les activités utilisateur"""
@@ -18,10 +30,223 @@ class ActivityLoggerMixin:
             ip_address=self.get_client_ip()
         )
     
+    def log_activities(self, instances, action):
+        """Version en masse de log_activity : une ligne par instance, un seul INSERT"""
+        from utilisateurs.models import UserActivity
+        ip_address = self.get_client_ip()
+        UserActivity.objects.bulk_create([
+            UserActivity(
+                user=self.request.user,
+                action=f"{action}_{instance.__class__.__name__.lower()}",
+                ip_address=ip_address
+            )
+            for instance in instances
+        ])
+    
     def get_client_ip(self):
         x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
             ip = x_forwarded_for.split(',')[0]
         else:
             ip = self.request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        return ip
+
+class QueryOptimizerMixin:
+    """
+    Applique core.optimizer aux lectures (list/retrieve) : select_related/prefetch_related
+    sont dérivés des champs du serializer au lieu d'être maintenus à la main.
+    Les actions personnalisées passent par optimize_for() et serialize().
+    
+    Avec QUERYSET_OPTIMIZER_STRICT (tests), toute requête émise pendant la sérialisation
+    lève UnoptimizedRelationError.
+    """
+    optimize_actions = ('list', 'retrieve')
+    _query_guard = None
+    
+    def should_optimize(self):
+        request = getattr(self, 'request', None)
+        return request is not None and request.method == 'GET' and self.action in self.optimize_actions
+    
+    def restrict_columns(self):
+        return False
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.should_optimize():
+            queryset = optimize_queryset(queryset, self.get_serializer(), restrict=self.restrict_columns())
+        return queryset
+    
+    def strict_queries(self):
+        return getattr(settings, 'QUERYSET_OPTIMIZER_STRICT', False) and self.should_optimize()
+    
+    def run_guarded(self, handler, *args, **kwargs):
+        if not self.strict_queries():
+            return handler(*args, **kwargs)
+        with ExitStack() as self._query_guard:
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                self._query_guard = None
+    
+    def list(self, request, *args, **kwargs):
+        return self.run_guarded(super().list, request, *args, **kwargs)
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.run_guarded(super().retrieve, request, *args, **kwargs)
+    
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self._query_guard is not None and args:
+            if isinstance(args[0], QuerySet):
+                # Évaluer (et précharger) avant d'interdire les requêtes
+                len(args[0])
+            label = f'{self.__class__.__name__}.{self.action} ({serializer.__class__.__name__})'
+            self._query_guard.enter_context(forbid_queries(label))
+        return serializer
+    
+    def optimize_for(self, queryset, serializer_class):
+        """Queryset d'une action personnalisée, optimisé pour le serializer qui le rendra"""
+        return optimize_queryset(queryset, serializer_class())
+    
+    def serialize(self, serializer_class, instance, many=False):
+        """Données d'une action personnalisée, sous garde en mode strict"""
+        serializer = serializer_class(instance, many=many)
+        if not getattr(settings, 'QUERYSET_OPTIMIZER_STRICT', False):
+            return serializer.data
+        if isinstance(instance, QuerySet):
+            # Évaluer (et précharger) avant d'interdire les requêtes
+            len(instance)
+        with forbid_queries(f'{self.__class__.__name__}.{self.action} ({serializer_class.__name__})'):
+            return serializer.data
+    
+    def get_paginated_response(self, data):
+        if self._query_guard is not None:
+            # Sérialisation terminée : la pagination peut encore interroger la base
+            self._query_guard.close()
+        return super().get_paginated_response(data)
+
+class SparseFieldsetMixin(QueryOptimizerMixin):
+    """
+    ?fields=a,b et ?expand=x pour les lectures : le serializer ne rend que les champs
+    demandés et le queryset ne charge que les colonnes et relations correspondantes.
+    """
+    def get_requested_fields(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return None, None
+        fields = [f for f in request.query_params.get('fields', '').split(',') if f]
+        expand = [f for f in request.query_params.get('expand', '').split(',') if f]
+        return fields or None, expand or None
+    
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_requested_fields()
+        if (fields or expand) and issubclass(self.get_serializer_class(), DynamicFieldsMixin):
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+    
+    def should_optimize(self):
+        fields, expand = self.get_requested_fields()
+        # Les paramètres de forme s'appliquent aussi aux actions GET hors list/retrieve
+        return super().should_optimize() or bool(fields or expand)
+    
+    def restrict_columns(self):
+        fields, expand = self.get_requested_fields()
+        return bool(fields or expand)
+
+class CachedResponseMixin:
+    """
+    Mise en cache déclarative des lectures (GET) réussies, invalidée par étiquettes
+    (voir core.caching). La vue déclare :
+    - cache_timeout : durée de vie des entrées en secondes (None : pas de cache) ;
+    - cache_tags : étiquettes dont dépend la réponse ; liste (toutes les lectures) ou
+      {action: liste} (seules les actions citées) ; gabarits complétés par l'utilisateur
+      ({user}, {department}, {section}) et les paramètres de l'URL ({pk}), un gabarit
+      dont un champ manque étant ignoré ;
+    - cache_per_user : réponse propre à chaque utilisateur (défaut, l'entrée dépend
+      alors aussi de user:<id>, incrémentée quand son rôle ou son périmètre change)
+      ou partagée.
+    La clé comprend le chemin et les paramètres de la requête ; l'en-tête X-Cache
+    indique HIT ou MISS. Les permissions sont vérifiées avant la lecture du cache,
+    y compris, sur une route détaillée, l'accès à l'objet (get_object : queryset de
+    la vue et permissions objet).
+    """
+    cache_timeout = None
+    cache_tags = ()
+    cache_per_user = True
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_timeout:
+            actions = cls.cache_tags if isinstance(cls.cache_tags, dict) else [None]
+            for action in actions:
+                caching.register_counter(cls.get_cache_name(action))
+    
+    @classmethod
+    def get_cache_name(cls, action=None):
+        return f'{cls.__name__}.{action}' if action else cls.__name__
+    
+    def get_cache_tags(self, request):
+        """Étiquettes de la lecture en cours, None si elle n'est pas mise en cache"""
+        tags = self.cache_tags
+        if isinstance(tags, dict):
+            tags = tags.get(getattr(self, 'action', None))
+            if tags is None:
+                return None
+        user = request.user
+        context = {
+            'user': user.pk,
+            'department': getattr(user, 'department_id', None),
+            'section': getattr(user, 'section_id', None),
+            **self.kwargs,
+        }
+        resolved = []
+        for template in tags:
+            try:
+                resolved.append(template.format(**context))
+            except KeyError:
+                continue
+        if self.cache_per_user:
+            resolved.append(f'user:{user.pk}')
+        return resolved
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self.cache_timeout or request.method != 'GET':
+            return
+        tags = self.get_cache_tags(request)
+        if tags is not None:
+            # Le gestionnaire est choisi par dispatch() après initial()
+            self.get = partial(self.cached_handler, self.get, tags)
+    
+    def check_object_access(self):
+        """Route détaillée : objet chargé (404 / 403 sinon) et réutilisé par le gestionnaire"""
+        if not isinstance(self, GenericAPIView):
+            return
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            instance = self.get_object()
+            self.get_object = lambda: instance
+    
+    def cached_handler(self, handler, tags, request, *args, **kwargs):
+        self.check_object_access()
+        action = getattr(self, 'action', None) if isinstance(self.cache_tags, dict) else None
+        name = self.get_cache_name(action)
+        variant = request.user.pk if self.cache_per_user else 'shared'
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = caching.tagged_key(f'api:{name}', tags, variant, path)
+        
+        data = cache.get(key)
+        caching.record(name, data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        
+        response = handler(request, *args, **kwargs)
+        # Réponses en flux et erreurs jamais mises en cache
+        if isinstance(response, Response) and response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+            response['X-Cache'] = 'MISS'
+        return response
+
@@ -0,0 +1,177 @@
+"""
+Optimisation d'un queryset d'après les champs d'un serializer :
+select_related pour les clés étrangères traversées, prefetch_related (Prefetch imbriqués)
+pour les relations multiples, annotations déclarées et, sur demande, only() sur les
+colonnes réellement lues.
+
+Hints lus dans le Meta des serializers :
+- field_sources : attributs lus par les SerializerMethodField ({'progress': ['task_counter']}) ;
+- field_annotations : expressions à annoter pour les SerializerMethodField
+  ({'comments_count': Count('comments', distinct=True)}).
+"""
+from contextlib import contextmanager
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class UnoptimizedRelationError(AssertionError):
+    """Requête émise pendant la sérialisation : une relation n'est pas couverte par l'optimiseur"""
+
+
+class QueryPlan:
+    def __init__(self, restrict=False):
+        self.restrict = restrict
+        self.only = set()
+        self.select = set()
+        # lookup -> Prefetch (serializer imbriqué) ou None (objets entiers / clés primaires)
+        self.prefetch = {}
+        self.annotations = {}
+        # Préfixes dont tout l'objet est nécessaire (méthode, source inconnue…)
+        self.full = set()
+
+
+def _join(prefix, name):
+    return f'{prefix}__{name}' if prefix else name
+
+
+def _add_source(plan, model, path, prefix='', needs_object=True):
+    """
+    Ajoute au plan un chemin de source (notation pointée) relatif à `model`.
+    Retourne (champ, lookup) si le chemin se termine sur une relation chargée.
+    """
+    parts = path.split('.')
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            # Méthode ou propriété : l'objet courant doit être complet
+            plan.full.add(prefix)
+            return None
+
+        lookup = _join(prefix, part)
+        if not field.is_relation:
+            plan.only.add(lookup)
+            return None
+        if field.many_to_many or field.one_to_many:
+            plan.prefetch.setdefault(lookup, None)
+            return field, lookup
+
+        last = index == len(parts) - 1
+        if field.concrete:
+            plan.only.add(lookup)
+        if last and not needs_object:
+            # Clé primaire seule (PrimaryKeyRelatedField) : la colonne suffit
+            return None
+        plan.select.add(lookup)
+        if last:
+            return field, lookup
+        model, prefix = field.related_model, lookup
+    return None
+
+
+def _nested_prefetch(plan, field, lookup, serializer):
+    """Prefetch dont le queryset est lui-même optimisé pour le serializer imbriqué"""
+    child = build_query_plan(serializer, field.related_model, restrict=plan.restrict)
+    if field.one_to_many:
+        # La clé étrangère sert à rattacher les objets préchargés
+        child.only.add(field.field.name)
+    queryset = apply_query_plan(field.related_model._default_manager.all(), child)
+    plan.prefetch[lookup] = Prefetch(lookup, queryset=queryset)
+
+
+def _walk(plan, serializer, model, prefix=''):
+    meta = getattr(serializer, 'Meta', None)
+    hints = getattr(meta, 'field_sources', {})
+    annotations = getattr(meta, 'field_annotations', {})
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if name in annotations and not prefix:
+                plan.annotations[name] = annotations[name]
+            elif name not in hints:
+                plan.full.add(prefix)
+            for source in hints.get(name, ()):
+                target = _add_source(plan, model, source, prefix)
+                if target and not (target[0].many_to_many or target[0].one_to_many):
+                    plan.full.add(target[1])
+            continue
+
+        if field.source == '*':
+            plan.full.add(prefix)
+            continue
+
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        needs_object = not isinstance(field, serializers.PrimaryKeyRelatedField)
+        target = _add_source(plan, model, field.source, prefix, needs_object)
+        if not target:
+            continue
+
+        relation, lookup = target
+        if relation.many_to_many or relation.one_to_many:
+            if isinstance(nested, serializers.Serializer):
+                _nested_prefetch(plan, relation, lookup, nested)
+        elif isinstance(nested, serializers.Serializer):
+            _walk(plan, nested, relation.related_model, lookup)
+        else:
+            plan.full.add(lookup)
+
+
+def build_query_plan(serializer, model, restrict=False):
+    plan = QueryPlan(restrict)
+    _walk(plan, serializer, model)
+    return plan
+
+
+def apply_query_plan(queryset, plan):
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+    if plan.prefetch:
+        queryset = queryset.prefetch_related(*[
+            plan.prefetch[lookup] or lookup for lookup in sorted(plan.prefetch)
+        ])
+
+    missing = {
+        name: expression for name, expression in plan.annotations.items()
+        if name not in queryset.query.annotations
+    }
+    if missing:
+        queryset = queryset.annotate(**missing)
+
+    if plan.restrict and '' not in plan.full:
+        only = set(plan.only)
+        # Relations dont l'objet entier est lu : ne pas restreindre leurs colonnes
+        for prefix in sorted(plan.full):
+            if any(prefix.startswith(f'{parent}__') for parent in plan.full):
+                # Déjà couvert par une relation parente chargée entièrement
+                continue
+            only = {path for path in only if not path.startswith(f'{prefix}__')}
+            only.add(prefix)
+        queryset = queryset.only(*sorted(only))
+    return queryset
+
+
+def optimize_queryset(queryset, serializer, restrict=False):
+    """
+    Remplace select/prefetch du queryset par ceux requis par le serializer.
+    Avec restrict=True, les colonnes chargées sont limitées à celles lues (?fields=).
+    """
+    plan = build_query_plan(serializer, queryset.model, restrict)
+    return apply_query_plan(queryset, plan)
+
+
+@contextmanager
+def forbid_queries(label):
+    """Lève UnoptimizedRelationError à la première requête SQL exécutée dans le bloc"""
+    def blocker(execute, sql, params, many, context):
+        raise UnoptimizedRelationError(
+            f"{label} : requête émise pendant la sérialisation, relation non optimisée ({sql})"
+        )
+
+    with connection.execute_wrapper(blocker):
+        yield
@@ -1,16 +1,342 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from functools import partial
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-class StandardResultsSetPagination(PageNumberPagination):
+
+def _resolve_field(model, path):
+    """Champ du modèle désigné par un chemin de tri (ex. department__name)"""
+    parts = path.split('__')
+    for part in parts[:-1]:
+        model = model._meta.get_field(part).related_model
+    if parts[-1] == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(parts[-1])
+
+
+def _is_model_field(model, path):
+    """Chemin de tri désignant une colonne du modèle (et non une annotation ou un extra)"""
+    try:
+        _resolve_field(model, path)
+    except (FieldDoesNotExist, AttributeError):
+        return False
+    return True
+
+
+def _field_value(instance, path):
+    parts = path.split('__')
+    for part in parts[:-1]:
+        instance = getattr(instance, part)
+    return _resolve_field(type(instance), parts[-1]).value_to_string(instance)
+
+
+def encode_cursor(instance, ordering, reverse=False):
+    """Encode la position d'un objet (valeurs des champs de tri) en curseur opaque"""
+    payload = {
+        'p': [_field_value(instance, field.lstrip('-')) for field in ordering],
+        'r': reverse,
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(model, cursor, ordering):
+    """
+    Décode un curseur opaque en (valeurs, sens inverse) ;
+    lève ValueError si le curseur est invalide.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        values, reverse = payload['p'], bool(payload.get('r'))
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError) as exc:
+        raise ValueError('Curseur invalide') from exc
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise ValueError('Curseur invalide')
+    try:
+        values = [
+            _resolve_field(model, field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+    except Exception as exc:
+        raise ValueError('Curseur invalide') from exc
+    return values, reverse
+
+
+def keyset_filter(ordering, values):
+    """Condition « strictement après » la position donnée, pour un tri multi-colonnes"""
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {ordering[i].lstrip('-'): values[i] for i in range(index)}
+        condition |= Q(**equal, **{f'{name}__{lookup}': values[index]})
+    return condition
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+class CursorResultsSetPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) sur le tri de la vue complété par l'id :
+    ni OFFSET ni COUNT(*), coût constant quelle que soit la profondeur.
+    Les champs de tri doivent être non nuls. Un tri sur une annotation (pertinence
+    de ?search=…) ne peut pas être encodé dans le curseur : le tri par défaut du
+    modèle s'applique alors.
+    """
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_query_param = 'cursor'
+    
+    def get_ordering(self, queryset):
+        model = queryset.model
+        ordering = [
+            field for field in (queryset.query.order_by or model._meta.ordering)
+            if isinstance(field, str) and field != '?'
+        ]
+        if not all(_is_model_field(model, field.lstrip('-')) for field in ordering):
+            ordering = [field for field in model._meta.ordering if isinstance(field, str)]
+        pk_name = queryset.model._meta.pk.name
+        if not any(field.lstrip('-') in ('pk', pk_name) for field in ordering):
+            ordering.append(pk_name)
+        return ordering
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+        
+        position, reverse = None, False
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            try:
+                position, reverse = decode_cursor(queryset.model, cursor, self.ordering)
+            except ValueError as e:
+                raise NotFound(str(e))
+        
+        ordering = reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+        
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+        
+        # En reculant, il existe forcément une page suivante ; en avançant, une précédente si curseur
+        has_next = True if reverse else has_more
+        has_previous = has_more if reverse else position is not None
+        self.next_cursor = encode_cursor(results[-1], self.ordering) if results and has_next else None
+        self.previous_cursor = (
+            encode_cursor(results[0], self.ordering, reverse=True) if results and has_previous else None
+        )
+        return results
+    
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+    
+    def get_next_link(self):
+        return self.get_link(self.next_cursor)
+    
+    def get_previous_link(self):
+        return self.get_link(self.previous_cursor)
     
     def get_paginated_response(self, data):
         return Response({
+            'status': 'success',
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+
+def estimate_count(queryset):
+    """
+    Nombre de lignes estimé par le planificateur, sans COUNT(*) :
+    PostgreSQL via EXPLAIN, SQLite via sqlite_stat1 (requête non filtrée, après ANALYZE).
+    Retourne None si aucune estimation n'est disponible.
+    """
+    connection = connections[queryset.db]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+            if connection.vendor == 'sqlite' and not queryset.query.where:
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s',
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+                return int(row[0].split()[0]) if row else None
+    except DatabaseError:
+        return None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator utilisant l'estimation du planificateur au-delà d'un seuil"""
+    
+    def __init__(self, *args, threshold=10000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+    
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        self.count_estimated = estimate is not None and estimate >= self.threshold
+        if self.count_estimated:
+            return estimate
+        return super().count
+
+
+class KnownCountPaginator(Paginator):
+    """Paginator dont le total est fourni par l'appelant (compteur dénormalisé) : pas de COUNT(*)"""
+    
+    def __init__(self, *args, count, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__dict__['count'] = count
+
+
+class UncountedPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+    
+    def has_next(self):
+        return self._has_next
+
+
+class UncountedPaginator(Paginator):
+    """Paginator sans COUNT(*) : lit une ligne de plus pour savoir s'il existe une page suivante"""
+    
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return super().validate_number(number)
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+    
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        has_next = len(rows) > self.per_page
+        # Nombre de pages connu à ce stade (borne inférieure)
+        self.__dict__['num_pages'] = number + 1 if has_next else number
+        return UncountedPage(rows[:self.per_page], number, self, has_next)
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Pagination par numéro de page ; ?cursor= ou ?pagination=cursor bascule
+    la requête en pagination par curseur (CursorResultsSetPagination).
+    
+    count_mode (attribut de la vue ou ?count_mode=) :
+    - exact : COUNT(*) habituel ;
+    - estimate : estimation du planificateur au-delà de count_estimate_threshold ;
+    - none : pas de total, seulement has_next (?page=last refusé).
+    
+    Une vue qui connaît déjà le total (compteur dénormalisé) le fournit dans
+    `view.known_count` : le COUNT(*) est alors évité quel que soit le mode.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_pagination_class = CursorResultsSetPagination
+    count_mode = 'exact'
+    count_modes = {
+        'exact': Paginator,
+        'estimate': EstimatedCountPaginator,
+        'none': UncountedPaginator,
+    }
+    count_estimate_threshold = 10000
+    
+    def get_count_mode(self, request, view):
+        mode = request.query_params.get('count_mode') or getattr(view, 'count_mode', self.count_mode)
+        return mode if mode in self.count_modes else self.count_mode
+    
+    def get_page_number(self, request, paginator):
+        # ?page=last demande le nombre de pages, donc un COUNT(*)
+        if self.mode == 'none' and request.query_params.get(self.page_query_param) in self.last_page_strings:
+            raise NotFound('Dernière page indisponible sans total (count_mode=none)')
+        return super().get_page_number(request, paginator)
+    
+    def use_cursor(self, request):
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or 'cursor' in request.query_params
+        )
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        
+        self.mode = self.get_count_mode(request, view)
+        self.django_paginator_class = self.count_modes[self.mode]
+        known_count = getattr(view, 'known_count', None)
+        if known_count is not None:
+            self.mode = 'exact'
+            self.django_paginator_class = partial(KnownCountPaginator, count=known_count)
+        elif self.mode == 'estimate':
+            self.django_paginator_class = partial(
+                EstimatedCountPaginator, threshold=self.count_estimate_threshold
+            )
+        return super().paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        
+        if self.mode == 'none':
+            return Response({
+                'status': 'success',
+                'has_next': self.page.has_next(),
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'results': data
+            })
+        
+        response = {
             'status': 'success',
             'count': self.page.paginator.count,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data
-        })
\ No newline at end of file
+        }
+        if self.mode == 'estimate':
+            response['count_estimated'] = self.page.paginator.count_estimated
+        return Response(response)
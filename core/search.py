@@ -0,0 +1,381 @@
+"""
+Recherche plein texte, avec racinisation française et classement par pertinence.
+
+Les modèles indexés sont déclarés avec register(modèle, {champ: poids}) ; les poids
+suivent la convention PostgreSQL (A > B > C > D). Le moteur dépend de la base :
+- SQLite : table virtuelle FTS5 par modèle (rowid = clé primaire), contenant les mots
+  normalisés et leur racine (french_stem) ; classement bm25 pondéré ; index de préfixes
+  de 2 à 4 caractères pour la saisie semi-automatique ;
+- PostgreSQL : index GIN sur to_tsvector('french', …) des champs, classement ts_rank
+  pondéré ; l'index d'expression est à jour sans écriture supplémentaire et sert aussi
+  les requêtes préfixes (terme:*).
+SEARCH_BACKEND (chemin d'une classe) remplace le choix par défaut ; sans moteur,
+FullTextSearchFilter retombe sur le SearchFilter de DRF (LIKE).
+
+L'index FTS5 est tenu à jour par post_save / post_delete (QuerySet.delete compris :
+le collecteur envoie post_delete pour chaque objet d'un modèle indexé), et par
+index_objects() pour les écritures en masse : IndexedQuerySet (update, bulk_create,
+bulk_update) ou QuerySet propre au modèle.
+
+L'index GIN de PostgreSQL est déclaré dans Meta.indexes (SearchIndex) ; il est créé
+par les migrations d'installation (install_index) et n'émet rien sur les autres bases.
+"""
+import re
+import unicodedata
+from functools import reduce
+from operator import add
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import connections, models, router
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+STOP_WORDS = frozenset(
+    'a au aux avec ce ces dans de des du elle en et eux il je la le les leur lui ma mais me meme '
+    'mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi '
+    'ton tu un une vos votre vous'.split()
+)
+
+# Suffixes retirés par french_stem (variante légère de l'algorithme de Savoy), du plus long au plus court
+SUFFIXES = (
+    ('issements', ''), ('issement', ''), ('atrices', ''), ('atrice', ''), ('ateurs', ''), ('ateur', ''),
+    ('ations', ''), ('ation', ''), ('ements', ''), ('ement', ''), ('ances', ''), ('ance', ''),
+    ('ences', ''), ('ence', ''), ('euses', ''), ('euse', ''), ('ites', ''), ('ite', ''),
+    ('ments', ''), ('ment', ''), ('ives', ''), ('ive', ''), ('ifs', ''), ('eaux', 'eau'),
+    ('aux', 'al'), ('eux', ''), ('ees', ''), ('ee', ''), ('ers', ''), ('er', ''), ('ez', ''),
+    ('es', ''), ('e', ''), ('s', ''), ('x', ''),
+)
+MIN_STEM = 3
+
+TOKEN_RE = re.compile(r'\w+')
+ELISION_RE = re.compile(r"\b(?:[cdjlmnst]|qu)['’]")
+
+
+def _unaccent(text):
+    return ''.join(
+        char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char)
+    )
+
+
+def french_stem(word):
+    """Racine d'un mot français déjà en minuscules et sans accents"""
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def tokenize(text):
+    """Mots d'un texte en minuscules, sans accents ni élisions"""
+    return TOKEN_RE.findall(ELISION_RE.sub(' ', _unaccent((text or '').lower())))
+
+
+def analyze(text):
+    """Termes recherchés d'un texte : racines des mots, hors mots vides"""
+    return [french_stem(token) for token in tokenize(text) if token not in STOP_WORDS]
+
+
+def analyze_document(text):
+    """
+    Termes indexés d'un texte : racine de chaque mot, suivie du mot entier s'il diffère,
+    afin qu'un préfixe saisi au-delà de la racine (« developpem ») trouve encore le mot
+    """
+    terms = []
+    for token in tokenize(text):
+        if token in STOP_WORDS:
+            continue
+        stem = french_stem(token)
+        terms.append(stem)
+        if stem != token:
+            terms.append(token)
+    return terms
+
+
+def split_prefix(text):
+    """
+    Saisie semi-automatique : (racines des mots complets, dernier mot en cours de frappe).
+    Le dernier mot n'est un préfixe que si la saisie ne se termine pas par un espace.
+    """
+    tokens = tokenize(text)
+    if not tokens or not text or text[-1].isspace():
+        return analyze(text), None
+    return analyze(' '.join(tokens[:-1])), tokens[-1]
+
+
+class SearchSpec:
+    def __init__(self, model, fields):
+        self.model = model
+        # {champ: poids}
+        self.fields = dict(fields)
+
+    @property
+    def index_table(self):
+        return f'{self.model._meta.db_table}_search'
+
+
+class SearchIndex(GinIndex):
+    """Index GIN sur to_tsvector(SEARCH_CONFIG, champs) ; aucune instruction hors PostgreSQL"""
+
+    @classmethod
+    def for_fields(cls, fields, name):
+        return cls(SearchVector(*fields, config=getattr(settings, 'SEARCH_CONFIG', 'french')), name=name)
+
+    def create_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().create_sql(model, schema_editor, *args, **kwargs)
+
+    def remove_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().remove_sql(model, schema_editor, *args, **kwargs)
+
+
+_registry = {}
+
+
+def register(model, fields):
+    """Déclare un modèle indexé ; ses écritures unitaires mettent l'index à jour"""
+    spec = SearchSpec(model, fields)
+    _registry[model] = spec
+    post_save.connect(_saved, sender=model, weak=False, dispatch_uid=f'search:{model._meta.label}:save')
+    post_delete.connect(_deleted, sender=model, weak=False, dispatch_uid=f'search:{model._meta.label}:delete')
+    return spec
+
+
+def get_spec(model):
+    return _registry.get(model)
+
+
+def registered_specs():
+    return list(_registry.values())
+
+
+class SQLiteSearchBackend:
+    """Tables FTS5 contenant les mots et leurs racines (rowid = clé primaire)"""
+    batch_size = 500
+    prefix_lengths = '2 3 4'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def quote(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def install(self, schema_editor, model, fields):
+        table = self.quote(SearchSpec(model, fields).index_table)
+        columns = ', '.join(self.quote(field) for field in fields)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"{columns}, tokenize='unicode61', prefix='{self.prefix_lengths}')"
+        )
+        self.rebuild(model, fields)
+
+    def uninstall(self, schema_editor, model, fields):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {self.quote(SearchSpec(model, fields).index_table)}')
+
+    def rebuild(self, model, fields):
+        table = self.quote(SearchSpec(model, fields).index_table)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+        pks = model._base_manager.using(self.connection.alias).order_by().values_list('pk', flat=True)
+        self.index_objects(model, fields, list(pks))
+
+    def index_objects(self, model, fields, pks):
+        table = self.quote(SearchSpec(model, fields).index_table)
+        columns = ', '.join(self.quote(field) for field in fields)
+        placeholders = ', '.join(['%s'] * (len(fields) + 1))
+        pks = list(pks)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(pks), self.batch_size):
+                chunk = pks[start:start + self.batch_size]
+                rows = list(
+                    model._base_manager.using(self.connection.alias)
+                    .filter(pk__in=chunk).values_list('pk', *fields)
+                )
+                cursor.executemany(
+                    f'INSERT OR REPLACE INTO {table} (rowid, {columns}) VALUES ({placeholders})',
+                    [[row[0]] + [' '.join(analyze_document(value)) for value in row[1:]] for row in rows]
+                )
+                missing = set(chunk) - {row[0] for row in rows}
+                if missing:
+                    self.remove_objects(model, fields, missing)
+
+    def remove_objects(self, model, fields, pks):
+        table = self.quote(SearchSpec(model, fields).index_table)
+        pks = list(pks)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(pks), self.batch_size):
+                chunk = pks[start:start + self.batch_size]
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})", chunk
+                )
+
+    def match_expression(self, text, prefix=False):
+        """
+        Requête FTS5 : tous les termes racinisés (ET implicite) et, en mode préfixe,
+        le mot en cours de frappe ; None si aucun terme
+        """
+        terms, partial = split_prefix(text) if prefix else (analyze(text), None)
+        parts = [f'"{term}"' for term in terms]
+        if partial:
+            parts.append(f'"{partial}"*')
+        return ' '.join(parts) or None
+
+    def search(self, queryset, spec, text, prefix=False):
+        match = self.match_expression(text, prefix)
+        if match is None:
+            return queryset.none()
+        table = self.quote(spec.index_table)
+        model_pk = f'{self.quote(spec.model._meta.db_table)}.{self.quote(spec.model._meta.pk.column)}'
+        weights = ', '.join(str(WEIGHTS[weight]) for weight in spec.fields.values())
+        # Jointure sur la table FTS5 : un seul MATCH, bm25 calculé pendant le parcours
+        # (fonction auxiliaire FTS5, inutilisable hors de la requête MATCH, d'où extra())
+        return queryset.extra(
+            tables=[spec.index_table],
+            where=[f'{table} MATCH %s', f'{table}.rowid = {model_pk}'],
+            params=[match],
+            # bm25 est négatif, plus petit = plus pertinent
+            select={'search_rank': f'-bm25({table}, {weights})'},
+        ).order_by('-search_rank', 'pk')
+
+
+class PostgresSearchBackend:
+    """Index GIN d'expression sur to_tsvector(config, champs) ; classement ts_rank pondéré"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.config = getattr(settings, 'SEARCH_CONFIG', 'french')
+
+    def document(self, fields):
+        return SearchVector(*fields, config=self.config)
+
+    def index(self, model, fields):
+        return SearchIndex(self.document(fields), name=SearchSpec(model, fields).index_table)
+
+    def install(self, schema_editor, model, fields):
+        schema_editor.add_index(model, self.index(model, fields))
+
+    def uninstall(self, schema_editor, model, fields):
+        schema_editor.remove_index(model, self.index(model, fields))
+
+    def rebuild(self, model, fields):
+        pass
+
+    def index_objects(self, model, fields, pks):
+        pass
+
+    def remove_objects(self, model, fields, pks):
+        pass
+
+    def search(self, queryset, spec, text, prefix=False):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        terms, partial = split_prefix(text) if prefix else (analyze(text), None)
+        if not terms and not partial:
+            return queryset.none()
+        if partial:
+            # Dernier mot en préfixe, accents conservés comme dans le tsvector de la configuration
+            partial = TOKEN_RE.findall(text.lower())[-1]
+            query = SearchQuery(f'{partial}:*', config=self.config, search_type='raw')
+            complete = text.rsplit(None, 1)[0] if terms else ''
+            if complete.strip():
+                query = SearchQuery(complete, config=self.config, search_type='websearch') & query
+        else:
+            query = SearchQuery(text, config=self.config, search_type='websearch')
+        weighted = reduce(add, (
+            SearchVector(field, weight=weight, config=self.config) for field, weight in spec.fields.items()
+        ))
+        # Même expression que l'index GIN : filtre indexé ; le classement ne porte que sur les résultats
+        return queryset.alias(search_document=self.document(spec.fields)).filter(
+            search_document=query
+        ).annotate(search_rank=SearchRank(weighted, query)).order_by('-search_rank', 'pk')
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(connection):
+    """Moteur de recherche de la connexion, ou None (recherche LIKE de DRF)"""
+    path = getattr(settings, 'SEARCH_BACKEND', '')
+    backend_class = import_string(path) if path else BACKENDS.get(connection.vendor)
+    return backend_class(connection) if backend_class else None
+
+
+def _backend_for(model):
+    return get_backend(connections[router.db_for_write(model)])
+
+
+def index_objects(model, pks):
+    """Met à jour l'index des objets donnés (écritures en masse)"""
+    spec, backend = get_spec(model), _backend_for(model)
+    if spec and backend and pks:
+        backend.index_objects(model, spec.fields, pks)
+
+
+def touches_index(model, fields):
+    spec = get_spec(model)
+    return bool(spec) and any(field in spec.fields for field in fields)
+
+
+class IndexedQuerySet(models.QuerySet):
+    """QuerySet d'un modèle indexé : index mis à jour par update(), bulk_create() et bulk_update()"""
+
+    def update(self, **kwargs):
+        if not touches_index(self.model, kwargs):
+            return super().update(**kwargs)
+        pks = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        index_objects(self.model, pks)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        index_objects(self.model, [obj.pk for obj in objs if obj.pk is not None])
+        return objs
+
+
+def _saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or touches_index(sender, update_fields):
+        index_objects(sender, [instance.pk])
+
+
+def _deleted(sender, instance, **kwargs):
+    spec, backend = get_spec(sender), _backend_for(sender)
+    if spec and backend:
+        backend.remove_objects(sender, spec.fields, [instance.pk])
+
+
+def install_index(schema_editor, model, fields):
+    """Crée et remplit l'index d'un modèle (opération de migration, modèle historique)"""
+    backend = get_backend(schema_editor.connection)
+    if backend:
+        backend.install(schema_editor, model, fields)
+
+
+def uninstall_index(schema_editor, model, fields):
+    backend = get_backend(schema_editor.connection)
+    if backend:
+        backend.uninstall(schema_editor, model, fields)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    ?search= en plein texte (classé par pertinence) pour les modèles enregistrés ;
+    SearchFilter de DRF pour les autres ou sans moteur plein texte.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        spec = get_spec(queryset.model)
+        backend = get_backend(connections[queryset.db]) if spec else None
+        if not text or backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, spec, text)
@@ -0,0 +1,183 @@
+from functools import partial
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import SkipField, get_attribute
+from rest_framework.settings import api_settings
+
+
+class DynamicFieldsMixin:
+    """
+    Champs rendus à la demande :
+    - fields : liste blanche des champs à rendre (?fields=id,title,status) ;
+    - expand : champs optionnels déclarés dans Meta.expandable_fields (?expand=project_details).
+    
+    Meta.field_sources indique les attributs lus par les SerializerMethodField,
+    pour que l'optimiseur de queryset (core.optimizer) puisse restreindre les colonnes.
+    """
+    
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand or ():
+            if name in expandable:
+                self.fields[name] = expandable[name]()
+        
+        if fields:
+            allowed = set(fields) | set(expand or ())
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+
+class DynamicFieldsModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    pass
+
+
+def _column_path(model, attrs):
+    """
+    Chemin d'attributs vers une colonne à travers des clés étrangères directes,
+    ou None si la source passe par une méthode, une propriété ou une relation inverse.
+    """
+    path = []
+    for index, attr in enumerate(attrs):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        if index == len(attrs) - 1:
+            if model_field.is_relation:
+                return None
+            path.append(model_field.attname)
+        elif model_field.many_to_one or model_field.one_to_one:
+            path.append(attr)
+            model = model_field.related_model
+        else:
+            return None
+    return '.'.join(path)
+
+
+def _field_getter(field):
+    """Lecture de la valeur brute d'un champ, au plus court quand la source est une colonne"""
+    model = getattr(getattr(field.parent, 'Meta', None), 'model', None)
+    attrs = field.source_attrs
+    
+    if model is not None and len(attrs) == 1 and isinstance(field, serializers.PrimaryKeyRelatedField):
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            model_field = None
+        if model_field is not None and model_field.concrete and field.pk_field is None:
+            # Même valeur que PKOnlyObject, sans accéder à l'objet lié
+            return attrgetter(model_field.attname)
+    
+    path = _column_path(model, attrs) if model is not None and attrs else None
+    read = attrgetter(path) if path else partial(get_attribute, attrs=attrs)
+    
+    def getter(instance):
+        try:
+            return read(instance)
+        except (KeyError, AttributeError):
+            # Relation intermédiaire absente : SkipField, défaut ou None comme DRF
+            return field.get_attribute(instance)
+    return getter
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation avec le fuseau résolu une seule fois"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+    
+    def convert(value):
+        if not value:
+            return None
+        if isinstance(value, str) or not timezone.is_aware(value):
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(field_timezone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _compile_field(field):
+    if isinstance(field, serializers.SerializerMethodField):
+        return getattr(field.parent, field.method_name)
+    
+    if isinstance(field, serializers.ManyRelatedField):
+        child = field.child_relation
+        if isinstance(child, serializers.PrimaryKeyRelatedField) and child.pk_field is None:
+            return lambda instance: [item.pk for item in field.get_attribute(instance)]
+        return lambda instance: field.to_representation(field.get_attribute(instance))
+    
+    getter = _field_getter(field)
+    if isinstance(field, serializers.ListSerializer):
+        render = compile_serializer(field.child)
+        
+        def convert(value):
+            iterable = value.all() if isinstance(value, models.Manager) else value
+            return [render(item) for item in iterable]
+    elif isinstance(field, serializers.Serializer):
+        convert = compile_serializer(field)
+    elif isinstance(field, serializers.PrimaryKeyRelatedField) and getter.__class__ is attrgetter:
+        convert = None
+    elif isinstance(field, serializers.DateTimeField):
+        convert = _datetime_converter(field)
+    else:
+        convert = field.to_representation
+    
+    def read(instance):
+        value = getter(instance)
+        if value is None or convert is None:
+            return value
+        return convert(value)
+    return read
+
+
+def compile_serializer(serializer):
+    """
+    Compile un serializer en lecture seule vers une fonction instance -> dict.
+    
+    La sortie est identique à serializer.to_representation (mêmes clés, même ordre,
+    mêmes champs omis) mais évite, pour chaque ligne, la résolution générique des
+    sources, les OrderedDict et l'itération sur _readable_fields.
+    """
+    steps = [
+        (name, _compile_field(field))
+        for name, field in serializer.fields.items()
+        if not field.write_only
+    ]
+    
+    def render(instance):
+        ret = {}
+        for name, read in steps:
+            try:
+                ret[name] = read(instance)
+            except SkipField:
+                pass
+        return ret
+    return render
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer des listes en lecture : le serializer enfant est compilé une fois
+    (compile_serializer) puis appliqué à chaque ligne.
+    """
+    
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        render = compile_serializer(self.child)
+        return [render(item) for item in iterable]
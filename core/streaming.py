@@ -0,0 +1,26 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _dumps(value):
+    # Même format que le JSONRenderer de DRF (compact, unicode)
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def streaming_json_response(items, key='data', envelope=None):
+    """
+    Réponse JSON envoyée en flux : l'enveloppe puis chaque élément de `items`
+    (itérable paresseux) sans construire la liste complète en mémoire.
+    """
+    envelope = {'status': 'success', **(envelope or {})}
+    
+    def generate():
+        head = _dumps(envelope)[:-1]
+        yield f'{head},{_dumps(key)}:['
+        for index, item in enumerate(items):
+            yield (',' if index else '') + _dumps(item)
+        yield ']}'
+    
+    return StreamingHttpResponse(generate(), content_type='application/json')
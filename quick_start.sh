@@ -37,5 +37,6 @@ echo "🔑 Admin disponible sur: http://localhost:8000/admin"
 echo ""
 echo "Commandes utiles:"
 echo "  - Voir les logs: docker-compose logs -f"
+echo "  - Logs du worker des notifications: docker-compose logs -f notifications"
 echo "  - Arrêter: docker-compose down"
 echo "  - Redémarrer: docker-compose restart"
@@ -0,0 +1,236 @@
+"""
+Flux d'activité du tableau de bord (ActivityFeedEntry).
+
+Les entrées sont écrites au moment de l'événement, une ligne par périmètre de lecture :
+- tâche terminée (événement TaskEvent completed) : ALL (directeurs), département du
+  projet (coordinateurs), chacun des assignés ;
+- projet créé : PUBLIC (tout le monde) ;
+- notification non lue : son destinataire. Lue, elle sort du flux.
+
+Titres et noms (projet, département, utilisateur) sont ceux du moment de l'événement,
+sauf le département, qui suit le projet (sync_departments).
+
+Lecture : un utilisateur lit au plus trois périmètres disjoints (scopes_for), sans
+doublon. feed() les fusionne en une seule requête UNION ALL dont chaque branche lit
+au plus `limit + 1` lignes de l'index (scope, created_at, id), puis pagine par
+curseur sur (created_at, id).
+"""
+from collections import defaultdict
+from operator import attrgetter, itemgetter
+
+from django.db import connections, transaction
+from core.pagination import decode_cursor, encode_cursor, keyset_filter
+
+PUBLIC = 'public'
+ALL = 'all'
+ORDERING = ['-created_at', '-id']
+# Périmètres de l'administration : toutes les tâches et tous les projets
+ADMIN_SCOPES = [PUBLIC, ALL]
+
+
+def department_scope(department_id):
+    return f'department:{department_id}'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def notification_scope(user_id):
+    return f'notifications:{user_id}'
+
+
+def scopes_for(user):
+    """Périmètres lus par un utilisateur (disjoints : une activité n'y apparaît qu'une fois)"""
+    if user.role == 'directeur':
+        task_scope = ALL
+    elif user.role == 'coordinateur' and user.department_id:
+        task_scope = department_scope(user.department_id)
+    else:
+        task_scope = user_scope(user.pk)
+    return [PUBLIC, task_scope, notification_scope(user.pk)]
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
+def _task_entries(completions, Task, Entry):
+    """Entrées des tâches terminées : paires (identifiant de tâche, date)"""
+    task_ids = {task_id for task_id, _ in completions}
+    tasks = {
+        row[0]: row[1:]
+        for row in Task.objects.filter(pk__in=task_ids).values_list(
+            'pk', 'title', 'project_id', 'project__name', 'project__department_id', 'project__department__name'
+        )
+    }
+    Assignments = Task._meta.get_field('assigned_to').remote_field.through
+    assignees = defaultdict(list)
+    rows = Assignments.objects.filter(task_id__in=task_ids).values_list(
+        'task_id', 'user_id', 'user__first_name', 'user__last_name'
+    )
+    for task_id, user_id, first_name, last_name in rows:
+        assignees[task_id].append((last_name, first_name, user_id))
+
+    entries = []
+    for task_id, created_at in completions:
+        if task_id not in tasks:
+            continue
+        title, project_id, project_name, department_id, department_name = tasks[task_id]
+        # Tri des utilisateurs (nom, prénom) : le premier assigné affiché
+        people = sorted(assignees[task_id])
+        fields = {
+            'activity_type': 'task_completed',
+            'title': f'Tâche terminée: {title}',
+            'project_name': project_name,
+            'department_name': department_name,
+            'user_name': _full_name(people[0][1], people[0][0]) if people else '',
+            'task_id': task_id,
+            'project_id': project_id,
+            'created_at': created_at,
+        }
+        scopes = [ALL, department_scope(department_id)] + [user_scope(user_id) for _, _, user_id in people]
+        entries.extend(Entry(scope=scope, **fields) for scope in scopes)
+    return entries
+
+
+def _project_entries(project_ids, Project, Entry):
+    rows = Project.objects.filter(pk__in=project_ids).values_list(
+        'pk', 'name', 'department__name', 'created_by__first_name', 'created_by__last_name', 'created_at'
+    )
+    return [
+        Entry(
+            scope=PUBLIC, activity_type='project_created', title=f'Nouveau projet: {name}',
+            project_name=name, department_name=department_name,
+            user_name=_full_name(first_name or '', last_name or ''), project_id=project_id, created_at=created_at,
+        )
+        for project_id, name, department_name, first_name, last_name, created_at in rows
+    ]
+
+
+def _notification_entries(notifications, Entry):
+    return [
+        Entry(
+            scope=notification_scope(notification.user_id), activity_type=notification.notification_type,
+            title=notification.title, message=notification.message, notification_id=notification.pk,
+            task_id=notification.task_id, project_id=notification.project_id, created_at=notification.created_at,
+        )
+        for notification in notifications
+        if not notification.is_read
+    ]
+
+
+def _models():
+    from .models import ActivityFeedEntry, Notification, Project, Task
+    return Task, Project, Notification, ActivityFeedEntry
+
+
+def tasks_completed(events):
+    """Événements TaskEvent completed nouvellement écrits"""
+    if not events:
+        return
+    Task, _, _, Entry = _models()
+    Entry.objects.bulk_create(
+        _task_entries([(event.task_id, event.created_at) for event in events], Task, Entry), batch_size=500
+    )
+
+
+def projects_created(project_ids):
+    _, Project, _, Entry = _models()
+    Entry.objects.bulk_create(_project_entries(project_ids, Project, Entry))
+
+
+def notifications_created(notifications):
+    _, _, _, Entry = _models()
+    Entry.objects.bulk_create(_notification_entries(notifications, Entry), batch_size=500)
+
+
+def notifications_changed(notification_ids):
+    """Notifications modifiées (lues ou non) : leurs entrées sont réécrites"""
+    if not notification_ids:
+        return
+    _, _, Notification, Entry = _models()
+    Entry.objects.filter(notification_id__in=notification_ids).delete()
+    notifications_created(Notification.objects.filter(pk__in=notification_ids, is_read=False))
+
+
+def sync_departments(project_ids):
+    """Projets changés de département : les entrées de leurs tâches changent de périmètre"""
+    from .models import ActivityFeedEntry, Project
+    rows = Project.objects.filter(pk__in=set(project_ids)).values_list('pk', 'department_id', 'department__name')
+    for project_id, department_id, department_name in rows:
+        entries = ActivityFeedEntry.objects.filter(project_id=project_id)
+        entries.filter(scope__startswith='department:').update(scope=department_scope(department_id))
+        entries.filter(notification__isnull=True).exclude(department_name=department_name).update(
+            department_name=department_name
+        )
+
+
+def rebuild(Task, TaskEvent, Project, Notification, Entry, chunk_size=2000, progress=None):
+    """
+    Reconstruit le flux : tâches terminées (journal TaskEvent), projets, notifications non lues.
+    Modèles en paramètres (utilisable depuis une migration). Retourne le nombre d'entrées écrites.
+    """
+    written = 0
+    sources = [
+        (
+            TaskEvent.objects.filter(event_type='completed').values_list('pk', 'task_id', 'created_at'),
+            lambda rows: _task_entries([row[1:] for row in rows], Task, Entry),
+            itemgetter(0),
+        ),
+        (Project.objects.values_list('pk', flat=True), lambda rows: _project_entries(rows, Project, Entry), int),
+        (Notification.objects.filter(is_read=False), lambda rows: _notification_entries(rows, Entry), attrgetter('pk')),
+    ]
+    with transaction.atomic():
+        Entry.objects.all().delete()
+        for queryset, build, key in sources:
+            last_id = 0
+            while True:
+                rows = list(queryset.filter(pk__gt=last_id).order_by('pk')[:chunk_size])
+                if not rows:
+                    break
+                last_id = key(rows[-1])
+                written += len(Entry.objects.bulk_create(build(rows), batch_size=500))
+                if progress:
+                    progress(written)
+    return written
+
+
+def _merged(querysets, limit):
+    """Fusion des branches triées en une requête (UNION ALL, tri et limite externes)"""
+    if len(querysets) == 1:
+        return list(querysets[0])
+    model, db = querysets[0].model, querysets[0].db
+    quote = connections[db].ops.quote_name
+    parts, params = [], []
+    for index, queryset in enumerate(querysets):
+        sql, branch_params = queryset.query.get_compiler(using=db).as_sql()
+        parts.append(f'SELECT * FROM ({sql}) {quote(f"feed_{index}")}')
+        params.extend(branch_params)
+    sql = (
+        ' UNION ALL '.join(parts)
+        + f' ORDER BY {quote("created_at")} DESC, {quote("id")} DESC LIMIT %s'
+    )
+    return list(model.objects.db_manager(db).raw(sql, params + [limit]))
+
+
+def feed(scopes, limit=10, cursor=None):
+    """
+    Entrées des périmètres `scopes`, des plus récentes aux plus anciennes.
+    Retourne (entrées, curseur de la page suivante ou None) ; ValueError si le curseur est invalide.
+    """
+    from .models import ActivityFeedEntry
+    condition = None
+    if cursor:
+        position, _ = decode_cursor(ActivityFeedEntry, cursor, ORDERING)
+        condition = keyset_filter(ORDERING, position)
+
+    branches = []
+    for scope in dict.fromkeys(scopes):
+        queryset = ActivityFeedEntry.objects.filter(scope=scope)
+        if condition is not None:
+            queryset = queryset.filter(condition)
+        branches.append(queryset.order_by(*ORDERING)[:limit + 1])
+    entries = _merged(branches, limit + 1)
+    next_cursor = encode_cursor(entries[limit - 1], ORDERING) if len(entries) > limit else None
+    return entries[:limit], next_cursor
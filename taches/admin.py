@@ -18,6 +18,7 @@ class ProjectAdmin(ImportExportModelAdmin):
     search_fields = ['name', 'code', 'description']
     filter_horizontal = ['coordinators']
     readonly_fields = ['created_at', 'updated_at']
+    list_select_related = ['department', 'task_counter']
     
     fieldsets = (
         ('Informations générales', {
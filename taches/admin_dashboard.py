@@ -2,7 +2,9 @@ from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Count, Q, Sum, Avg
 from django.db.models.functions import TruncDate, TruncMonth
+from . import activity, charts
 from .models import Project, Task, Notification
+from .serializers import ActivityFeedEntrySerializer
 from utilisateurs.models import User
 
 class DashboardMetrics:
@@ -59,89 +61,19 @@ class DashboardMetrics:
     
     @staticmethod
     def get_activity_feed(limit=10):
-        """Retourne les activités récentes"""
-        activities = []
-        
-        # Tâches récemment complétées
-        completed_tasks = Task.objects.filter(
-            is_completed=True,
-            completed_date__isnull=False
-        ).select_related('project')[:limit]
-        
-        for task in completed_tasks:
-            activities.append({
-                'type': 'task_completed',
-                'title': f'Tâche complétée: {task.title}',
-                'project': task.project.name,
-                'user': task.assigned_to.first() if task.assigned_to.exists() else None,
-                'date': task.completed_date,
-                'icon': 'fa-check-circle',
-                'color': 'success'
-            })
-        
-        # Nouveaux projets
-        new_projects = Project.objects.order_by('-created_at')[:limit]
-        for project in new_projects:
-            activities.append({
-                'type': 'project_created',
-                'title': f'Nouveau projet: {project.name}',
-                'department': project.department.name,
-                'user': project.created_by,
-                'date': project.created_at,
-                'icon': 'fa-folder-open',
-                'color': 'info'
-            })
-        
-        # Notifications récentes
-        recent_notifications = Notification.objects.filter(
-            is_read=False
-        ).order_by('-created_at')[:limit]
-        
-        for notif in recent_notifications:
-            activities.append({
-                'type': notif.notification_type,
-                'title': notif.title,
-                'message': notif.message,
-                'user': notif.user,
-                'date': notif.created_at,
-                'icon': 'fa-bell',
-                'color': 'warning'
-            })
-        
-        # Trier par date
-        activities.sort(key=lambda x: x['date'], reverse=True)
-        return activities[:limit]
+        """Retourne les activités récentes (tâches terminées et projets créés, toutes équipes)"""
+        entries, _ = activity.feed(activity.ADMIN_SCOPES, limit)
+        return ActivityFeedEntrySerializer(entries, many=True).data
     
     @staticmethod
     def get_chart_data():
         """Données pour les graphiques"""
-        today = timezone.now()
-        last_30_days = [today - timedelta(days=x) for x in range(29, -1, -1)]
-        
-        # Progression des tâches par jour
-        tasks_by_day = []
-        for day in last_30_days:
-            tasks = Task.objects.filter(
-                created_at__date=day.date()
-            ).aggregate(
-                created=Count('id'),
-                completed=Count('id', filter=Q(completed_date__date=day.date()))
-            )
-            tasks_by_day.append({
-                'date': day.strftime('%d/%m'),
-                'created': tasks['created'],
-                'completed': tasks['completed']
-            })
-        
-        # Répartition des tâches par statut
-        tasks_by_status = Task.objects.values('status').annotate(
-            count=Count('id')
-        ).order_by('status')
+        # Progression des tâches par jour (30 derniers jours, agrégats quotidiens)
+        tasks_by_day = charts.task_timeline('30d', 'day')
         
-        # Tâches par projet (top 5)
-        tasks_by_project = Project.objects.annotate(
-            task_count=Count('tasks')
-        ).order_by('-task_count')[:5].values('name', 'task_count')
+        # Répartition des tâches par statut et par projet (top 5) : compteurs par projet
+        tasks_by_status = charts.tasks_by_status()
+        tasks_by_project = charts.tasks_by_project(5)
         
         return {
             'tasks_timeline': tasks_by_day,
@@ -153,12 +85,13 @@ class DashboardMetrics:
     @staticmethod
     def get_project_progress():
         """Progression des projets actifs"""
-        active_projects = Project.objects.filter(status='active')[:5]
+        active_projects = Project.objects.filter(status='active').select_related('task_counter')[:5]
         progress_data = []
         
         for project in active_projects:
-            total_tasks = project.tasks.count()
-            completed_tasks = project.tasks.filter(is_completed=True).count()
+            counter = project.get_task_counter()
+            total_tasks = counter.total
+            completed_tasks = counter.done
             progress = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
             
             progress_data.append({
@@ -4,3 +4,9 @@ class TachesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'taches'
     verbose_name = 'Gestion des tâches et projets'
+
+    def ready(self):
+        from . import caching
+        # Avant les signaux, qui remplacent l'état d'origine des instances
+        caching.register_models()
+        from . import search, signals  # noqa: F401
@@ -0,0 +1,115 @@
+"""
+Écriture de lots de tâches (import de sprint).
+
+Les tâches sont insérées / mises à jour avec bulk_create / bulk_update, les
+assignations écrites directement dans la table de liaison, puis notifications
+(mises en file) et index de visibilité sont produits en une passe pour tout le lot.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from .events import record_assignments
+from .models import Task, UserTaskCounter
+from .notifications import notify_many
+from .visibility import refresh_project_visibility, refresh_task_visibility
+
+
+def _unique(users):
+    return list({user.pk: user for user in users}.values())
+
+
+def bulk_write_tasks(user, creates, updates):
+    """
+    creates : données validées des nouvelles tâches ;
+    updates : paires (tâche existante, données validées partielles).
+    Retourne (tâches créées, tâches mises à jour).
+    """
+    now = timezone.now()
+    Assignment = Task.assigned_to.through
+
+    with transaction.atomic():
+        created = []
+        # (tâche, assignés, création ?)
+        assignments = []
+        for data in creates:
+            data = dict(data)
+            data.pop('id', None)
+            assignees = _unique(data.pop('assigned_to', []))
+            task = Task(created_by=user, **data)
+            task.apply_completion(now)
+            created.append(task)
+            assignments.append((task, assignees, True))
+        Task.objects.bulk_create(created)
+
+        updated = []
+        fields = {'completed_date', 'completion_percentage', 'updated_at'}
+        reassigned = []
+        for task, data in updates:
+            data = dict(data)
+            data.pop('id', None)
+            assignees = data.pop('assigned_to', None)
+            for attr, value in data.items():
+                setattr(task, attr, value)
+            fields.update(data)
+            task.apply_completion(now)
+            task.updated_at = now
+            updated.append(task)
+            if assignees is not None:
+                reassigned.append((task, _unique(assignees), False))
+        if updated:
+            Task.objects.bulk_update(updated, sorted(fields))
+
+        # Assignations : lignes de liaison écrites directement, notifications aux nouveaux assignés
+        previous = defaultdict(set)
+        if reassigned:
+            rows = Assignment.objects.filter(task_id__in=[task.pk for task, _, _ in reassigned])
+            for task_id, user_id in rows.values_list('task_id', 'user_id'):
+                previous[task_id].add(user_id)
+            rows.delete()
+        assignments.extend(reassigned)
+        Assignment.objects.bulk_create([
+            Assignment(task_id=task.pk, user_id=assignee.pk)
+            for task, assignees, _ in assignments
+            for assignee in assignees
+        ])
+
+        # Lignes de liaison écrites sans signal m2m_changed : journal des assignations ajoutées
+        record_assignments([
+            (task, assignee.pk)
+            for task, assignees, _ in assignments
+            for assignee in assignees
+            if assignee.pk not in previous[task.pk]
+        ])
+
+        events = []
+        for task, assignees, is_new in assignments:
+            if is_new:
+                title = f'Nouvelle tâche: {task.title}'
+                message = f'Vous avez été assigné à la tâche "{task.title}" dans le projet {task.project.name}'
+            else:
+                title = f'Nouvelle assignation: {task.title}'
+                message = f'Vous avez été assigné à la tâche "{task.title}"'
+                assignees = [assignee for assignee in assignees if assignee.pk not in previous[task.pk]]
+            events.append({
+                'notification_type': 'task_assigned',
+                'title': title,
+                'message': message,
+                'users': assignees,
+                'task': task.pk,
+                'project': task.project_id,
+            })
+        notify_many(events)
+
+        # Les règles de visibilité dépendent des assignés, écrits après les tâches
+        touched = [task for task, assignees, is_new in assignments if assignees or not is_new]
+        if touched:
+            refresh_task_visibility({task.pk for task in touched})
+            refresh_project_visibility({task.project_id for task in touched})
+            # Anciens et nouveaux assignés : lignes de liaison écrites sans signal m2m_changed
+            UserTaskCounter.refresh_for(
+                {assignee.pk for _, assignees, _ in assignments for assignee in assignees}
+                | {user_id for user_ids in previous.values() for user_id in user_ids}
+            )
+
+    return created, updated
@@ -0,0 +1,84 @@
+"""
+Étiquettes de cache des tâches et projets (voir core.caching).
+
+- Tâche : model:taches.task, project:<projet> (et l'ancien projet en cas de déplacement) ;
+- projet : model:taches.project, project:<id>, department:<département> (et l'ancien) ;
+- notification : model:taches.notification, user:<destinataire> ;
+- commentaire : model:taches.taskcomment ;
+- utilisateur : project:<projet> des tâches qu'il crée ou qui lui sont assignées
+  (cartes du tableau Kanban).
+
+Les statistiques de projets dépendent en plus de la visibilité : étiquette
+project_stats, incrémentée par toute écriture touchant aux projets, à leurs compteurs
+ou à l'index de visibilité. Les utilisateurs dont la visibilité change (rôle,
+département, section, assignation) voient leur étiquette user:<id> incrémentée.
+"""
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_delete
+from core import caching
+from utilisateurs.caching import USER_IGNORED_FIELDS
+
+PROJECT_STATS_TAG = 'project_stats'
+
+
+def invalidate_project_stats():
+    caching.bump_tags([PROJECT_STATS_TAG])
+
+
+def project_stats_key(scope):
+    return caching.tagged_key('taches:project_stats', [PROJECT_STATS_TAG], scope)
+
+
+def project_tags(project_ids):
+    return [f'project:{project_id}' for project_id in project_ids if project_id]
+
+
+def department_tags(department_ids):
+    return [f'department:{department_id}' for department_id in department_ids if department_id]
+
+
+def user_tags(user_ids):
+    return [f'user:{user_id}' for user_id in user_ids if user_id]
+
+
+def invalidate_users(user_ids):
+    """Réponses propres aux utilisateurs donnés (cache_per_user) : leur périmètre a changé"""
+    caching.bump_tags(user_tags(user_ids))
+
+
+def _task_tags(task):
+    return project_tags({task.project_id, getattr(task, '_original_project_id', None)})
+
+
+def _project_tags(project):
+    return project_tags([project.pk]) + department_tags(
+        {project.department_id, getattr(project, '_original_department_id', None)}
+    )
+
+
+def _notification_tags(notification):
+    return user_tags([notification.user_id])
+
+
+def _user_saved(sender, instance, update_fields=None, created=False, **kwargs):
+    """Nom, département, poste… affichés sur les cartes des tâches de l'utilisateur"""
+    if created or (update_fields and USER_IGNORED_FIELDS.issuperset(update_fields)):
+        return
+    from .models import Task
+    project_ids = Task.objects.filter(
+        Q(assigned_to=instance) | Q(created_by=instance)
+    ).values_list('project_id', flat=True).distinct()
+    caching.bump_tags(project_tags(project_ids))
+
+
+def register_models():
+    """Branche l'invalidation sur les écritures ; à appeler avant taches.signals (états d'origine)"""
+    from utilisateurs.models import User
+    from .models import Notification, Project, Task, TaskComment
+    caching.register(Task, _task_tags)
+    caching.register(Project, _project_tags)
+    caching.register(Notification, _notification_tags)
+    caching.register(TaskComment)
+    # Avant la suppression : assignations et auteur encore lisibles
+    post_save.connect(_user_saved, sender=User, dispatch_uid='cache:taches:user:save')
+    pre_delete.connect(_user_saved, sender=User, dispatch_uid='cache:taches:user:delete')
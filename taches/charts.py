@@ -0,0 +1,112 @@
+"""
+Séries et répartitions des graphiques du tableau de bord, lues dans les tables
+d'agrégats : leur coût dépend du nombre de périodes affichées et de projets, pas du
+nombre de tâches.
+
+- Chronologie : agrégats quotidiens TaskDailyRollup (voir taches.rollups) regroupés
+  par période ; tâches créées et terminées dans la période (séries indépendantes),
+  tâches ouvertes et en retard en fin de période.
+- Répartitions par statut et par projet : compteurs ProjectTaskCounter (une entrée par
+  statut présent, comme un regroupement des tâches par statut).
+
+Période : ?range=<n><unité> (d jours, w semaines, m mois), ?granularity=day|week|month.
+La période se termine au découpage courant (aujourd'hui, semaine ou mois en cours).
+"""
+import re
+from datetime import timedelta
+
+from django.db.models import F, Sum
+from django.utils import timezone
+from . import rollups
+from .models import Project, ProjectTaskCounter, TaskDailyRollup
+
+GRANULARITIES = ('day', 'week', 'month')
+DEFAULT_RANGE = '30d'
+DEFAULT_GRANULARITY = 'day'
+# Garde-fou : nombre de points d'une série
+MAX_BUCKETS = 400
+RANGE_RE = re.compile(r'^(\d+)([dwm])$')
+UNITS = {'d': 'day', 'w': 'week', 'm': 'month'}
+LABEL_FORMATS = {'day': '%d/%m', 'week': '%d/%m', 'month': '%m/%Y'}
+# Compteurs par statut ; le compteur « done » compte les tâches terminées (is_completed),
+# quel que soit leur statut : le statut « done » se déduit du total
+STATUS_COUNTERS = ['todo', 'in_progress', 'review', 'blocked']
+
+
+def truncate(day, unit):
+    """Début de la période (jour, semaine commençant le lundi, mois) contenant `day`"""
+    if unit == 'week':
+        return day - timedelta(days=day.weekday())
+    if unit == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def shift(day, unit, count):
+    """Décale un début de période de `count` périodes"""
+    if unit == 'month':
+        year, month = divmod(day.year * 12 + day.month - 1 + count, 12)
+        return day.replace(year=year, month=month + 1, day=1)
+    return day + timedelta(days=count * (7 if unit == 'week' else 1))
+
+
+def parse_period(range_value=None, granularity=None, today=None):
+    """
+    Valide ?range= et ?granularity=.
+    Retourne (début, liste des débuts de période) ; ValueError si invalide.
+    """
+    range_value = (range_value or DEFAULT_RANGE).strip().lower()
+    granularity = (granularity or DEFAULT_GRANULARITY).strip().lower()
+    match = RANGE_RE.match(range_value)
+    if not match or int(match.group(1)) < 1:
+        raise ValueError('Paramètre range invalide (ex. 30d, 12w, 12m)')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Paramètre granularity invalide ({", ".join(GRANULARITIES)})')
+
+    today = today or timezone.localdate()
+    count, unit = int(match.group(1)), UNITS[match.group(2)]
+    start = truncate(shift(truncate(today, unit), unit, 1 - count), granularity)
+    end = truncate(today, granularity)
+
+    buckets = [start]
+    while buckets[-1] < end:
+        if len(buckets) >= MAX_BUCKETS:
+            raise ValueError(f'Période trop longue pour cette granularité ({MAX_BUCKETS} points au maximum)')
+        buckets.append(shift(buckets[-1], granularity, 1))
+    return start, buckets
+
+
+def task_timeline(range_value=None, granularity=None, queryset=None):
+    """
+    Par période : [{date, start, created, completed, open, overdue}].
+    `queryset` restreint les agrégats (département, projet) ; ValueError si la période est invalide.
+    """
+    granularity = (granularity or DEFAULT_GRANULARITY).strip().lower()
+    start, buckets = parse_period(range_value, granularity)
+    queryset = TaskDailyRollup.objects.all() if queryset is None else queryset
+    return [
+        {'date': point['start'].strftime(LABEL_FORMATS[granularity]), **point}
+        for point in rollups.timeline(queryset, start, buckets, granularity)
+    ]
+
+
+def tasks_by_status():
+    """
+    Répartition des tâches par statut (statuts présents, triés), une agrégation des compteurs.
+    Chaque tâche compte une fois, dans son statut.
+    """
+    totals = ProjectTaskCounter.objects.aggregate(
+        total=Sum('total'), **{field: Sum(field) for field in STATUS_COUNTERS}
+    )
+    counts = {field: totals[field] or 0 for field in STATUS_COUNTERS}
+    counts['done'] = (totals['total'] or 0) - sum(counts.values())
+    return [{'status': status, 'count': counts[status]} for status in sorted(counts) if counts[status]]
+
+
+def tasks_by_project(limit=5):
+    """Projets comptant le plus de tâches"""
+    return list(
+        Project.objects.filter(task_counter__isnull=False)
+        .order_by('-task_counter__total', 'pk')
+        .values('name', task_count=F('task_counter__total'))[:limit]
+    )
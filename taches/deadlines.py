@@ -0,0 +1,108 @@
+"""
+Scanner d'échéances : notifications deadline_approaching / deadline_passed.
+
+Chaque type a un point de reprise persistant (DeadlineScanMark) : une passe ne lit
+que les tâches ouvertes dont l'échéance a franchi l'horizon depuis la passe
+précédente, par parcours de l'index partiel (due_date, id) des tâches ouvertes.
+L'horizon vaut maintenant pour deadline_passed et maintenant + APPROACHING_WINDOW
+pour deadline_approaching.
+
+Les tâches sont traitées par lots ; les notifications d'un lot sont mises en file
+(taches.notifications, comme celles des vues) dans la même transaction que
+l'avancement du point de reprise, de sorte qu'un arrêt en cours de passe ne perd
+ni ne duplique aucune notification.
+
+À la première passe, le point de reprise est initialisé à l'horizon courant :
+les échéances antérieures au déploiement ne sont pas notifiées. De même, une tâche
+créée ou replanifiée avec une échéance déjà dépassée par le point de reprise n'est
+pas notifiée.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from core.pagination import keyset_filter
+from .models import DeadlineScanMark, Task
+from .notifications import notify_many
+
+APPROACHING_WINDOW = timedelta(hours=24)
+SCAN_ORDERING = ['due_date', 'id']
+
+
+def _messages(kind, title, due_date):
+    due = timezone.localtime(due_date).strftime('%d/%m/%Y %H:%M')
+    if kind == 'deadline_approaching':
+        return f'Échéance proche: {title}', f'La tâche "{title}" arrive à échéance le {due}'
+    return f'Échéance dépassée: {title}', f'La tâche "{title}" devait être terminée le {due}'
+
+
+def _pending(mark, horizon):
+    """Tâches ouvertes dont l'échéance est comprise entre le point de reprise et l'horizon"""
+    tasks = Task.objects.filter(is_completed=False, due_date__lte=horizon)
+    if mark.last_task_id is None:
+        tasks = tasks.filter(due_date__gt=mark.scanned_until)
+    else:
+        tasks = tasks.filter(keyset_filter(SCAN_ORDERING, [mark.scanned_until, mark.last_task_id]))
+    return tasks.order_by(*SCAN_ORDERING)
+
+
+def _scan_batch(kind, horizon, batch_size):
+    """
+    Traite un lot dans une transaction.
+    Retourne (tâches lues, notifications mises en file), ou None si le type est à jour.
+    """
+    with transaction.atomic():
+        mark, created = DeadlineScanMark.objects.select_for_update().get_or_create(
+            kind=kind, defaults={'scanned_until': horizon}
+        )
+        if created or (mark.scanned_until >= horizon and mark.last_task_id is None):
+            return None
+
+        tasks = list(
+            _pending(mark, horizon).values_list('id', 'title', 'project_id', 'due_date')[:batch_size]
+        )
+        assignees = {}
+        if tasks:
+            rows = Task.assigned_to.through.objects.filter(task_id__in=[task[0] for task in tasks])
+            for task_id, user_id in rows.values_list('task_id', 'user_id'):
+                assignees.setdefault(task_id, []).append(user_id)
+
+        events = []
+        for task_id, title, project_id, due_date in tasks:
+            title, message = _messages(kind, title, due_date)
+            events.append({
+                'notification_type': kind,
+                'title': title,
+                'message': message,
+                'users': assignees.get(task_id, ()),
+                'task': task_id,
+                'project': project_id,
+            })
+        notify_many(events)
+
+        if len(tasks) == batch_size:
+            # Lot plein : reprendre après la dernière tâche lue
+            mark.scanned_until, mark.last_task_id = tasks[-1][3], tasks[-1][0]
+        else:
+            mark.scanned_until, mark.last_task_id = horizon, None
+        mark.save(update_fields=['scanned_until', 'last_task_id', 'updated_at'])
+    return len(tasks), sum(len(set(event['users'])) for event in events)
+
+
+def scan_deadlines(now=None, window=APPROACHING_WINDOW, batch_size=1000):
+    """
+    Passe complète du scanner.
+    Retourne {type: (tâches lues, notifications mises en file)}.
+    """
+    now = now or timezone.now()
+    results = {}
+    for kind, horizon in (('deadline_passed', now), ('deadline_approaching', now + window)):
+        scanned = written = 0
+        while True:
+            batch = _scan_batch(kind, horizon, batch_size)
+            if batch is None:
+                break
+            scanned += batch[0]
+            written += batch[1]
+        results[kind] = (scanned, written)
+    return results
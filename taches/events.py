@@ -0,0 +1,122 @@
+"""
+Journal des transitions de tâches (TaskEvent).
+
+Chaque chemin d'écriture enregistre ses transitions en un seul INSERT pour tout le
+lot : Task.save, les opérations en masse de TaskQuerySet (update, bulk_create,
+bulk_update), les assignations (signal m2m_changed, bulk_write_tasks). Les fins de
+tâches (completed) sont aussi inscrites au flux d'activité (taches.activity).
+
+Transitions : created (à la création), status_changed (statut modifié), completed /
+reopened (is_completed passe à vrai / faux), assigned (un assigné ajouté).
+L'état précédent d'une tâche est celui lu en base (Task.from_db) ou écrit par la
+dernière sauvegarde ; une tâche instanciée sans lecture ne produit pas de transition.
+
+L'auteur est l'utilisateur de la requête en cours (TaskEventActorMixin des viewsets),
+à défaut le créateur de la tâche pour l'événement created.
+"""
+from contextvars import ContextVar
+
+from django.utils import timezone
+from .models import TaskEvent
+
+_actor = ContextVar('task_event_actor', default=None)
+
+
+def current_actor():
+    return _actor.get()
+
+
+class TaskEventActorMixin:
+    """Viewset : les transitions écrites pendant la requête sont attribuées à l'utilisateur"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user = request.user
+        self._task_event_actor = _actor.set(user.pk if user.is_authenticated else None)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = self.__dict__.pop('_task_event_actor', None)
+        if token is not None:
+            _actor.reset(token)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def _save(events):
+    """Écrit les événements du lot ; les fins de tâches alimentent le flux d'activité"""
+    from . import activity
+    TaskEvent.objects.bulk_create(events)
+    activity.tasks_completed([event for event in events if event.event_type == 'completed'])
+
+
+def _transitions(task_id, project_id, before, after, now, actor):
+    """Événements entre deux états (statut, terminée)"""
+    (old_status, old_completed), (status, completed) = before, after
+    events = []
+    if old_status != status:
+        events.append(TaskEvent(
+            task_id=task_id, project_id=project_id, event_type='status_changed',
+            from_status=old_status or '', to_status=status, user_id=actor, created_at=now,
+        ))
+    if old_completed != completed:
+        events.append(TaskEvent(
+            task_id=task_id, project_id=project_id, event_type='completed' if completed else 'reopened',
+            from_status=old_status or '', to_status=status, user_id=actor, created_at=now,
+        ))
+    return events
+
+
+def record_created(tasks):
+    """Tâches nouvellement créées : created, et completed si elles le sont déjà"""
+    actor = current_actor()
+    events = []
+    for task in tasks:
+        created_at = task.created_at or timezone.now()
+        events.append(TaskEvent(
+            task_id=task.pk, project_id=task.project_id, event_type='created', to_status=task.status,
+            user_id=actor or task.created_by_id, created_at=created_at,
+        ))
+        if task.is_completed:
+            events.append(TaskEvent(
+                task_id=task.pk, project_id=task.project_id, event_type='completed', to_status=task.status,
+                user_id=actor or task.created_by_id, created_at=max(created_at, task.completed_date or created_at),
+            ))
+        task._original_state = (task.status, task.is_completed)
+    _save(events)
+
+
+def record_transitions(tasks):
+    """Tâches sauvegardées : transitions depuis leur état d'origine, qui devient l'état courant"""
+    now, actor = timezone.now(), current_actor()
+    events = []
+    for task in tasks:
+        state = (task.status, task.is_completed)
+        before = getattr(task, '_original_state', None)
+        if before is not None:
+            events.extend(_transitions(task.pk, task.project_id, before, state, now, actor))
+        task._original_state = state
+    _save(events)
+
+
+def record_bulk_transitions(before, rows):
+    """
+    Mise à jour en masse : before = {id: (statut, terminée)} avant écriture,
+    rows = (id, projet, statut, terminée) relus après écriture
+    """
+    now, actor = timezone.now(), current_actor()
+    events = []
+    for task_id, project_id, status, completed in rows:
+        if task_id in before:
+            events.extend(_transitions(task_id, project_id, before[task_id], (status, completed), now, actor))
+    _save(events)
+
+
+def record_assignments(pairs):
+    """Assignations ajoutées : paires (tâche, identifiant de l'assigné)"""
+    now, actor = timezone.now(), current_actor()
+    TaskEvent.objects.bulk_create([
+        TaskEvent(
+            task_id=task.pk, project_id=task.project_id, event_type='assigned',
+            to_status=task.status, user_id=actor, assignee_id=user_id, created_at=now,
+        )
+        for task, user_id in pairs
+    ])
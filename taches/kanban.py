@@ -0,0 +1,231 @@
+"""
+Rangs Kanban espacés.
+
+Task.kanban_order est un rang clairsemé : les cartes d'une colonne sont numérotées
+de RANK_GAP en RANK_GAP, de sorte que déposer une carte entre deux voisines ne
+modifie qu'une ligne (milieu de l'intervalle). Quand l'intervalle devient trop
+étroit, la colonne est renumérotée en arrière-plan ; s'il est épuisé, elle l'est
+immédiatement, dans la transaction du déplacement.
+"""
+import logging
+import threading
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RANK_GAP = 1024
+# En dessous de cet écart avec une voisine, la colonne est renumérotée en arrière-plan
+MIN_GAP = 8
+# Marge sous la limite d'un IntegerField signé
+MAX_RANK = 2 ** 30
+
+
+def column_expression():
+    """Colonne Kanban d'une tâche (les tâches terminées vont dans « done »)"""
+    return Case(
+        When(is_completed=True, then=Value('done')),
+        default=F('status'),
+        output_field=CharField(),
+    )
+
+
+def column_filter(column):
+    """
+    Condition équivalente à column_expression() == column, exprimée sur les colonnes
+    pour que les index du tableau (task_board_idx / task_board_done_idx) s'appliquent
+    """
+    if column == 'done':
+        return Q(is_completed=True)
+    return Q(is_completed=False, status=column)
+
+
+def column_of(task):
+    return 'done' if task.is_completed else task.status
+
+
+def rank_between(lower, upper):
+    """
+    Rang strictement entre deux voisines (None = bord de colonne),
+    ou None s'il ne reste pas de place.
+    """
+    if lower is None and upper is None:
+        rank = RANK_GAP
+    elif lower is None:
+        rank = upper - RANK_GAP
+    elif upper is None:
+        rank = lower + RANK_GAP
+    elif upper - lower >= 2:
+        rank = (lower + upper) // 2
+    else:
+        return None
+    return rank if -MAX_RANK < rank < MAX_RANK else None
+
+
+def is_tight(rank, lower, upper):
+    return any(
+        bound is not None and abs(rank - bound) < MIN_GAP
+        for bound in (lower, upper)
+    )
+
+
+def spread_column(Task, project_id, column, exclude=(), batch_size=500):
+    """
+    Renumérote une colonne de RANK_GAP en RANK_GAP dans l'ordre d'affichage.
+    Retourne {id: nouveau rang} ; les tâches de `exclude` ne sont pas renumérotées.
+    """
+    tasks = list(
+        Task.objects.filter(column_filter(column), project_id=project_id)
+        .exclude(pk__in=list(exclude))
+        .order_by('kanban_order', '-priority', 'due_date', 'id')
+        .only('id', 'kanban_order')
+    )
+    changed = []
+    for index, task in enumerate(tasks, start=1):
+        rank = index * RANK_GAP
+        if task.kanban_order != rank:
+            task.kanban_order = rank
+            changed.append(task)
+    if changed:
+        Task.objects.bulk_update(changed, ['kanban_order'], batch_size=batch_size)
+    return {task.pk: task.kanban_order for task in tasks}
+
+
+def _rebalance(project_id, column):
+    from .models import Task
+    try:
+        with transaction.atomic():
+            spread_column(Task, project_id, column)
+    except Exception:
+        logger.exception('Renumérotation Kanban échouée (projet %s, colonne %s)', project_id, column)
+
+
+def _rebalance_in_thread(project_id, column):
+    close_old_connections()
+    try:
+        _rebalance(project_id, column)
+    finally:
+        connection.close()
+
+
+def schedule_rebalance(project_id, column):
+    """Renumérote la colonne après validation de la transaction courante, dans un thread"""
+    def start():
+        if connection.vendor == 'sqlite':
+            # SQLite sérialise les écritures : un second écrivain bloquerait la requête en cours
+            _rebalance(project_id, column)
+        else:
+            threading.Thread(target=_rebalance_in_thread, args=(project_id, column), daemon=True).start()
+    transaction.on_commit(start)
+
+
+RANK_FIELDS = ['kanban_order', 'updated_at']
+MOVE_FIELDS = ['status', 'is_completed', 'completed_date', 'completion_percentage'] + RANK_FIELDS
+
+
+def _set_column(task, column, now):
+    """Applique la colonne cible aux champs de statut, comme Task.save / l'action status"""
+    if column == 'done':
+        if not task.is_completed:
+            task.is_completed = True
+            task.completed_date = now
+            task.completion_percentage = 100
+        task.status = 'done'
+    else:
+        task.status = column
+        if task.is_completed:
+            task.is_completed = False
+            task.completed_date = None
+    task.updated_at = now
+
+
+def apply_moves(queryset, moves):
+    """
+    Applique une liste de déplacements {task, column, after, before} en une transaction.
+    
+    `after` / `before` sont les cartes qui encadrent la position cible (None en bord de
+    colonne). `queryset` limite les tâches déplaçables et les voisines (visibilité de
+    l'utilisateur).
+    Retourne (tâches déplacées, tâches nouvellement terminées) ; lève ValueError si
+    une référence est invalide.
+    """
+    Task = queryset.model
+    moved_ids = {move['task'] for move in moves}
+    referenced = moved_ids | {move.get(key) for move in moves for key in ('after', 'before')}
+    referenced.discard(None)
+    now = timezone.now()
+    
+    with transaction.atomic():
+        # Voisines comprises : une tâche invisible est indiscernable d'une tâche inexistante
+        visible = set(queryset.filter(pk__in=referenced).values_list('pk', flat=True))
+        if referenced - visible:
+            raise ValueError(f'Tâches introuvables : {sorted(referenced - visible)}')
+        tasks = {task.pk: task for task in Task.objects.select_for_update().filter(pk__in=referenced)}
+        
+        pending = {}
+        # Un changement de colonne recalcule les compteurs du projet, un simple reclassement non
+        column_changed = False
+        tight = set()
+        rebalanced = set()
+        completed = []
+        
+        def flush():
+            nonlocal column_changed
+            if pending:
+                fields = MOVE_FIELDS if column_changed else RANK_FIELDS
+                Task.objects.bulk_update(list(pending.values()), fields)
+                pending.clear()
+                column_changed = False
+        
+        for move in moves:
+            task = tasks[move['task']]
+            column = move['column']
+            neighbors = []
+            for key in ('after', 'before'):
+                neighbor = tasks.get(move.get(key)) if move.get(key) is not None else None
+                if move.get(key) is not None and (
+                    neighbor is None
+                    or neighbor.pk == task.pk
+                    or neighbor.project_id != task.project_id
+                    or column_of(neighbor) != column
+                ):
+                    raise ValueError(f'Carte voisine invalide pour la tâche {task.pk} : {move[key]}')
+                neighbors.append(neighbor)
+            after, before = neighbors
+            
+            was_completed = task.is_completed
+            if column_of(task) != column:
+                column_changed = True
+            _set_column(task, column, now)
+            if task.is_completed and not was_completed:
+                completed.append(task)
+            
+            lower = after.kanban_order if after else None
+            upper = before.kanban_order if before else None
+            rank = rank_between(lower, upper)
+            if rank is None:
+                # Plus de place entre les voisines : renuméroter la colonne maintenant
+                flush()
+                ranks = spread_column(Task, task.project_id, column, exclude={task.pk})
+                for pk, value in ranks.items():
+                    if pk in tasks:
+                        tasks[pk].kanban_order = value
+                rebalanced.add((task.project_id, column))
+                lower = after.kanban_order if after else None
+                upper = before.kanban_order if before else None
+                rank = rank_between(lower, upper)
+                if rank is None:
+                    raise ValueError(f'Cartes voisines dans le désordre pour la tâche {task.pk}')
+            elif is_tight(rank, lower, upper):
+                tight.add((task.project_id, column))
+            
+            task.kanban_order = rank
+            pending[task.pk] = task
+        
+        flush()
+        for project_id, column in tight - rebalanced:
+            schedule_rebalance(project_id, column)
+    
+    return [tasks[pk] for pk in dict.fromkeys(move['task'] for move in moves)], completed
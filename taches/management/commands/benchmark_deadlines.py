@@ -0,0 +1,84 @@
+# taches/management/commands/benchmark_deadlines.py
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+from taches.deadlines import scan_deadlines
+from taches.models import DeadlineScanMark, Project, Task
+from utilisateurs.models import Department, User
+
+
+class Rollback(Exception):
+    """Annule les données de test à la fin du benchmark"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la durée d'une passe du scanner d'échéances sur un volume synthétique de tâches "
+        "(créées puis annulées dans une transaction)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=365, help='Étalement des échéances (jours)')
+        parser.add_argument(
+            '--lags', type=float, nargs='+', default=[60, 3600, 86400],
+            help='Retards simulés depuis la passe précédente (secondes)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        now = timezone.now()
+        department = Department.objects.create(name='Benchmark', code='BENCH-DL')
+        user = User.objects.create_user('benchmark-deadlines@example.com', None, department=department)
+        project = Project.objects.create(
+            name='Benchmark', code='BENCH-DL', description='', department=department,
+            start_date=now.date(), end_date=now.date()
+        )
+
+        # QuerySet de base : les compteurs et l'index de visibilité ne concernent pas le benchmark
+        plain_tasks = models.QuerySet(Task)
+        Assignment = Task.assigned_to.through
+        spread = options['days'] * 86400
+        start = time.perf_counter()
+        for offset in range(0, options['tasks'], 10_000):
+            batch = plain_tasks.bulk_create([
+                Task(
+                    title=f'Tâche {index}', description='', project=project, created_by=user,
+                    due_date=now + timedelta(seconds=random.randint(-spread // 2, spread // 2)),
+                    is_completed=random.random() < 0.3,
+                )
+                for index in range(offset, min(offset + 10_000, options['tasks']))
+            ])
+            Assignment.objects.bulk_create([Assignment(task_id=task.pk, user_id=user.pk) for task in batch])
+        self.stdout.write(f"{options['tasks']} tâches créées en {time.perf_counter() - start:.1f} s")
+
+        for lag in options['lags']:
+            previous = now - timedelta(seconds=lag)
+            for kind, horizon in (('deadline_passed', previous), ('deadline_approaching', previous + timedelta(hours=24))):
+                DeadlineScanMark.objects.update_or_create(
+                    kind=kind, defaults={'scanned_until': horizon, 'last_task_id': None}
+                )
+            start = time.perf_counter()
+            results = scan_deadlines(now)
+            elapsed = time.perf_counter() - start
+            scanned = sum(count for count, _ in results.values())
+            self.stdout.write(
+                f'retard {lag:>8.0f} s  {scanned:>6} tâches franchies  {elapsed * 1000:>8.1f} ms'
+            )
+
+            start = time.perf_counter()
+            scan_deadlines(now)
+            self.stdout.write(f'{"":>17}passe suivante (à jour)  {(time.perf_counter() - start) * 1000:>8.1f} ms')
+
+        self.stdout.write(self.style.SUCCESS('✓ Données de test annulées'))
@@ -0,0 +1,59 @@
+# taches/management/commands/benchmark_serializers.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from core.optimizer import optimize_queryset
+from taches.models import Project, Task, Notification
+from taches.serializers import ProjectListSerializer, TaskListSerializer, NotificationSerializer
+from utilisateurs.models import User
+from utilisateurs.serializers import UserListSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare le débit des serializers de liste DRF et de leur version compilée"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help='Lignes sérialisées par liste')
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        cases = [
+            ('tasks', TaskListSerializer, Task.objects.all()),
+            ('projects', ProjectListSerializer, Project.objects.all()),
+            ('users', UserListSerializer, User.objects.all()),
+            ('notifications', NotificationSerializer, Notification.objects.all()),
+        ]
+        renderer = JSONRenderer()
+
+        for label, serializer_class, queryset in cases:
+            queryset = optimize_queryset(queryset.order_by('pk'), serializer_class())
+            rows = list(queryset[:options['limit']])
+            if not rows:
+                self.stdout.write(f'{label:<14} aucune ligne, ignoré')
+                continue
+
+            def standard():
+                return renderer.render(serializers.ListSerializer(rows, child=serializer_class()).data)
+
+            def compiled():
+                return renderer.render(serializer_class(rows, many=True).data)
+
+            if standard() != compiled():
+                raise CommandError(f'{label} : la sortie compilée diffère de la sortie DRF')
+
+            results = {}
+            for name, render in (('drf', standard), ('compilé', compiled)):
+                start = time.perf_counter()
+                for _ in range(options['iterations']):
+                    render()
+                elapsed = time.perf_counter() - start
+                results[name] = len(rows) * options['iterations'] / elapsed
+
+            self.stdout.write(
+                f"{label:<14} {len(rows):>6} lignes  drf {results['drf']:>10.0f} lignes/s  "
+                f"compilé {results['compilé']:>10.0f} lignes/s  x{results['compilé'] / results['drf']:.2f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('✓ Sorties identiques octet pour octet'))
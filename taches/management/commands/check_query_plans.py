@@ -0,0 +1,50 @@
+# taches/management/commands/check_query_plans.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from taches import query_plans
+
+
+class Rollback(Exception):
+    """Annule les données de test à la fin de la vérification"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie par EXPLAIN que les requêtes fréquentes utilisent leurs index, sans parcours "
+        "complet ni tri temporaire (données de test créées puis annulées dans une transaction). "
+        "Mêmes vérifications que taches.tests.QueryPlanTests, sur la base configurée"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000, help='Volume de tâches de test')
+        parser.add_argument('--verbose-plans', action='store_true', help='Afficher les plans complets')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in query_plans.VENDORS:
+            raise CommandError(f'Base non prise en charge : {connection.vendor}')
+        failures = []
+        try:
+            with transaction.atomic():
+                checks = query_plans.checks(*query_plans.seed(options['tasks']))
+                failures = self.run_checks(checks, options['verbose_plans'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f'{len(failures)} plan(s) en régression : {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('✓ Tous les plans utilisent leurs index'))
+
+    def run_checks(self, checks, verbose):
+        failures = []
+        for label, queryset, index in checks:
+            details, problems = query_plans.explain(queryset, index)
+            if problems:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'✗ {label} : {", ".join(problems)}'))
+            else:
+                self.stdout.write(f'✓ {label}')
+            if problems or verbose:
+                for detail in details:
+                    self.stdout.write(f'    {detail}')
+        return failures
@@ -0,0 +1,23 @@
+# taches/management/commands/process_notifications.py
+import time
+
+from django.core.management.base import BaseCommand
+from taches.notifications import process_all
+
+
+class Command(BaseCommand):
+    help = "Écrit les notifications en attente (file NotificationEvent), une fois ou en boucle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Traiter la file en continu')
+        parser.add_argument('--interval', type=float, default=2.0, help='Pause entre deux passes (secondes)')
+
+    def handle(self, *args, **options):
+        while True:
+            written = process_all(options['batch_size'])
+            if written or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'✓ {written} notifications écrites'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+# taches/management/commands/rebalance_kanban.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from taches.kanban import column_expression, spread_column
+from taches.models import Task
+
+
+class Command(BaseCommand):
+    help = "Renumérote les rangs Kanban (écart régulier) des colonnes de tous les projets ou d'un projet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, help='Identifiant du projet à traiter')
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.all()
+        if options['project']:
+            tasks = tasks.filter(project_id=options['project'])
+        columns = list(
+            tasks.annotate(column=column_expression())
+            .values_list('project_id', 'column').distinct().order_by()
+        )
+        for project_id, column in columns:
+            with transaction.atomic():
+                spread_column(Task, project_id, column)
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(columns)} colonnes renumérotées'))
@@ -0,0 +1,22 @@
+# taches/management/commands/rebuild_activity_feed.py
+from django.core.management.base import BaseCommand
+from taches.activity import rebuild
+from taches.models import ActivityFeedEntry, Notification, Project, Task, TaskEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit le flux d'activité : tâches terminées (journal des événements), "
+        "projets créés et notifications non lues"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Lignes sources traitées par lot')
+
+    def handle(self, *args, **options):
+        written = rebuild(
+            Task, TaskEvent, Project, Notification, ActivityFeedEntry,
+            chunk_size=options['chunk_size'],
+            progress=lambda count: self.stdout.write(f'{count} entrées écrites'),
+        )
+        self.stdout.write(self.style.SUCCESS(f"✓ {written} entrées du flux d'activité reconstruites"))
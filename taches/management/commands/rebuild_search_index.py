@@ -0,0 +1,19 @@
+# taches/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from core.search import get_backend, registered_specs
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des modèles enregistrés"
+
+    def handle(self, *args, **options):
+        for spec in registered_specs():
+            backend = get_backend(connections[router.db_for_write(spec.model)])
+            if backend is None:
+                self.stdout.write(f'{spec.model._meta.label} : pas de moteur plein texte, ignoré')
+                continue
+            with transaction.atomic():
+                backend.rebuild(spec.model, spec.fields)
+            self.stdout.write(f'{spec.model._meta.label} : index reconstruit')
+        self.stdout.write(self.style.SUCCESS('✓ Index de recherche à jour'))
@@ -0,0 +1,23 @@
+# taches/management/commands/rebuild_task_rollups.py
+from django.core.management.base import BaseCommand
+from taches.models import Project, Task, TaskDailyRollup, TaskEvent
+from taches.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit les agrégats quotidiens des tâches en rejouant le journal des "
+        "événements, par lots de tâches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Tâches traitées par lot')
+
+    def handle(self, *args, **options):
+        processed = rebuild(
+            Task, TaskEvent, TaskDailyRollup, Project,
+            chunk_size=options['chunk_size'],
+            progress=lambda count: self.stdout.write(f'{count} tâches traitées'),
+        )
+        rows = TaskDailyRollup.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'✓ {rows} agrégats reconstruits ({processed} tâches)'))
@@ -0,0 +1,20 @@
+# taches/management/commands/rebuild_visibility.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from taches.models import Project, Task, ProjectVisibility, TaskVisibility
+from taches.visibility import rebuild_visibility
+
+
+class Command(BaseCommand):
+    help = "Reconstruit entièrement l'index de visibilité des projets et des tâches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_visibility(Project, Task, ProjectVisibility, TaskVisibility, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Index reconstruit : {ProjectVisibility.objects.count()} projets, '
+            f'{TaskVisibility.objects.count()} tâches'
+        ))
@@ -0,0 +1,31 @@
+# taches/management/commands/scan_deadlines.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from taches.deadlines import APPROACHING_WINDOW, scan_deadlines
+
+
+class Command(BaseCommand):
+    help = "Notifie les échéances proches et dépassées depuis la passe précédente, une fois ou en boucle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--window', type=float, default=APPROACHING_WINDOW.total_seconds() / 3600,
+            help='Délai avant échéance pour deadline_approaching (heures)'
+        )
+        parser.add_argument('--loop', action='store_true', help='Scanner en continu')
+        parser.add_argument('--interval', type=float, default=60.0, help='Pause entre deux passes (secondes)')
+
+    def handle(self, *args, **options):
+        window = timedelta(hours=options['window'])
+        while True:
+            results = scan_deadlines(window=window, batch_size=options['batch_size'])
+            written = sum(count for _, count in results.values())
+            if written or not options['loop']:
+                summary = ', '.join(f'{kind} : {count}' for kind, (_, count) in results.items())
+                self.stdout.write(self.style.SUCCESS(f'✓ {written} notifications mises en file ({summary})'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model('taches', 'Project')
+    Task = apps.get_model('taches', 'Task')
+    ProjectTaskCounter = apps.get_model('taches', 'ProjectTaskCounter')
+    
+    rows = {
+        row.pop('project_id'): row
+        for row in Task.objects.order_by().values('project_id').annotate(
+            total=Count('id'),
+            todo=Count('id', filter=Q(status='todo')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            review=Count('id', filter=Q(status='review')),
+            done=Count('id', filter=Q(is_completed=True)),
+            blocked=Count('id', filter=Q(status='blocked')),
+        )
+    }
+    ProjectTaskCounter.objects.bulk_create(
+        [ProjectTaskCounter(project_id=pk, **rows.get(pk, {})) for pk in Project.objects.values_list('pk', flat=True)],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectTaskCounter',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to='taches.project', verbose_name='Projet')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('todo', models.PositiveIntegerField(default=0, verbose_name='À faire')),
+                ('in_progress', models.PositiveIntegerField(default=0, verbose_name='En cours')),
+                ('review', models.PositiveIntegerField(default=0, verbose_name='En revue')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='Terminées')),
+                ('blocked', models.PositiveIntegerField(default=0, verbose_name='Bloquées')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Compteur de tâches',
+                'verbose_name_plural': 'Compteurs de tâches',
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:53
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+# Copie figée des règles de taches.visibility à la date de la migration : les
+# évolutions ultérieures du module ne doivent pas modifier ce remplissage.
+SECTION_HEAD = Q(role='responsable_section', section__isnull=False)
+
+
+def prefixed(condition, prefix):
+    result = Q()
+    result.connector = condition.connector
+    result.negated = condition.negated
+    for child in condition.children:
+        if isinstance(child, Q):
+            result.children.append(prefixed(child, prefix))
+        else:
+            lookup, value = child
+            result.children.append((f'{prefix}__{lookup}', value))
+    return result
+
+
+def backfill_visibility(apps, schema_editor):
+    Project = apps.get_model('taches', 'Project')
+    Task = apps.get_model('taches', 'Task')
+    Coordinators = Project.coordinators.through
+    Assignments = Task.assigned_to.through
+    project_rules = [
+        (
+            Project, prefixed(Q(role='coordinateur') | SECTION_HEAD, 'department__utilisateurs'),
+            'department__utilisateurs', 'pk'
+        ),
+        (Coordinators, Q(user__role='coordinateur'), 'user', 'project'),
+        (Assignments, prefixed(Q(role='membre') | SECTION_HEAD, 'user'), 'user', 'task__project'),
+    ]
+    task_rules = [
+        (
+            Task, Q(project__department__utilisateurs__role='coordinateur'),
+            'project__department__utilisateurs', 'pk'
+        ),
+        (Assignments, prefixed(Q(role__in=['coordinateur', 'membre']) | SECTION_HEAD, 'user'), 'user', 'task'),
+        (
+            Assignments, Q(user__section__utilisateurs__role='responsable_section'),
+            'user__section__utilisateurs', 'task'
+        ),
+    ]
+    for index_model, object_field, rules in (
+        (apps.get_model('taches', 'ProjectVisibility'), 'project', project_rules),
+        (apps.get_model('taches', 'TaskVisibility'), 'task', task_rules),
+    ):
+        index_model.objects.all().delete()
+        for model, condition, user_path, object_path in rules:
+            pairs = (
+                model.objects.filter(condition).order_by()
+                .values_list(user_path, object_path).distinct().iterator(chunk_size=BATCH_SIZE)
+            )
+            batch = []
+            for user_id, object_id in pairs:
+                batch.append(index_model(user_id=user_id, **{f'{object_field}_id': object_id}))
+                if len(batch) >= BATCH_SIZE:
+                    index_model.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+            index_model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('taches', '0002_project_task_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibility', to='taches.task', verbose_name='Tâche')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Visibilité de tâche',
+                'verbose_name_plural': 'Visibilités de tâches',
+                'unique_together': {('user', 'task')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibility', to='taches.project', verbose_name='Projet')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Visibilité de projet',
+                'verbose_name_plural': 'Visibilités de projets',
+                'unique_together': {('user', 'project')},
+            },
+        ),
+        migrations.RunPython(backfill_visibility, migrations.RunPython.noop),
+    ]
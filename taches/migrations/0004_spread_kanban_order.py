@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Case, CharField, F, Q, Value, When
+
+# Copie figée de taches.kanban à la date de la migration
+RANK_GAP = 1024
+
+
+def column_filter(column):
+    if column == 'done':
+        return Q(is_completed=True)
+    return Q(is_completed=False, status=column)
+
+
+def spread_kanban_order(apps, schema_editor):
+    Task = apps.get_model('taches', 'Task')
+    columns = (
+        Task.objects.annotate(column=Case(
+            When(is_completed=True, then=Value('done')), default=F('status'), output_field=CharField(),
+        ))
+        .values_list('project_id', 'column').distinct().order_by()
+    )
+    for project_id, column in list(columns):
+        tasks = list(
+            Task.objects.filter(column_filter(column), project_id=project_id)
+            .order_by('kanban_order', '-priority', 'due_date', 'id')
+            .only('id', 'kanban_order')
+        )
+        for index, task in enumerate(tasks, start=1):
+            task.kanban_order = index * RANK_GAP
+        Task.objects.bulk_update(tasks, ['kanban_order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0003_visibility_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_kanban_order, migrations.RunPython.noop),
+    ]
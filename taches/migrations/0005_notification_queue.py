@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0004_spread_kanban_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(choices=[('task_assigned', 'Tâche assignée'), ('task_updated', 'Tâche mise à jour'), ('task_completed', 'Tâche terminée'), ('comment_added', 'Commentaire ajouté'), ('deadline_approaching', 'Échéance proche'), ('deadline_passed', 'Échéance dépassée'), ('project_created', 'Nouveau projet'), ('project_updated', 'Projet mis à jour')], max_length=30, verbose_name='Type')),
+                ('title', models.CharField(max_length=200, verbose_name='Titre')),
+                ('message', models.TextField(verbose_name='Message')),
+                ('user_ids', models.JSONField(default=list, verbose_name='Destinataires')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taches.project', verbose_name='Projet lié')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taches.task', verbose_name='Tâche liée')),
+            ],
+            options={
+                'verbose_name': 'Notification en attente',
+                'verbose_name_plural': 'Notifications en attente',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db.models import Count, Min, Q
+
+
+def backfill_counters(apps, schema_editor):
+    Task = apps.get_model('taches', 'Task')
+    UserTaskCounter = apps.get_model('taches', 'UserTaskCounter')
+    Assignment = Task.assigned_to.through
+    
+    now = django.utils.timezone.now()
+    is_open = Q(task__is_completed=False)
+    rows = Assignment.objects.order_by().values('user_id').annotate(
+        total=Count('id'),
+        todo=Count('id', filter=Q(task__status='todo')),
+        in_progress=Count('id', filter=Q(task__status='in_progress')),
+        completed=Count('id', filter=Q(task__is_completed=True)),
+        overdue=Count('id', filter=is_open & Q(task__due_date__lt=now)),
+        next_deadline=Min('task__due_date', filter=is_open & Q(task__due_date__gte=now)),
+    )
+    UserTaskCounter.objects.bulk_create(
+        [UserTaskCounter(overdue_as_of=now, **row) for row in rows],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utilisateurs', '0001_initial'),
+        ('taches', '0005_notification_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('todo', models.PositiveIntegerField(default=0, verbose_name='À faire')),
+                ('in_progress', models.PositiveIntegerField(default=0, verbose_name='En cours')),
+                ('completed', models.PositiveIntegerField(default=0, verbose_name='Terminées')),
+                ('overdue', models.PositiveIntegerField(default=0, verbose_name='En retard')),
+                ('overdue_as_of', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Retards calculés le')),
+                ('next_deadline', models.DateTimeField(blank=True, null=True, verbose_name='Prochaine échéance')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Compteur de tâches assignées',
+                'verbose_name_plural': 'Compteurs de tâches assignées',
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
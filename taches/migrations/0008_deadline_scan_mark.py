@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0007_open_task_deadline_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadlineScanMark',
+            fields=[
+                ('kind', models.CharField(choices=[('deadline_approaching', 'Échéance proche'), ('deadline_passed', 'Échéance dépassée')], max_length=30, primary_key=True, serialize=False, verbose_name='Type')),
+                ('scanned_until', models.DateTimeField(verbose_name="Échéances traitées jusqu'au")),
+                ('last_task_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='Dernière tâche traitée')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': "Avancement du scanner d'échéances",
+                'verbose_name_plural': "Avancements du scanner d'échéances",
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0008_deadline_scan_mark'),
+    ]
+
+    operations = [
+        # Table de liaison créée automatiquement (sans Meta) : index inverse (user_id, task_id)
+        # pour « tâches d'un utilisateur » (my_tasks, tableau d'un membre, visibilité)
+        migrations.RunSQL(
+            'CREATE INDEX taches_task_assigned_to_user_task_idx ON taches_task_assigned_to (user_id, task_id)',
+            'DROP INDEX taches_task_assigned_to_user_task_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='taches_noti_user_id_08dce9_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', 'id'], name='notif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', '-created_at', 'id'], name='notif_user_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['project', 'status', 'kanban_order', '-priority', 'due_date', 'id'], name='task_board_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['project', 'kanban_order', '-priority', 'due_date', 'id'], name='task_board_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskcomment',
+            index=models.Index(fields=['task', '-created_at', 'id'], name='comment_task_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:40
+
+from django.db import migrations
+from core.search import install_index, uninstall_index
+
+# Copie figée de taches.search.SEARCH_FIELDS
+SEARCH_FIELDS = [
+    ('Task', {'title': 'A', 'description': 'B'}),
+    ('Project', {'name': 'A', 'code': 'A', 'description': 'B'}),
+    ('TaskComment', {'comment': 'B'}),
+]
+
+
+def install_search_indexes(apps, schema_editor):
+    for model_name, fields in SEARCH_FIELDS:
+        install_index(schema_editor, apps.get_model('taches', model_name), fields)
+
+
+def uninstall_search_indexes(apps, schema_editor):
+    for model_name, fields in SEARCH_FIELDS:
+        uninstall_index(schema_editor, apps.get_model('taches', model_name), fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0009_workload_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_indexes, uninstall_search_indexes),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:55
+
+from django.db import migrations
+from core.search import install_index, uninstall_index
+
+# Copie figée de taches.search.SEARCH_FIELDS
+SEARCH_FIELDS = [
+    ('Task', {'title': 'A', 'description': 'B'}),
+    ('Project', {'name': 'A', 'code': 'A', 'description': 'B'}),
+    ('TaskComment', {'comment': 'B'}),
+]
+
+
+def reinstall_search_indexes(apps, schema_editor):
+    """Recrée les index (index de préfixes FTS5, mots entiers indexés avec leurs racines)"""
+    for model_name, fields in SEARCH_FIELDS:
+        model = apps.get_model('taches', model_name)
+        uninstall_index(schema_editor, model, fields)
+        install_index(schema_editor, model, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0010_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(reinstall_search_indexes, reinstall_search_indexes),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_events(apps, schema_editor):
+    """Historique initial reconstitué de l'état courant : création et fin des tâches existantes"""
+    Task = apps.get_model('taches', 'Task')
+    TaskEvent = apps.get_model('taches', 'TaskEvent')
+    tasks = Task.objects.order_by('id').values_list(
+        'id', 'project_id', 'status', 'is_completed', 'completed_date', 'created_by_id', 'created_at'
+    )
+    events = []
+    for task_id, project_id, status, is_completed, completed_date, created_by_id, created_at in tasks.iterator():
+        events.append(TaskEvent(
+            task_id=task_id, project_id=project_id, event_type='created', to_status=status,
+            user_id=created_by_id, created_at=created_at,
+        ))
+        if is_completed and completed_date:
+            events.append(TaskEvent(
+                task_id=task_id, project_id=project_id, event_type='completed', to_status=status,
+                created_at=max(created_at, completed_date),
+            ))
+        if len(events) >= 1000:
+            TaskEvent.objects.bulk_create(events)
+            events = []
+    TaskEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('taches', '0011_search_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('created', 'Création'), ('status_changed', 'Changement de statut'), ('assigned', 'Assignation'), ('completed', 'Terminée'), ('reopened', 'Réouverte')], max_length=20, verbose_name='Type')),
+                ('from_status', models.CharField(blank=True, max_length=20, verbose_name='Statut précédent')),
+                ('to_status', models.CharField(blank=True, max_length=20, verbose_name='Nouveau statut')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date')),
+                ('assignee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Assigné')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taches.project', verbose_name='Projet')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='taches.task', verbose_name='Tâche')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Auteur')),
+            ],
+            options={
+                'verbose_name': 'Événement de tâche',
+                'verbose_name_plural': 'Événements de tâches',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['created_at', 'id'], name='task_event_created_idx'), models.Index(fields=['event_type', 'created_at'], name='task_event_type_created_idx'), models.Index(fields=['project', 'created_at'], name='task_event_project_created_idx'), models.Index(fields=['task', 'created_at', 'id'], name='task_event_task_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    from taches.rollups import rebuild
+    rebuild(
+        apps.get_model('taches', 'Task'), apps.get_model('taches', 'TaskEvent'),
+        apps.get_model('taches', 'TaskDailyRollup'), apps.get_model('taches', 'Project'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utilisateurs', '0002_search_index'),
+        ('taches', '0012_task_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Jour')),
+                ('status', models.CharField(choices=[('todo', 'À faire'), ('in_progress', 'En cours'), ('review', 'En revue'), ('done', 'Terminé'), ('blocked', 'Bloqué')], max_length=20, verbose_name='Statut')),
+                ('created', models.IntegerField(default=0, verbose_name='Créées')),
+                ('completed', models.IntegerField(default=0, verbose_name='Terminées')),
+                ('open_delta', models.IntegerField(default=0, verbose_name='Variation des tâches ouvertes')),
+                ('overdue_delta', models.IntegerField(default=0, verbose_name='Variation des tâches en retard')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='utilisateurs.department', verbose_name='Département')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taches.project', verbose_name='Projet')),
+            ],
+            options={
+                'verbose_name': 'Agrégat quotidien des tâches',
+                'verbose_name_plural': 'Agrégats quotidiens des tâches',
+                'indexes': [models.Index(fields=['department', 'day'], name='task_rollup_department_idx'), models.Index(fields=['project', 'day'], name='task_rollup_project_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'department', 'project', 'status'), name='task_rollup_key'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
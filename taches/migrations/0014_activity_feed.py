@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_activity_feed(apps, schema_editor):
+    from taches.activity import rebuild
+    rebuild(
+        apps.get_model('taches', 'Task'), apps.get_model('taches', 'TaskEvent'),
+        apps.get_model('taches', 'Project'), apps.get_model('taches', 'Notification'),
+        apps.get_model('taches', 'ActivityFeedEntry'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taches', '0013_task_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=40, verbose_name='Périmètre')),
+                ('activity_type', models.CharField(choices=[('task_assigned', 'Tâche assignée'), ('task_updated', 'Tâche mise à jour'), ('task_completed', 'Tâche terminée'), ('comment_added', 'Commentaire ajouté'), ('deadline_approaching', 'Échéance proche'), ('deadline_passed', 'Échéance dépassée'), ('project_created', 'Nouveau projet'), ('project_updated', 'Projet mis à jour')], max_length=30, verbose_name='Type')),
+                ('title', models.CharField(max_length=255, verbose_name='Titre')),
+                ('message', models.TextField(blank=True, verbose_name='Message')),
+                ('project_name', models.CharField(blank=True, max_length=200, verbose_name='Projet')),
+                ('department_name', models.CharField(blank=True, max_length=100, verbose_name='Département')),
+                ('user_name', models.CharField(blank=True, max_length=301, verbose_name='Utilisateur')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Date')),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taches.notification', verbose_name='Notification liée')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taches.project', verbose_name='Projet lié')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taches.task', verbose_name='Tâche liée')),
+            ],
+            options={
+                'verbose_name': "Entrée du flux d'activité",
+                'verbose_name_plural': "Entrées du flux d'activité",
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['scope', '-created_at', '-id'], name='activity_scope_created_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_activity_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:52
+
+import core.search
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index GIN déjà créés sur PostgreSQL par 0010 / 0011 : déclaration dans l'état seulement"""
+
+    dependencies = [
+        ('taches', '0014_activity_feed'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AddIndex(
+                model_name='project',
+                index=core.search.SearchIndex(django.contrib.postgres.search.SearchVector('name', 'code', 'description', config='french'), name='taches_project_search'),
+            ),
+            migrations.AddIndex(
+                model_name='task',
+                index=core.search.SearchIndex(django.contrib.postgres.search.SearchVector('title', 'description', config='french'), name='taches_task_search'),
+            ),
+            migrations.AddIndex(
+                model_name='taskcomment',
+                index=core.search.SearchIndex(django.contrib.postgres.search.SearchVector('comment', config='french'), name='taches_taskcomment_search'),
+            ),
+        ]),
+    ]
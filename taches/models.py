@@ -1,8 +1,49 @@
+from collections import Counter, defaultdict
+
 from django.db import models
+from django.db.models import Count, F, Min, Q
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 # NE PAS importer directement les modèles
 from utilisateurs.models import User, Department
+from core import caching, search
+from .caching import department_tags, invalidate_project_stats, project_tags, user_tags
+
+class ProjectQuerySet(search.IndexedQuerySet):
+    """QuerySet des projets invalidant le cache (statistiques, étiquettes) lors des écritures en masse"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        invalidate_project_stats()
+        caching.bump_model(
+            self.model, project_tags(obj.pk for obj in objs) + department_tags({obj.department_id for obj in objs})
+        )
+        if objs and objs[0].pk:
+            from . import activity
+            ProjectTaskCounter.objects.bulk_create(
+                [ProjectTaskCounter(project_id=obj.pk) for obj in objs], ignore_conflicts=True
+            )
+            activity.projects_created([obj.pk for obj in objs])
+        return objs
+    
+    def update(self, **kwargs):
+        moved = bool({'department', 'department_id'} & set(kwargs))
+        affected = list(self.values_list('pk', 'department_id'))
+        project_ids = [project_id for project_id, _ in affected]
+        rows = super().update(**kwargs)
+        invalidate_project_stats()
+        department_ids = {department_id for _, department_id in affected}
+        if moved:
+            new_department = kwargs.get('department', kwargs.get('department_id'))
+            department_ids.add(getattr(new_department, 'pk', new_department))
+        caching.bump_model(self.model, project_tags(project_ids) + department_tags(department_ids))
+        if moved:
+            # Les agrégats quotidiens et le flux d'activité suivent le nouveau département
+            from . import activity, rollups
+            rollups.sync_departments(project_ids)
+            activity.sync_departments(project_ids)
+        return rows
+
 
 class Project(models.Model):
     """Modèle pour les projets"""
@@ -57,6 +98,8 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Projet"
         verbose_name_plural = "Projets"
@@ -64,18 +107,119 @@ class Project(models.Model):
         indexes = [
             models.Index(fields=['code']),
             models.Index(fields=['status']),
+            # Recherche PostgreSQL : mêmes champs que taches.search.SEARCH_FIELDS
+            search.SearchIndex.for_fields(['name', 'code', 'description'], name='taches_project_search'),
         ]
 
     def __str__(self):
         return f"{self.code} - {self.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Département d'origine, pour mettre à jour l'index de visibilité
+        instance._original_department_id = instance.__dict__.get('department_id')
+        return instance
+    
+    def get_task_counter(self):
+        """Retourne les compteurs de tâches du projet (lecture seule : compteurs à zéro si absents)"""
+        try:
+            return self.task_counter
+        except ProjectTaskCounter.DoesNotExist:
+            return ProjectTaskCounter(project=self)
+    
     def get_progress(self):
         """Calcule la progression du projet basée sur les tâches"""
-        tasks = self.tasks.all()
-        if not tasks:
-            return 0
-        completed = tasks.filter(is_completed=True).count()
-        return int((completed / tasks.count()) * 100)
+        return self.get_task_counter().get_progress()
+
+
+class TaskQuerySet(models.QuerySet):
+    """QuerySet des tâches maintenant les données dénormalisées lors des opérations en masse"""
+    COUNTER_FIELDS = {'status', 'is_completed', 'project', 'project_id'}
+    ASSIGNEE_COUNTER_FIELDS = {'status', 'is_completed', 'due_date'}
+    VISIBILITY_FIELDS = {'project', 'project_id'}
+    EVENT_FIELDS = {'status', 'is_completed'}
+    ROLLUP_FIELDS = {'status', 'is_completed', 'due_date', 'project', 'project_id'}
+    
+    def update(self, **kwargs):
+        fields = set(kwargs)
+        tracked = self.COUNTER_FIELDS | self.ASSIGNEE_COUNTER_FIELDS | self.VISIBILITY_FIELDS | self.ROLLUP_FIELDS
+        if not tracked & fields and not search.touches_index(self.model, fields):
+            project_ids = set(self.values_list('project_id', flat=True).distinct())
+            rows = super().update(**kwargs)
+            caching.bump_model(self.model, project_tags(project_ids))
+            return rows
+        affected = list(self.values_list('id', 'project_id', 'status', 'is_completed', 'due_date'))
+        rows = super().update(**kwargs)
+        project_ids = {row[1] for row in affected}
+        new_project = kwargs.get('project', kwargs.get('project_id'))
+        if new_project is not None:
+            project_ids.add(getattr(new_project, 'pk', new_project))
+        task_ids = {row[0] for row in affected}
+        if self.ROLLUP_FIELDS & fields:
+            from . import rollups
+            from .events import record_bulk_transitions
+            # Nouvel état relu : les valeurs peuvent être des expressions (F, Case…)
+            before = {row[0]: row[1:] for row in affected}
+            after = list(
+                models.QuerySet(self.model, using=self._db).filter(pk__in=task_ids)
+                .values_list('id', 'project_id', 'status', 'is_completed', 'due_date')
+            )
+            if self.EVENT_FIELDS & fields:
+                record_bulk_transitions(
+                    {task_id: state[1:3] for task_id, state in before.items()}, [row[:4] for row in after]
+                )
+            rollups.tasks_changed([(before[row[0]], row[1:]) for row in after if row[0] in before])
+        self._after_bulk_write(task_ids, project_ids, fields)
+        return rows
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs and objs[0].pk:
+            from . import rollups
+            from .events import record_created
+            record_created(objs)
+            rollups.tasks_created(objs)
+            for obj in objs:
+                obj._original_project_id, obj._original_due_date = obj.project_id, obj.due_date
+        self._after_bulk_write(
+            {obj.pk for obj in objs if obj.pk},
+            {obj.project_id for obj in objs},
+            {field.name for field in self.model._meta.concrete_fields}
+        )
+        return objs
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        # QuerySet de base : l'update() interne de bulk_update ne doit pas recalculer une seconde fois
+        plain = models.QuerySet(self.model, query=self.query.chain(), using=self._db)
+        rows = plain.bulk_update(objs, fields, *args, **kwargs)
+        if self.ROLLUP_FIELDS & set(fields):
+            from . import rollups
+            from .events import record_transitions
+            changes = [(rollups.original_state(obj), rollups.state(obj)) for obj in objs]
+            if self.EVENT_FIELDS & set(fields):
+                record_transitions(objs)
+            rollups.tasks_changed([(before, after) for before, after in changes if before is not None])
+            for obj in objs:
+                obj._original_due_date = obj.due_date
+        project_ids = {obj.project_id for obj in objs}
+        project_ids.update(obj._original_project_id for obj in objs if getattr(obj, '_original_project_id', None))
+        self._after_bulk_write({obj.pk for obj in objs}, project_ids, set(fields))
+        return rows
+    
+    def _after_bulk_write(self, task_ids, project_ids, fields):
+        caching.bump_model(self.model, project_tags(project_ids))
+        if self.COUNTER_FIELDS & fields:
+            ProjectTaskCounter.refresh_for(project_ids)
+        if self.ASSIGNEE_COUNTER_FIELDS & fields:
+            UserTaskCounter.refresh_for_tasks(task_ids)
+        if self.VISIBILITY_FIELDS & fields:
+            from .visibility import refresh_project_visibility, refresh_task_visibility
+            refresh_task_visibility(task_ids)
+            refresh_project_visibility(project_ids)
+        if search.touches_index(self.model, fields):
+            search.index_objects(self.model, task_ids)
 
 
 class Task(models.Model):
@@ -104,6 +248,10 @@ class Task(models.Model):
         ('blocked', 'Bloqué'),
     )
     
+    # Colonnes du tableau Kanban (les tâches terminées vont dans « done » quel que soit leur statut)
+    KANBAN_COLUMNS = ['todo', 'in_progress', 'review', 'done', 'blocked']
+    KANBAN_ORDERING = ['kanban_order', '-priority', 'due_date', 'id']
+    
     title = models.CharField(max_length=200, verbose_name="Titre")
     description = models.TextField(verbose_name="Description")
     
@@ -152,6 +300,8 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
     
+    objects = TaskQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Tâche"
         verbose_name_plural = "Tâches"
@@ -160,18 +310,80 @@ class Task(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['is_completed']),
             models.Index(fields=['due_date']),
+            # Flux d'échéances (overdue / upcoming) : tâches ouvertes seulement
+            models.Index(
+                fields=['due_date', 'id'], condition=Q(is_completed=False), name='task_open_due_idx'
+            ),
+            models.Index(
+                fields=['project', 'due_date', 'id'], condition=Q(is_completed=False), name='task_open_project_due_idx'
+            ),
+            # Colonnes du tableau Kanban, dans l'ordre d'affichage (KANBAN_ORDERING)
+            models.Index(
+                fields=['project', 'status', 'kanban_order', '-priority', 'due_date', 'id'],
+                condition=Q(is_completed=False), name='task_board_idx'
+            ),
+            models.Index(
+                fields=['project', 'kanban_order', '-priority', 'due_date', 'id'],
+                condition=Q(is_completed=True), name='task_board_done_idx'
+            ),
+            search.SearchIndex.for_fields(['title', 'description'], name='taches_task_search'),
         ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Projet d'origine, pour recalculer les compteurs lors d'un déplacement
+        instance._original_project_id = instance.__dict__.get('project_id')
+        # État d'origine, pour journaliser les transitions (TaskEvent) et tenir les agrégats
+        instance._original_state = (instance.__dict__.get('status'), instance.__dict__.get('is_completed'))
+        instance._original_due_date = instance.__dict__.get('due_date')
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._original_project_id = self.__dict__.get('project_id')
+        self._original_state = (self.__dict__.get('status'), self.__dict__.get('is_completed'))
+        self._original_due_date = self.__dict__.get('due_date')
+
     def save(self, *args, **kwargs):
+        from . import rollups
+        from .events import record_created, record_transitions
+        self.apply_completion()
+        adding = self._state.adding
+        # Avant l'écriture : le signal post_save met à jour le projet d'origine
+        before = None if adding else rollups.original_state(self)
+        super().save(*args, **kwargs)
+        if adding:
+            record_created([self])
+            rollups.tasks_created([self])
+        else:
+            record_transitions([self])
+            if before is not None:
+                rollups.tasks_changed([(before, rollups.state(self))])
+        self._original_due_date = self.due_date
+    
+    def apply_completion(self, now=None):
+        """Date de fin et pourcentage cohérents avec is_completed (aussi pour les écritures en masse)"""
         if self.is_completed and not self.completed_date:
-            self.completed_date = timezone.now()
+            self.completed_date = now or timezone.now()
             self.completion_percentage = 100
         elif not self.is_completed:
             self.completed_date = None
-        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def kanban_column_expression():
+        """Expression SQL donnant la colonne Kanban d'une tâche"""
+        from .kanban import column_expression
+        return column_expression()
+    
+    @staticmethod
+    def kanban_column_filter(column):
+        """Condition indexable sélectionnant les tâches d'une colonne Kanban"""
+        from .kanban import column_filter
+        return column_filter(column)
     
     def is_overdue(self):
         """Vérifie si la tâche est en retard"""
@@ -187,6 +399,243 @@ class Task(models.Model):
         return max(0, delta.days)
 
 
+class ProjectTaskCounter(models.Model):
+    """Compteurs dénormalisés des tâches d'un projet (progression et résumé)"""
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_counter',
+        verbose_name="Projet"
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name="Total")
+    todo = models.PositiveIntegerField(default=0, verbose_name="À faire")
+    in_progress = models.PositiveIntegerField(default=0, verbose_name="En cours")
+    review = models.PositiveIntegerField(default=0, verbose_name="En revue")
+    done = models.PositiveIntegerField(default=0, verbose_name="Terminées")
+    blocked = models.PositiveIntegerField(default=0, verbose_name="Bloquées")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
+    SUMMARY_FIELDS = ['total', 'todo', 'in_progress', 'review', 'done', 'blocked']
+    
+    class Meta:
+        verbose_name = "Compteur de tâches"
+        verbose_name_plural = "Compteurs de tâches"
+
+    def __str__(self):
+        return f"Compteurs de {self.project_id}"
+    
+    def get_progress(self):
+        """Pourcentage de tâches terminées"""
+        if not self.total:
+            return 0
+        return int((self.done / self.total) * 100)
+    
+    def as_summary(self):
+        return {field: getattr(self, field) for field in self.SUMMARY_FIELDS}
+    
+    @classmethod
+    def state_fields(cls, status, is_completed):
+        """Compteurs auxquels contribue une tâche dans cet état (comme l'agrégation de refresh_for)"""
+        fields = ['total']
+        if status in ('todo', 'in_progress', 'review', 'blocked'):
+            fields.append(status)
+        if is_completed:
+            fields.append('done')
+        return fields
+    
+    @classmethod
+    def apply_changes(cls, changes):
+        """
+        Met à jour les compteurs par variations, sans réagréger les tâches : paires
+        (état avant, état après), état = (projet, statut, terminée), None pour une tâche
+        créée ou supprimée. Un compteur absent est recalculé (refresh_for).
+        """
+        deltas = defaultdict(Counter)
+        for before, after in changes:
+            for task_state, sign in ((before, -1), (after, 1)):
+                if task_state is None or task_state[0] is None:
+                    continue
+                project_id, status, is_completed = task_state
+                for field in cls.state_fields(status, is_completed):
+                    deltas[project_id][field] += sign
+        
+        missing = set()
+        for project_id, fields in deltas.items():
+            fields = {field: delta for field, delta in fields.items() if delta}
+            if not fields:
+                continue
+            updated = cls.objects.filter(project_id=project_id).update(
+                updated_at=timezone.now(), **{field: F(field) + delta for field, delta in fields.items()}
+            )
+            if not updated:
+                missing.add(project_id)
+        if missing:
+            cls.refresh_for(missing)
+        elif any(any(fields.values()) for fields in deltas.values()):
+            invalidate_project_stats()
+    
+    @classmethod
+    def refresh_for(cls, project_ids):
+        """Recalcule les compteurs des projets donnés : une agrégation, une écriture groupée (upsert)"""
+        project_ids = set(project_ids) - {None}
+        if not project_ids:
+            return
+        
+        counters = [
+            cls(project_id=row.pop('pk'), **row)
+            for row in Project.objects.filter(pk__in=project_ids)
+            .order_by()
+            .values('pk')
+            .annotate(
+                total=Count('tasks'),
+                todo=Count('tasks', filter=Q(tasks__status='todo')),
+                in_progress=Count('tasks', filter=Q(tasks__status='in_progress')),
+                review=Count('tasks', filter=Q(tasks__status='review')),
+                done=Count('tasks', filter=Q(tasks__is_completed=True)),
+                blocked=Count('tasks', filter=Q(tasks__status='blocked')),
+            )
+        ]
+        if counters:
+            cls.objects.bulk_create(
+                counters,
+                update_conflicts=True,
+                unique_fields=['project'],
+                update_fields=cls.SUMMARY_FIELDS + ['updated_at'],
+            )
+        invalidate_project_stats()
+
+
+class UserTaskCounter(models.Model):
+    """
+    Compteurs dénormalisés des tâches assignées à un utilisateur (écran « mes tâches »).
+    
+    Le nombre de tâches en retard dépend de l'heure : il est calculé à `overdue_as_of`
+    et reste exact tant qu'aucune échéance ouverte n'est franchie, c'est-à-dire jusqu'à
+    `next_deadline` (plus proche échéance encore à venir d'une tâche non terminée).
+    """
+    user = models.OneToOneField(
+        'utilisateurs.User',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_counter',
+        verbose_name="Utilisateur"
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name="Total")
+    todo = models.PositiveIntegerField(default=0, verbose_name="À faire")
+    in_progress = models.PositiveIntegerField(default=0, verbose_name="En cours")
+    completed = models.PositiveIntegerField(default=0, verbose_name="Terminées")
+    overdue = models.PositiveIntegerField(default=0, verbose_name="En retard")
+    overdue_as_of = models.DateTimeField(default=timezone.now, verbose_name="Retards calculés le")
+    next_deadline = models.DateTimeField(null=True, blank=True, verbose_name="Prochaine échéance")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
+    SUMMARY_FIELDS = ['total', 'todo', 'in_progress', 'completed', 'overdue']
+    
+    class Meta:
+        verbose_name = "Compteur de tâches assignées"
+        verbose_name_plural = "Compteurs de tâches assignées"
+    
+    def __str__(self):
+        return f"Compteurs de l'utilisateur {self.user_id}"
+    
+    def is_stale(self, now=None):
+        """Une échéance a été franchie depuis le calcul des retards"""
+        return self.next_deadline is not None and self.next_deadline <= (now or timezone.now())
+    
+    def as_summary(self):
+        return {field: getattr(self, field) for field in self.SUMMARY_FIELDS}
+    
+    @classmethod
+    def for_user(cls, user):
+        """Compteurs de l'utilisateur, créés ou recalculés à la volée si absents ou périmés"""
+        counter = cls.objects.filter(user_id=user.pk).first()
+        if counter is None or counter.is_stale():
+            cls.refresh_for([user.pk])
+            counter = cls.objects.get(user_id=user.pk)
+        return counter
+    
+    @classmethod
+    def aggregate(cls, Assignment, user_ids, now):
+        """Compteurs par utilisateur en une agrégation sur la table d'assignation"""
+        is_open = Q(task__is_completed=False)
+        return {
+            row.pop('user_id'): row
+            for row in Assignment.objects.filter(user_id__in=user_ids)
+            .order_by()
+            .values('user_id')
+            .annotate(
+                total=Count('id'),
+                todo=Count('id', filter=Q(task__status='todo')),
+                in_progress=Count('id', filter=Q(task__status='in_progress')),
+                completed=Count('id', filter=Q(task__is_completed=True)),
+                overdue=Count('id', filter=is_open & Q(task__due_date__lt=now)),
+                next_deadline=Min('task__due_date', filter=is_open & Q(task__due_date__gte=now)),
+            )
+        }
+    
+    @classmethod
+    def refresh_for(cls, user_ids):
+        """
+        Recalcule les compteurs des utilisateurs donnés : une agrégation, une écriture
+        groupée (upsert), quel que soit le nombre d'utilisateurs
+        """
+        user_ids = set(User.objects.filter(pk__in={pk for pk in user_ids if pk is not None}).values_list('pk', flat=True))
+        if not user_ids:
+            return
+    
+        now = timezone.now()
+        rows = cls.aggregate(Task.assigned_to.through, user_ids, now)
+        empty = dict.fromkeys(cls.SUMMARY_FIELDS, 0)
+        cls.objects.bulk_create(
+            [
+                cls(user_id=user_id, **{'next_deadline': None, **empty, **rows.get(user_id, {}), 'overdue_as_of': now})
+                for user_id in user_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=cls.SUMMARY_FIELDS + ['overdue_as_of', 'next_deadline', 'updated_at'],
+        )
+    
+    @classmethod
+    def refresh_for_tasks(cls, task_ids):
+        """Recalcule les compteurs des assignés des tâches données"""
+        task_ids = {pk for pk in task_ids if pk is not None}
+        if task_ids:
+            cls.refresh_for(
+                Task.assigned_to.through.objects.filter(task_id__in=task_ids)
+                .values_list('user_id', flat=True).distinct()
+            )
+
+
+class ProjectVisibility(models.Model):
+    """Index de visibilité : projets visibles par chaque utilisateur (hors directeurs)"""
+    user = models.ForeignKey('utilisateurs.User', on_delete=models.CASCADE, related_name='+', verbose_name="Utilisateur")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='visibility', verbose_name="Projet")
+    
+    class Meta:
+        verbose_name = "Visibilité de projet"
+        verbose_name_plural = "Visibilités de projets"
+        unique_together = ['user', 'project']
+
+    def __str__(self):
+        return f"{self.user_id} → projet {self.project_id}"
+
+
+class TaskVisibility(models.Model):
+    """Index de visibilité : tâches visibles par chaque utilisateur (hors directeurs)"""
+    user = models.ForeignKey('utilisateurs.User', on_delete=models.CASCADE, related_name='+', verbose_name="Utilisateur")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='visibility', verbose_name="Tâche")
+    
+    class Meta:
+        verbose_name = "Visibilité de tâche"
+        verbose_name_plural = "Visibilités de tâches"
+        unique_together = ['user', 'task']
+
+    def __str__(self):
+        return f"{self.user_id} → tâche {self.task_id}"
+
+
 class TaskComment(models.Model):
     """Commentaires sur les tâches"""
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments', verbose_name="Tâche")
@@ -194,10 +643,17 @@ class TaskComment(models.Model):
     comment = models.TextField(verbose_name="Commentaire")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     
+    objects = search.IndexedQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Commentaire"
         verbose_name_plural = "Commentaires"
         ordering = ['-created_at']
+        indexes = [
+            # Fil des commentaires d'une tâche
+            models.Index(fields=['task', '-created_at', 'id'], name='comment_task_created_idx'),
+            search.SearchIndex.for_fields(['comment'], name='taches_taskcomment_search'),
+        ]
 
     def __str__(self):
         return f"Commentaire de {self.user_id} sur {self.task.title}"
@@ -227,6 +683,27 @@ class TaskAttachment(models.Model):
         return self.filename
 
 
+class NotificationQuerySet(models.QuerySet):
+    """QuerySet des notifications tenant à jour le flux d'activité et le cache lors des écritures en masse"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        caching.bump_model(self.model, user_tags({obj.user_id for obj in objs}))
+        if objs and objs[0].pk:
+            from . import activity
+            activity.notifications_created(objs)
+        return objs
+    
+    def update(self, **kwargs):
+        affected = list(self.values_list('pk', 'user_id'))
+        rows = super().update(**kwargs)
+        caching.bump_model(self.model, user_tags({user_id for _, user_id in affected}))
+        if 'is_read' in kwargs:
+            from . import activity
+            activity.notifications_changed([pk for pk, _ in affected])
+        return rows
+
+
 class Notification(models.Model):
     """Notifications pour les utilisateurs"""
     NOTIFICATION_TYPES = (
@@ -249,17 +726,226 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False, verbose_name="Lue")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
     
+    objects = NotificationQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'is_read']),
+            # Liste complète ; liste et compteur des non lues (index partiel : le filtre
+            # is_read=False est compilé en NOT is_read, inutilisable comme égalité indexée)
+            models.Index(fields=['user', '-created_at', 'id'], name='notif_user_created_idx'),
+            models.Index(
+                fields=['user', '-created_at', 'id'], condition=Q(is_read=False), name='notif_user_unread_idx'
+            ),
         ]
 
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        from . import activity
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            activity.notifications_created([self])
+        else:
+            activity.notifications_changed([self.pk])
+    
     def mark_as_read(self):
         self.is_read = True
-        self.save()
\ No newline at end of file
+        self.save()
+
+class NotificationEvent(models.Model):
+    """
+    File d'attente des notifications (voir taches.notifications).
+    Un événement vise plusieurs destinataires ; le worker le transforme en lignes
+    Notification par bulk_create puis le supprime.
+    """
+    notification_type = models.CharField(max_length=30, choices=Notification.NOTIFICATION_TYPES, verbose_name="Type")
+    title = models.CharField(max_length=200, verbose_name="Titre")
+    message = models.TextField(verbose_name="Message")
+    user_ids = models.JSONField(default=list, verbose_name="Destinataires")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Tâche liée")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Projet lié")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    
+    class Meta:
+        verbose_name = "Notification en attente"
+        verbose_name_plural = "Notifications en attente"
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.notification_type} → {len(self.user_ids)} destinataire(s)"
+
+
+class DeadlineScanMark(models.Model):
+    """
+    Point de reprise du scanner d'échéances (voir taches.deadlines) : position
+    (due_date, id) de la dernière tâche traitée pour chaque type de notification.
+    last_task_id vide : toutes les tâches échues à scanned_until ont été traitées.
+    """
+    KIND_CHOICES = (
+        ('deadline_approaching', 'Échéance proche'),
+        ('deadline_passed', 'Échéance dépassée'),
+    )
+    
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, primary_key=True, verbose_name="Type")
+    scanned_until = models.DateTimeField(verbose_name="Échéances traitées jusqu'au")
+    last_task_id = models.PositiveIntegerField(null=True, blank=True, verbose_name="Dernière tâche traitée")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+    
+    class Meta:
+        verbose_name = "Avancement du scanner d'échéances"
+        verbose_name_plural = "Avancements du scanner d'échéances"
+    
+    def __str__(self):
+        return f"{self.kind} jusqu'au {self.scanned_until}"
+
+
+class TaskEvent(models.Model):
+    """
+    Journal append-only des transitions de tâches (voir taches.events) : source de
+    l'historique, des graphiques et des flux d'activité, au lieu de l'état courant
+    que les mises à jour écrasent. Le projet est recopié pour les lectures par période.
+    """
+    EVENT_TYPES = (
+        ('created', 'Création'),
+        ('status_changed', 'Changement de statut'),
+        ('assigned', 'Assignation'),
+        ('completed', 'Terminée'),
+        ('reopened', 'Réouverte'),
+    )
+    
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='events', verbose_name="Tâche")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', verbose_name="Projet")
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES, verbose_name="Type")
+    from_status = models.CharField(max_length=20, blank=True, verbose_name="Statut précédent")
+    to_status = models.CharField(max_length=20, blank=True, verbose_name="Nouveau statut")
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Auteur"
+    )
+    assignee = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Assigné"
+    )
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Date")
+    
+    class Meta:
+        verbose_name = "Événement de tâche"
+        verbose_name_plural = "Événements de tâches"
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Lectures par période : globales, par type, par projet, historique d'une tâche
+            models.Index(fields=['created_at', 'id'], name='task_event_created_idx'),
+            models.Index(fields=['event_type', 'created_at'], name='task_event_type_created_idx'),
+            models.Index(fields=['project', 'created_at'], name='task_event_project_created_idx'),
+            models.Index(fields=['task', 'created_at', 'id'], name='task_event_task_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_event_type_display()}: {self.task_id} ({self.created_at})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Les événements de tâches ne sont jamais modifiés')
+        super().save(*args, **kwargs)
+
+
+class TaskDailyRollup(models.Model):
+    """
+    Agrégats quotidiens des tâches par (jour, département, projet, statut), tenus à jour
+    à chaque écriture (voir taches.rollups) : les graphiques lisent ces lignes plutôt
+    que la table des tâches.
+    
+    created / completed : tâches créées / terminées ce jour-là (flux).
+    open_delta / overdue_delta : variations du nombre de tâches ouvertes / en retard
+    en fin de journée ; le niveau à une date est la somme des variations jusqu'à elle.
+    Une tâche ouverte devient en retard le jour de son échéance : sa variation peut
+    être datée dans le futur.
+    """
+    day = models.DateField(verbose_name="Jour")
+    department = models.ForeignKey(
+        'utilisateurs.Department', on_delete=models.CASCADE, related_name='+', verbose_name="Département"
+    )
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', verbose_name="Projet")
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES, verbose_name="Statut")
+    created = models.IntegerField(default=0, verbose_name="Créées")
+    completed = models.IntegerField(default=0, verbose_name="Terminées")
+    open_delta = models.IntegerField(default=0, verbose_name="Variation des tâches ouvertes")
+    overdue_delta = models.IntegerField(default=0, verbose_name="Variation des tâches en retard")
+    
+    class Meta:
+        verbose_name = "Agrégat quotidien des tâches"
+        verbose_name_plural = "Agrégats quotidiens des tâches"
+        constraints = [
+            # Clé d'agrégation, aussi index des lectures par période
+            models.UniqueConstraint(fields=['day', 'department', 'project', 'status'], name='task_rollup_key'),
+        ]
+        indexes = [
+            models.Index(fields=['department', 'day'], name='task_rollup_department_idx'),
+            models.Index(fields=['project', 'day'], name='task_rollup_project_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.project_id} {self.status}"
+
+
+class ActivityFeedEntry(models.Model):
+    """
+    Flux d'activité dénormalisé (voir taches.activity), écrit au moment de l'événement :
+    tâche terminée, projet créé, notification. Une ligne par périmètre de lecture
+    (scope) ; les noms affichés sont recopiés pour que la lecture n'ait aucune jointure.
+    """
+    ACTIVITY_TYPES = Notification.NOTIFICATION_TYPES
+    STYLES = {
+        'task_completed': ('fa-check-circle', 'success'),
+        'project_created': ('fa-folder-open', 'info'),
+    }
+    NOTIFICATION_STYLE = ('fa-bell', 'warning')
+    
+    scope = models.CharField(max_length=40, verbose_name="Périmètre")
+    activity_type = models.CharField(max_length=30, choices=ACTIVITY_TYPES, verbose_name="Type")
+    title = models.CharField(max_length=255, verbose_name="Titre")
+    message = models.TextField(blank=True, verbose_name="Message")
+    project_name = models.CharField(max_length=200, blank=True, verbose_name="Projet")
+    department_name = models.CharField(max_length=100, blank=True, verbose_name="Département")
+    user_name = models.CharField(max_length=301, blank=True, verbose_name="Utilisateur")
+    task = models.ForeignKey(
+        Task, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Tâche liée"
+    )
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, null=True, blank=True, related_name='+', verbose_name="Projet lié"
+    )
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, null=True, blank=True, related_name='+',
+        verbose_name="Notification liée"
+    )
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Date")
+    
+    class Meta:
+        verbose_name = "Entrée du flux d'activité"
+        verbose_name_plural = "Entrées du flux d'activité"
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Lecture d'un périmètre, du plus récent au plus ancien (pagination par curseur)
+            models.Index(fields=['scope', '-created_at', '-id'], name='activity_scope_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}: {self.title}"
+    
+    @property
+    def style(self):
+        """(icône, couleur) affichées"""
+        if self.notification_id:
+            return self.NOTIFICATION_STYLE
+        return self.STYLES.get(self.activity_type, self.NOTIFICATION_STYLE)
+    
+    @property
+    def icon(self):
+        return self.style[0]
+    
+    @property
+    def color(self):
+        return self.style[1]
@@ -0,0 +1,112 @@
+"""
+Production des notifications hors du chemin de la requête.
+
+Les vues appellent notify() / notify_many() : un événement (type, texte, liste de
+destinataires) est inséré dans la file NotificationEvent, en une requête quel que
+soit le nombre de destinataires. Le worker (commande process_notifications) lit la
+file par lots, fusionne les doublons et écrit les Notification avec bulk_create.
+
+Coalescence : pour les types idempotents (COALESCED_TYPES : assignation, achèvement),
+un même destinataire et une même tâche, seul l'événement le plus récent du lot produit
+une notification. Les autres types (commentaire, mise à jour…) portent chacun un
+contenu propre et sont tous écrits.
+
+Par défaut, la file n'est traitée que par le worker (service notifications de
+docker-compose.yml). NOTIFICATIONS_INLINE=1, pour le développement sans worker, la
+traite à la validation de la transaction, dans la requête.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from .models import Notification, NotificationEvent
+
+COALESCED_TYPES = frozenset({'task_assigned', 'task_completed'})
+
+
+def _event(notification_type, title, message, users, task=None, project=None):
+    user_ids = sorted({getattr(user, 'pk', user) for user in users if user is not None})
+    if not user_ids:
+        return None
+    return NotificationEvent(
+        notification_type=notification_type,
+        title=title,
+        message=message,
+        user_ids=user_ids,
+        task_id=getattr(task, 'pk', task),
+        project_id=getattr(project, 'pk', project),
+    )
+
+
+def _schedule_inline():
+    if getattr(settings, 'NOTIFICATIONS_INLINE', False):
+        transaction.on_commit(process_pending)
+
+
+def notify(notification_type, title, message, users, task=None, project=None):
+    """Met en file une notification pour `users` ; utilisateurs, tâche et projet en instances ou identifiants"""
+    event = _event(notification_type, title, message, users, task, project)
+    if event is not None:
+        event.save()
+        _schedule_inline()
+
+
+def notify_many(events):
+    """Met en file plusieurs notifications : dicts d'arguments de notify(), un seul INSERT"""
+    events = [event for event in (_event(**kwargs) for kwargs in events) if event is not None]
+    if events:
+        NotificationEvent.objects.bulk_create(events)
+        _schedule_inline()
+
+
+def process_pending(batch_size=500):
+    """
+    Transforme un lot d'événements en notifications.
+    Retourne (événements consommés, notifications écrites).
+    """
+    from utilisateurs.models import User
+
+    with transaction.atomic():
+        pending = NotificationEvent.objects.order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Plusieurs workers se partagent la file sans se bloquer
+            pending = pending.select_for_update(skip_locked=True)
+        events = list(pending[:batch_size])
+        if not events:
+            return 0, 0
+
+        latest = {}
+        for event in events:
+            for user_id in event.user_ids:
+                if event.task_id and event.notification_type in COALESCED_TYPES:
+                    key = (user_id, event.notification_type, event.task_id)
+                else:
+                    key = (user_id, event.pk)
+                latest[key] = (user_id, event)
+
+        existing = set(
+            User.objects.filter(pk__in={user_id for user_id, _ in latest.values()}).values_list('pk', flat=True)
+        )
+        notifications = [
+            Notification(
+                user_id=user_id,
+                notification_type=event.notification_type,
+                title=event.title,
+                message=event.message,
+                task_id=event.task_id,
+                project_id=event.project_id,
+            )
+            for user_id, event in sorted(latest.values(), key=lambda item: item[1].pk)
+            if user_id in existing
+        ]
+        Notification.objects.bulk_create(notifications)
+        NotificationEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events), len(notifications)
+
+
+def process_all(batch_size=500):
+    """Vide la file (hors lots verrouillés par un autre worker) ; retourne le nombre de notifications écrites"""
+    total = 0
+    while True:
+        consumed, written = process_pending(batch_size)
+        total += written
+        if not consumed:
+            return total
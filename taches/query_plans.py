@@ -0,0 +1,192 @@
+"""
+Plans d'exécution des requêtes fréquentes (EXPLAIN) : chaque requête doit utiliser son
+index, sans parcours complet ni tri temporaire.
+
+Utilisé par les tests (taches.tests.QueryPlanTests) et par la commande check_query_plans.
+SQLite : EXPLAIN QUERY PLAN ; PostgreSQL : EXPLAIN (FORMAT JSON), parcours séquentiels
+désactivés pour que les tables de test, petites, montrent les chemins indexés.
+"""
+import json
+import random
+from datetime import timedelta
+
+from django.db import connection, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from utilisateurs.models import Department, User
+from . import activity
+from .deadlines import SCAN_ORDERING
+from .models import ActivityFeedEntry, Notification, Project, Task, TaskComment, TaskVisibility
+
+VENDORS = ('sqlite', 'postgresql')
+
+
+def _sqlite_plan(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        details = [row[-1] for row in cursor.fetchall()]
+    problems = []
+    for detail in details:
+        if detail.startswith('SCAN ') and 'CONSTANT ROW' not in detail:
+            problems.append('parcours complet')
+        if 'TEMP B-TREE' in detail:
+            problems.append('tri temporaire')
+    return details, problems
+
+
+def _postgresql_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _postgresql_nodes(child)
+
+
+def _postgresql_plan(sql, params):
+    with connection.cursor() as cursor:
+        # Tables de test minuscules : forcer le planificateur à montrer les chemins indexés
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(_postgresql_nodes(plan[0]['Plan']))
+    details = [
+        f"{node['Node Type']} {node.get('Relation Name', '')} {node.get('Index Name', '')}".strip()
+        for node in nodes
+    ]
+    problems = []
+    for node in nodes:
+        if node['Node Type'] == 'Seq Scan':
+            problems.append('parcours complet')
+        if node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append('tri temporaire')
+    return details, problems
+
+
+def explain(queryset, index, limit=20):
+    """
+    Plan de la première page du queryset : (lignes du plan, problèmes).
+    À appeler dans une transaction (PostgreSQL : SET LOCAL).
+    """
+    explain_sql = _sqlite_plan if connection.vendor == 'sqlite' else _postgresql_plan
+    sql, params = queryset[:limit].query.sql_with_params()
+    details, problems = explain_sql(sql, params)
+    if not any(index in detail for detail in details):
+        problems.append(f'index {index} inutilisé')
+    return details, list(dict.fromkeys(problems))
+
+
+def seed(task_count=2000, rng=None):
+    """Données de test représentatives ; retourne (utilisateur, projet, tâche) de référence"""
+    rng = rng or random.Random()
+    now = timezone.now()
+    department = Department.objects.create(name='Plans', code='PLANS')
+    # Plusieurs utilisateurs : les statistiques du planificateur doivent refléter la sélectivité réelle
+    users = [
+        User.objects.create_user(f'check-query-plans-{index}@example.com', None, role='membre', department=department)
+        for index in range(50)
+    ]
+    projects = [
+        Project.objects.create(
+            name=f'Plans {index}', code=f'PLANS-{index}', description='', department=department,
+            start_date=now.date(), end_date=now.date()
+        )
+        for index in range(5)
+    ]
+
+    # QuerySet de base : compteurs et index de visibilité hors sujet ici
+    tasks = models.QuerySet(Task).bulk_create([
+        Task(
+            title=f'Tâche {index}', description='', project=rng.choice(projects), created_by=rng.choice(users),
+            status=rng.choice(Task.KANBAN_COLUMNS), kanban_order=index,
+            due_date=now + timedelta(hours=rng.randint(-2000, 2000)),
+            is_completed=rng.random() < 0.3,
+        )
+        for index in range(task_count)
+    ])
+    Assignment = Task.assigned_to.through
+    Assignment.objects.bulk_create([Assignment(task_id=task.pk, user_id=rng.choice(users).pk) for task in tasks])
+    TaskVisibility.objects.bulk_create(
+        [TaskVisibility(task_id=task.pk, user_id=rng.choice(users).pk) for task in tasks]
+    )
+    TaskComment.objects.bulk_create([
+        TaskComment(task=rng.choice(tasks), user=rng.choice(users), comment='Commentaire')
+        for _ in range(task_count)
+    ])
+    # La plupart des notifications finissent lues
+    Notification.objects.bulk_create([
+        Notification(
+            user=rng.choice(users), notification_type='task_assigned', title='Notification', message='',
+            is_read=rng.random() < 0.9,
+        )
+        for _ in range(task_count * 5)
+    ])
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    return users[0], projects[0], tasks[0]
+
+
+def checks(user, project, task):
+    """(libellé, queryset, index attendu) — reprend les requêtes des vues et des tâches de fond"""
+    now = timezone.now()
+    open_tasks = Task.objects.filter(is_completed=False)
+    return [
+        (
+            'tableau Kanban : colonne',
+            Task.objects.filter(Task.kanban_column_filter('todo'), project=project).order_by(*Task.KANBAN_ORDERING),
+            'task_board_idx',
+        ),
+        (
+            'tableau Kanban : colonne terminée',
+            Task.objects.filter(Task.kanban_column_filter('done'), project=project).order_by(*Task.KANBAN_ORDERING),
+            'task_board_done_idx',
+        ),
+        (
+            'notifications',
+            Notification.objects.filter(user=user).order_by('-created_at', 'id'),
+            'notif_user_created_idx',
+        ),
+        (
+            'notifications non lues',
+            Notification.objects.filter(user=user, is_read=False).order_by('-created_at', 'id'),
+            'notif_user_unread_idx',
+        ),
+        (
+            'flux d\'activité (une branche par périmètre)',
+            ActivityFeedEntry.objects.filter(scope=activity.user_scope(user.pk)).order_by(*activity.ORDERING),
+            'activity_scope_created_idx',
+        ),
+        (
+            'commentaires d\'une tâche',
+            TaskComment.objects.filter(task=task).order_by('-created_at', 'id'),
+            'comment_task_created_idx',
+        ),
+        (
+            'tâches assignées (my_tasks)',
+            Task.assigned_to.through.objects.filter(user=user).values('task_id'),
+            'taches_task_assigned_to_user_task_idx',
+        ),
+        (
+            'tâches en retard',
+            open_tasks.filter(due_date__lt=now).order_by('due_date', 'id'),
+            'task_open_due_idx',
+        ),
+        (
+            'tâches en retard d\'un projet',
+            open_tasks.filter(project=project, due_date__lt=now).order_by('due_date', 'id'),
+            'task_open_project_due_idx',
+        ),
+        (
+            'tâches à venir visibles',
+            open_tasks.filter(
+                Exists(TaskVisibility.objects.filter(user=user, task=OuterRef('pk'))),
+                due_date__range=[now, now + timedelta(days=7)],
+            ).order_by('due_date', 'id'),
+            'task_open_due_idx',
+        ),
+        (
+            'scanner d\'échéances',
+            open_tasks.filter(due_date__gt=now, due_date__lte=now + timedelta(hours=24)).order_by(*SCAN_ORDERING),
+            'task_open_due_idx',
+        ),
+    ]
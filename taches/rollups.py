@@ -0,0 +1,260 @@
+"""
+Agrégats quotidiens des tâches (TaskDailyRollup) pour les graphiques du tableau de bord.
+
+Chaque écriture de tâche ajoute ses variations aux lignes (jour, département, projet,
+statut) concernées, en un seul INSERT … ON CONFLICT DO UPDATE additif par lot :
+- création : created +1 le jour de création (statut initial), completed +1 si la tâche
+  est déjà terminée ;
+- passage à terminée : completed +1 le jour même (statut à la fin) ;
+- état (projet, statut, terminée, échéance) modifié ou tâche supprimée : la contribution
+  de l'ancien état est retirée et celle du nouvel état ajoutée, à la date du jour.
+
+Contribution d'une tâche ouverte : open_delta +1 à partir du jour où elle entre dans
+l'état, overdue_delta +1 à partir du plus tardif de ce jour et du jour de son échéance.
+Retirer la contribution inscrit -1 aux mêmes dates, au plus tôt aujourd'hui : une
+échéance future retirée s'annule donc avec son +1.
+
+rebuild() reconstruit les lignes en rejouant le journal TaskEvent par lots de tâches,
+avec le projet et l'échéance actuels des tâches (leurs modifications passées ne sont
+pas journalisées) ; les tâches supprimées n'y figurent plus.
+"""
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+from django.db.models import DateField, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+CREATED, COMPLETED, OPEN, OVERDUE = range(4)
+COLUMNS = ['created', 'completed', 'open_delta', 'overdue_delta']
+KEY_COLUMNS = ['day', 'department_id', 'project_id', 'status']
+
+
+def state(task):
+    """État agrégé d'une tâche : (projet, statut, terminée, échéance)"""
+    return (task.project_id, task.status, task.is_completed, task.due_date)
+
+
+def original_state(task):
+    """État lu en base (Task.from_db) ou écrit par la dernière sauvegarde ; None si inconnu"""
+    if not hasattr(task, '_original_state'):
+        return None
+    return (task._original_project_id,) + tuple(task._original_state) + (task._original_due_date,)
+
+
+def _local_day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _new_deltas():
+    return defaultdict(lambda: [0, 0, 0, 0])
+
+
+def _contribute(deltas, task_state, day, sign):
+    """Ajoute (sign=1) ou retire (sign=-1) la contribution d'un état à partir de `day`"""
+    project_id, status, is_completed, due_date = task_state
+    if is_completed or project_id is None:
+        return
+    deltas[(day, project_id, status)][OPEN] += sign
+    deltas[(max(day, _local_day(due_date)), project_id, status)][OVERDUE] += sign
+
+
+def _apply(deltas, Rollup, Project):
+    """Ajoute les variations aux lignes existantes (upsert additif), projets supprimés ignorés"""
+    deltas = {key: values for key, values in deltas.items() if any(values)}
+    if not deltas:
+        return
+    departments = dict(
+        Project.objects.filter(pk__in={key[1] for key in deltas}).values_list('pk', 'department_id')
+    )
+    rows = [
+        (day, departments[project_id], project_id, status, *values)
+        for (day, project_id, status), values in deltas.items()
+        if project_id in departments
+    ]
+    if not rows:
+        return
+
+    connection = connections[router.db_for_write(Rollup)]
+    quote = connection.ops.quote_name
+    table = quote(Rollup._meta.db_table)
+    columns = ', '.join(quote(column) for column in KEY_COLUMNS + COLUMNS)
+    keys = ', '.join(quote(column) for column in KEY_COLUMNS)
+    updates = ', '.join(
+        f'{quote(column)} = {table}.{quote(column)} + excluded.{quote(column)}' for column in COLUMNS
+    )
+    placeholders = ', '.join(['%s'] * (len(KEY_COLUMNS) + len(COLUMNS)))
+    with connection.cursor() as cursor:
+        # Syntaxe commune à PostgreSQL et SQLite (3.24+)
+        for offset in range(0, len(rows), 500):
+            chunk = rows[offset:offset + 500]
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) VALUES {", ".join(f"({placeholders})" for _ in chunk)} '
+                f'ON CONFLICT ({keys}) DO UPDATE SET {updates}',
+                [value for row in chunk for value in row]
+            )
+
+
+def _models():
+    from .models import Project, TaskDailyRollup
+    return TaskDailyRollup, Project
+
+
+def tasks_created(tasks, now=None):
+    """Tâches nouvellement créées"""
+    today = _local_day(now or timezone.now())
+    deltas = _new_deltas()
+    for task in tasks:
+        created_day = _local_day(task.created_at) if task.created_at else today
+        deltas[(created_day, task.project_id, task.status)][CREATED] += 1
+        if task.is_completed:
+            deltas[(created_day, task.project_id, task.status)][COMPLETED] += 1
+        _contribute(deltas, state(task), created_day, 1)
+    _apply(deltas, *_models())
+
+
+def tasks_changed(changes, now=None):
+    """Tâches modifiées : paires (état avant, état après)"""
+    today = _local_day(now or timezone.now())
+    deltas = _new_deltas()
+    for before, after in changes:
+        if before == after:
+            continue
+        if after[2] and not before[2]:
+            deltas[(today, after[0], after[1])][COMPLETED] += 1
+        _contribute(deltas, before, today, -1)
+        _contribute(deltas, after, today, 1)
+    _apply(deltas, *_models())
+
+
+def tasks_deleted(states, now=None):
+    """Tâches supprimées : leur contribution cesse aujourd'hui (créations et fins restent acquises)"""
+    today = _local_day(now or timezone.now())
+    deltas = _new_deltas()
+    for task_state in states:
+        _contribute(deltas, task_state, today, -1)
+    _apply(deltas, *_models())
+
+
+def sync_departments(project_ids, Rollup=None):
+    """Projets changés de département : leurs lignes suivent"""
+    from .models import Project, TaskDailyRollup
+    Rollup = Rollup or TaskDailyRollup
+    for project_id, department_id in Project.objects.filter(pk__in=set(project_ids)).values_list('pk', 'department_id'):
+        Rollup.objects.filter(project_id=project_id).exclude(department_id=department_id).update(
+            department_id=department_id
+        )
+
+
+def _replay(task, events, deltas, today):
+    """Rejoue l'historique d'une tâche (événements triés) jusqu'à son état actuel"""
+    task_id, project_id, status, is_completed, due_date, created_at = task
+    current = None
+    for event_type, to_status, at in events:
+        day = _local_day(at)
+        if current is None:
+            # Création (événement absent : état initial pris au premier événement connu)
+            initial = to_status if event_type == 'created' else status
+            current = (project_id, initial, False, due_date)
+            deltas[(day, project_id, initial)][CREATED] += 1
+            _contribute(deltas, current, day, 1)
+            if event_type == 'created':
+                continue
+        if event_type == 'status_changed':
+            new = (project_id, to_status, current[2], due_date)
+        elif event_type == 'completed':
+            new = (project_id, to_status, True, due_date)
+            deltas[(day, project_id, to_status)][COMPLETED] += 1
+        elif event_type == 'reopened':
+            new = (project_id, to_status, False, due_date)
+        else:
+            continue
+        _contribute(deltas, current, day, -1)
+        _contribute(deltas, new, day, 1)
+        current = new
+
+    final = (project_id, status, is_completed, due_date)
+    if current is None:
+        deltas[(_local_day(created_at), project_id, status)][CREATED] += 1
+        _contribute(deltas, final, _local_day(created_at), 1)
+    elif current != final:
+        # Écriture non journalisée (QuerySet de base) : rattrapage à la date du jour
+        _contribute(deltas, current, today, -1)
+        _contribute(deltas, final, today, 1)
+
+
+def rebuild(Task, TaskEvent, Rollup, Project, chunk_size=2000, progress=None):
+    """
+    Reconstruit tous les agrégats depuis le journal, par lots de `chunk_size` tâches.
+    Modèles en paramètres (utilisable depuis une migration). Retourne le nombre de tâches traitées.
+    """
+    today = timezone.localdate()
+    processed = 0
+    with transaction.atomic():
+        Rollup.objects.all().delete()
+        last_id = 0
+        while True:
+            tasks = list(
+                Task.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('id', 'project_id', 'status', 'is_completed', 'due_date', 'created_at')[:chunk_size]
+            )
+            if not tasks:
+                break
+            last_id = tasks[-1][0]
+            history = defaultdict(list)
+            events = (
+                TaskEvent.objects.filter(task_id__in=[task[0] for task in tasks])
+                .exclude(event_type='assigned')
+                .order_by('task_id', 'created_at', 'id')
+                .values_list('task_id', 'event_type', 'to_status', 'created_at')
+            )
+            for task_id, event_type, to_status, at in events:
+                history[task_id].append((event_type, to_status, at))
+
+            deltas = _new_deltas()
+            for task in tasks:
+                _replay(task, history[task[0]], deltas, today)
+            _apply(deltas, Rollup, Project)
+            processed += len(tasks)
+            if progress:
+                progress(processed)
+    return processed
+
+
+def _bucket_levels(rollups, start, today, granularity):
+    """(niveaux avant `start`, {période: sommes}) en deux agrégations"""
+    baseline = rollups.filter(day__lt=start).aggregate(open=Sum('open_delta'), overdue=Sum('overdue_delta'))
+    rows = (
+        rollups.filter(day__gte=start, day__lte=today)
+        .annotate(bucket=Trunc('day', granularity, output_field=DateField()))
+        .values('bucket')
+        .annotate(
+            created=Sum('created'), completed=Sum('completed'),
+            open=Sum('open_delta'), overdue=Sum('overdue_delta'),
+        )
+        .order_by()
+    )
+    return baseline, {row['bucket']: row for row in rows}
+
+
+def timeline(rollups, start, buckets, granularity, today=None):
+    """
+    Séries par période lues dans les agrégats : créées et terminées dans la période,
+    tâches ouvertes et en retard à la fin de la période (ou aujourd'hui)
+    """
+    today = today or timezone.localdate()
+    baseline, sums = _bucket_levels(rollups, start, today, granularity)
+    open_level, overdue_level = baseline['open'] or 0, baseline['overdue'] or 0
+    points = []
+    for bucket in buckets:
+        row = sums.get(bucket, {})
+        open_level += row.get('open') or 0
+        overdue_level += row.get('overdue') or 0
+        points.append({
+            'start': bucket,
+            'created': row.get('created') or 0,
+            'completed': row.get('completed') or 0,
+            'open': open_level,
+            'overdue': overdue_level,
+        })
+    return points
@@ -0,0 +1,15 @@
+"""
+Modèles indexés pour la recherche plein texte (voir core.search).
+Les poids vont de A (le plus pertinent) à D.
+"""
+from core.search import register
+from .models import Project, Task, TaskComment
+
+SEARCH_FIELDS = {
+    Task: {'title': 'A', 'description': 'B'},
+    Project: {'name': 'A', 'code': 'A', 'description': 'B'},
+    TaskComment: {'comment': 'B'},
+}
+
+for model, fields in SEARCH_FIELDS.items():
+    register(model, fields)
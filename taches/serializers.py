@@ -1,8 +1,10 @@
+from django.db.models import Count
 from rest_framework import serializers
-from .models import Project, Task, TaskComment, TaskAttachment, Notification
+from core.serializers import CompiledListSerializer, DynamicFieldsModelSerializer
+from .models import ActivityFeedEntry, Project, Task, TaskComment, TaskAttachment, Notification, TaskEvent
 from utilisateurs.serializers import UserListSerializer
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(DynamicFieldsModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     progress = serializers.SerializerMethodField()
     coordinators_list = UserListSerializer(source='coordinators', many=True, read_only=True)
@@ -16,11 +18,16 @@ class ProjectListSerializer(serializers.ModelSerializer):
             'coordinators', 'coordinators_list', 'created_by', 'created_by_name',
             'created_at', 'updated_at'
         ]
+        list_serializer_class = CompiledListSerializer
+        field_sources = {'progress': ['task_counter']}
+        expandable_fields = {
+            'created_by_details': lambda: UserListSerializer(source='created_by', read_only=True),
+        }
     
     def get_progress(self, obj):
         return obj.get_progress()
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(DynamicFieldsModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     coordinators_list = UserListSerializer(source='coordinators', many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
@@ -29,17 +36,10 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = '__all__'
+        field_sources = {'tasks_summary': ['task_counter']}
     
     def get_tasks_summary(self, obj):
-        tasks = obj.tasks.all()
-        return {
-            'total': tasks.count(),
-            'todo': tasks.filter(status='todo').count(),
-            'in_progress': tasks.filter(status='in_progress').count(),
-            'review': tasks.filter(status='review').count(),
-            'done': tasks.filter(is_completed=True).count(),
-            'blocked': tasks.filter(status='blocked').count(),
-        }
+        return obj.get_task_counter().as_summary()
 
 class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -49,7 +49,7 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
             'priority', 'status', 'start_date', 'end_date'
         ]
 
-class TaskListSerializer(serializers.ModelSerializer):
+class TaskListSerializer(DynamicFieldsModelSerializer):
     project_name = serializers.CharField(source='project.name', read_only=True)
     project_code = serializers.CharField(source='project.code', read_only=True)
     assigned_to_list = UserListSerializer(source='assigned_to', many=True, read_only=True)
@@ -66,6 +66,15 @@ class TaskListSerializer(serializers.ModelSerializer):
             'is_completed', 'completion_percentage', 'is_overdue', 'time_remaining',
             'created_at', 'updated_at'
         ]
+        list_serializer_class = CompiledListSerializer
+        field_sources = {
+            'is_overdue': ['is_completed', 'due_date'],
+            'time_remaining': ['is_completed', 'due_date'],
+        }
+        expandable_fields = {
+            'project_details': lambda: ProjectListSerializer(source='project', read_only=True),
+            'created_by_details': lambda: UserListSerializer(source='created_by', read_only=True),
+        }
     
     def get_is_overdue(self, obj):
         return obj.is_overdue()
@@ -73,7 +82,7 @@ class TaskListSerializer(serializers.ModelSerializer):
     def get_time_remaining(self, obj):
         return obj.get_time_remaining()
 
-class TaskDetailSerializer(serializers.ModelSerializer):
+class TaskDetailSerializer(DynamicFieldsModelSerializer):
     project_details = ProjectListSerializer(source='project', read_only=True)
     assigned_to_list = UserListSerializer(source='assigned_to', many=True, read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
@@ -83,14 +92,62 @@ class TaskDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = '__all__'
+        field_annotations = {
+            'comments_count': Count('comments', distinct=True),
+            'attachments_count': Count('attachments', distinct=True),
+        }
     
     def get_comments_count(self, obj):
+        if hasattr(obj, 'comments_count'):
+            return obj.comments_count
         return obj.comments.count()
     
     def get_attachments_count(self, obj):
+        if hasattr(obj, 'attachments_count'):
+            return obj.attachments_count
         return obj.attachments.count()
 
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Clé résolue depuis le cache chargé par load_related_cache (une requête par modèle)"""
+    
+    def to_internal_value(self, data):
+        cache = self.context.get('related_cache', {}).get(self.get_queryset().model)
+        if cache is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return cache[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+def load_related_cache(serializer, items):
+    """Projets et utilisateurs référencés par `items` (dicts de données), une requête par modèle"""
+    cache = {}
+    for name in ('project', 'assigned_to'):
+        field = serializer.fields.get(name)
+        if field is None:
+            continue
+        relation = getattr(field, 'child_relation', field)
+        keys = set()
+        for item in items:
+            if hasattr(item, 'getlist'):
+                # Formulaire (QueryDict) : toutes les valeurs du champ
+                value = item.getlist(name)
+            else:
+                value = item.get(name) if isinstance(item, dict) else None
+            for key in (value if isinstance(value, list) else [value]):
+                if isinstance(key, (int, str)) and str(key).isdigit():
+                    keys.add(int(key))
+        queryset = relation.get_queryset()
+        cache[queryset.model] = queryset.in_bulk(keys)
+    return cache
+
 class TaskCreateUpdateSerializer(serializers.ModelSerializer):
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    
     class Meta:
         model = Task
         fields = [
@@ -98,12 +155,40 @@ class TaskCreateUpdateSerializer(serializers.ModelSerializer):
             'status', 'priority', 'complexity', 'start_date',
             'due_date', 'is_completed', 'completion_percentage'
         ]
+    
+    def to_internal_value(self, data):
+        if 'related_cache' not in self.context:
+            # Assignés résolus en une requête, et non une par identifiant
+            self._context['related_cache'] = load_related_cache(self, [data])
+        return super().to_internal_value(data)
+
+class TaskBulkListSerializer(serializers.ListSerializer):
+    """Valide un lot de tâches en chargeant projets et utilisateurs référencés en une fois"""
+    
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._context['related_cache'] = load_related_cache(self.child, data)
+        return super().to_internal_value(data)
+
+class TaskBulkSerializer(TaskCreateUpdateSerializer):
+    """Élément d'un import en lot : création sans id, mise à jour partielle avec id"""
+    id = serializers.IntegerField(required=False)
+    
+    class Meta(TaskCreateUpdateSerializer.Meta):
+        fields = ['id'] + TaskCreateUpdateSerializer.Meta.fields
+        list_serializer_class = TaskBulkListSerializer
 
 class TaskStatusUpdateSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
     completion_percentage = serializers.IntegerField(min_value=0, max_value=100, required=False)
 
-class TaskCommentSerializer(serializers.ModelSerializer):
+class TaskMoveSerializer(serializers.Serializer):
+    task = serializers.IntegerField()
+    column = serializers.ChoiceField(choices=Task.KANBAN_COLUMNS)
+    after = serializers.IntegerField(required=False, allow_null=True)
+    before = serializers.IntegerField(required=False, allow_null=True)
+
+class TaskCommentSerializer(DynamicFieldsModelSerializer):
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     user_avatar = serializers.SerializerMethodField()
     
@@ -111,11 +196,39 @@ class TaskCommentSerializer(serializers.ModelSerializer):
         model = TaskComment
         fields = ['id', 'task', 'user', 'user_name', 'user_avatar', 'comment', 'created_at']
         read_only_fields = ['user', 'created_at']
+        field_sources = {'user_avatar': ['user.profile_photo']}
     
     def get_user_avatar(self, obj):
         return obj.user.get_avatar_url()
 
-class TaskAttachmentSerializer(serializers.ModelSerializer):
+class TaskEventSerializer(serializers.ModelSerializer):
+    user_name = serializers.CharField(source='user.get_full_name', read_only=True, default=None)
+    assignee_name = serializers.CharField(source='assignee.get_full_name', read_only=True, default=None)
+    
+    class Meta:
+        model = TaskEvent
+        fields = [
+            'id', 'task', 'event_type', 'from_status', 'to_status',
+            'user', 'user_name', 'assignee', 'assignee_name', 'created_at'
+        ]
+        read_only_fields = fields
+
+class ActivityFeedEntrySerializer(serializers.ModelSerializer):
+    """Entrée du flux d'activité : champs recopiés, aucune requête par entrée"""
+    type = serializers.CharField(source='activity_type', read_only=True)
+    project = serializers.CharField(source='project_name', read_only=True)
+    department = serializers.CharField(source='department_name', read_only=True)
+    user = serializers.CharField(source='user_name', read_only=True)
+    date = serializers.DateTimeField(source='created_at', read_only=True)
+    icon = serializers.CharField(read_only=True)
+    color = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = ActivityFeedEntry
+        fields = ['id', 'type', 'title', 'message', 'project', 'department', 'user', 'date', 'icon', 'color']
+        read_only_fields = fields
+
+class TaskAttachmentSerializer(DynamicFieldsModelSerializer):
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     file_url = serializers.SerializerMethodField()
     file_size_display = serializers.SerializerMethodField()
@@ -127,6 +240,7 @@ class TaskAttachmentSerializer(serializers.ModelSerializer):
             'filename', 'file_size', 'file_size_display', 'uploaded_at'
         ]
         read_only_fields = ['user', 'filename', 'file_size', 'uploaded_at']
+        field_sources = {'file_url': ['file'], 'file_size_display': ['file_size']}
     
     def get_file_url(self, obj):
         request = self.context.get('request')
@@ -142,7 +256,7 @@ class TaskAttachmentSerializer(serializers.ModelSerializer):
         else:
             return f"{obj.file_size / (1024 * 1024):.1f} MB"
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(DynamicFieldsModelSerializer):
     task_title = serializers.CharField(source='task.title', read_only=True)
     project_name = serializers.CharField(source='project.name', read_only=True)
     
@@ -153,4 +267,5 @@ class NotificationSerializer(serializers.ModelSerializer):
             'task', 'task_title', 'project', 'project_name',
             'is_read', 'created_at'
         ]
-        read_only_fields = ['created_at']
\ No newline at end of file
+        read_only_fields = ['created_at']
+        list_serializer_class = CompiledListSerializer
\ No newline at end of file
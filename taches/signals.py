@@ -0,0 +1,139 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from utilisateurs.models import User
+from . import activity, rollups
+from .caching import invalidate_project_stats
+from .events import record_assignments
+from .models import Project, Task, ProjectTaskCounter, UserTaskCounter
+from .visibility import refresh_project_visibility, refresh_task_visibility, refresh_user_visibility
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    """Met à jour les compteurs et la visibilité du projet (et de l'ancien projet en cas de déplacement)"""
+    project_ids = {instance.project_id}
+    original_project_id = getattr(instance, '_original_project_id', None)
+    moved = original_project_id and original_project_id != instance.project_id
+    if moved:
+        project_ids.add(original_project_id)
+    
+    # Variations depuis l'état d'origine (Task.save le remplace après ce signal), comme les agrégats
+    before = None if created else rollups.original_state(instance)
+    if created or before is not None:
+        ProjectTaskCounter.apply_changes([(before and before[:3], rollups.state(instance)[:3])])
+    else:
+        ProjectTaskCounter.refresh_for(project_ids)
+    if not created:
+        # À la création, les assignés ne sont pas encore écrits (m2m_changed s'en charge)
+        UserTaskCounter.refresh_for_tasks([instance.pk])
+    if created or moved:
+        refresh_task_visibility([instance.pk])
+    if moved:
+        refresh_project_visibility(project_ids)
+    instance._original_project_id = instance.project_id
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    """Mémorise les assignés avant la suppression des lignes d'assignation"""
+    instance._deleted_assignee_ids = set(instance.assigned_to.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    """Recalcule après commit : le projet peut être en cours de suppression (cascade)"""
+    project_id = instance.project_id
+    assignee_ids = instance.__dict__.pop('_deleted_assignee_ids', set())
+    task_state = rollups.state(instance)
+    
+    def refresh():
+        ProjectTaskCounter.apply_changes([(task_state[:3], None)])
+        rollups.tasks_deleted([task_state])
+        UserTaskCounter.refresh_for(assignee_ids)
+        refresh_project_visibility([project_id])
+    
+    transaction.on_commit(refresh)
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def task_assignments_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # clear() : mémoriser les lignes concernées avant suppression
+        if reverse:
+            instance._cleared_task_ids = set(instance.assigned_tasks.values_list('pk', flat=True))
+        else:
+            instance._cleared_user_ids = set(instance.assigned_to.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action == 'post_add':
+        if reverse:
+            tasks = Task.objects.filter(pk__in=pk_set).only('id', 'project_id', 'status')
+            record_assignments([(task, instance.pk) for task in tasks])
+        else:
+            record_assignments([(instance, user_id) for user_id in sorted(pk_set)])
+    if not reverse:
+        user_ids = pk_set if pk_set is not None else instance.__dict__.pop('_cleared_user_ids', set())
+        UserTaskCounter.refresh_for(user_ids)
+        refresh_task_visibility([instance.pk])
+        refresh_project_visibility([instance.project_id])
+        return
+    
+    UserTaskCounter.refresh_for([instance.pk])
+    task_ids = pk_set if pk_set is not None else instance.__dict__.pop('_cleared_task_ids', set())
+    refresh_task_visibility(task_ids)
+    refresh_project_visibility(
+        Task.objects.filter(pk__in=task_ids).values_list('project_id', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+    invalidate_project_stats()
+    original_department_id = getattr(instance, '_original_department_id', None)
+    department_changed = not created and original_department_id != instance.department_id
+    if created or department_changed:
+        refresh_project_visibility([instance.pk])
+    if created:
+        ProjectTaskCounter.objects.bulk_create([ProjectTaskCounter(project=instance)], ignore_conflicts=True)
+        activity.projects_created([instance.pk])
+    if department_changed:
+        refresh_task_visibility(instance.tasks.values_list('pk', flat=True))
+        rollups.sync_departments([instance.pk])
+        activity.sync_departments([instance.pk])
+    instance._original_department_id = instance.department_id
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    invalidate_project_stats()
+
+
+@receiver(m2m_changed, sender=Project.coordinators.through)
+def project_coordinators_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        refresh_user_visibility([instance.pk])
+    else:
+        refresh_project_visibility([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Recalcule la visibilité quand le rôle, le département ou la section changent"""
+    original_scope = getattr(instance, '_original_scope', None)
+    scope = instance.get_scope()
+    if not created and original_scope == scope:
+        return
+    
+    user_ids = {instance.pk}
+    # Les responsables de l'ancienne et de la nouvelle section voient les tâches de ce membre
+    sections = {scope[2], original_scope[2] if original_scope else None} - {None}
+    if sections:
+        user_ids.update(
+            User.objects.filter(section_id__in=sections, role='responsable_section').values_list('pk', flat=True)
+        )
+    refresh_user_visibility(user_ids)
+    instance._original_scope = scope
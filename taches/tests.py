@@ -0,0 +1,1367 @@
+import json
+import random
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.apps import apps
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import caching, search
+from core.pagination import EstimatedCountPaginator
+
+from utilisateurs.models import Department, Section, User
+from . import activity, charts, deadlines, kanban, notifications, query_plans
+from .serializers import NotificationSerializer, ProjectListSerializer, TaskListSerializer
+from .models import (
+    ActivityFeedEntry, Notification, NotificationEvent, Project, ProjectTaskCounter, ProjectVisibility, Task,
+    TaskComment, TaskDailyRollup, TaskEvent, TaskVisibility, UserTaskCounter
+)
+from .caching import project_stats_key
+from .views import ProjectViewSet
+from .visibility import visibility_scope, visible_projects, visible_tasks
+
+
+class TachesTestCase(TestCase):
+    """Jeu de données commun : un département, une section, un projet et ses tâches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Informatique', code='IT')
+        cls.section = Section.objects.create(name='Développement', code='DEV', department=cls.department)
+        cls.director = User.objects.create_user(
+            'directeur@example.com', 'secret', first_name='Dir', last_name='Ecteur', role='directeur'
+        )
+        cls.members = [
+            User.objects.create_user(
+                f'membre{index}@example.com', 'secret', first_name='Membre', last_name=str(index),
+                role='membre', department=cls.department, section=cls.section
+            )
+            for index in range(3)
+        ]
+        today = timezone.now().date()
+        cls.project = Project.objects.create(
+            name='Portail', code='PORT', description='Portail interne', department=cls.department,
+            start_date=today, end_date=today + timedelta(days=30), created_by=cls.director
+        )
+        cls.tasks = [cls.create_task(f'Tâche {index}') for index in range(3)]
+
+    @classmethod
+    def create_task(cls, title, **kwargs):
+        kwargs.setdefault('due_date', timezone.now() + timedelta(days=3))
+        task = Task.objects.create(
+            title=title, description='Description', project=cls.project, created_by=cls.director, **kwargs
+        )
+        task.assigned_to.add(*cls.members)
+        return task
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+
+    def count_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, format='json', **kwargs)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(context.captured_queries)
+
+    def assertCountersMatch(self):
+        """Compteurs dénormalisés égaux à un recomptage depuis Task"""
+        for counter in ProjectTaskCounter.objects.all():
+            self.assertEqual(counter.as_summary(), Task.objects.filter(project=counter.project_id).aggregate(
+                total=Count('id'),
+                todo=Count('id', filter=Q(status='todo')),
+                in_progress=Count('id', filter=Q(status='in_progress')),
+                review=Count('id', filter=Q(status='review')),
+                done=Count('id', filter=Q(is_completed=True)),
+                blocked=Count('id', filter=Q(status='blocked')),
+            ), f'projet {counter.project_id}')
+        now = timezone.now()
+        for counter in UserTaskCounter.objects.all():
+            self.assertEqual(counter.as_summary(), Task.objects.filter(assigned_to=counter.user_id).aggregate(
+                total=Count('id'),
+                todo=Count('id', filter=Q(status='todo')),
+                in_progress=Count('id', filter=Q(status='in_progress')),
+                completed=Count('id', filter=Q(is_completed=True)),
+                overdue=Count('id', filter=Q(is_completed=False, due_date__lt=now)),
+            ), f'utilisateur {counter.user_id}')
+
+    def assertRollupsMatch(self, day=None):
+        """
+        Niveaux des agrégats quotidiens (tâches ouvertes / en retard) égaux à un recomptage
+        depuis Task, aujourd'hui ou à une date future (`day`) sans autre écriture d'ici là
+        """
+        today = day or timezone.localdate()
+        levels = {
+            (row['project'], row['status']): (row['open'], row['overdue'])
+            for row in TaskDailyRollup.objects.filter(day__lte=today).values('project', 'status')
+            .annotate(open=Sum('open_delta'), overdue=Sum('overdue_delta'))
+            if row['open'] or row['overdue']
+        }
+        expected = {}
+        for project_id, task_status, due_date in Task.objects.filter(is_completed=False).values_list(
+            'project', 'status', 'due_date'
+        ):
+            opened, overdue = expected.get((project_id, task_status), (0, 0))
+            expected[(project_id, task_status)] = (opened + 1, overdue + (timezone.localdate(due_date) <= today))
+        self.assertEqual(levels, expected)
+
+
+@override_settings(QUERYSET_OPTIMIZER_STRICT=True)
+class CustomActionQueriesTests(TachesTestCase):
+    """Actions personnalisées : aucune requête pendant la sérialisation (forbid_queries)"""
+
+    def test_project_tasks(self):
+        url = f'/api/projects/{self.project.pk}/tasks/'
+        queries = self.count_queries('get', url)
+        for index in range(5):
+            self.create_task(f'Supplémentaire {index}')
+        cache.clear()
+        self.assertEqual(self.count_queries('get', url), queries)
+
+    def test_task_status(self):
+        self.count_queries('put', f'/api/tasks/{self.tasks[0].pk}/status/', data={'status': 'in_progress'})
+
+    def test_task_assign(self):
+        user_ids = [member.pk for member in self.members[:2]]
+        self.count_queries('post', f'/api/tasks/{self.tasks[0].pk}/assign/', data={'user_ids': user_ids})
+
+    def test_task_validate(self):
+        self.count_queries('post', f'/api/tasks/{self.tasks[0].pk}/validate/')
+
+
+class AssigneeWriteCostTests(TachesTestCase):
+    """Création et changement de statut : nombre de requêtes indépendant du nombre d'assignés"""
+
+    def assignees(self, count):
+        return [
+            User.objects.create_user(
+                f'assigne{count}-{index}@example.com', 'secret', role='membre', department=self.department
+            ).pk
+            for index in range(count)
+        ]
+
+    def create_and_update(self, user_ids):
+        data = {
+            'title': 'Nouvelle tâche', 'description': 'Description', 'project': self.project.pk,
+            'assigned_to': user_ids, 'due_date': (timezone.now() + timedelta(days=2)).isoformat(),
+        }
+        with CaptureQueriesContext(connection) as create:
+            response = self.client.post('/api/tasks/', data, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        task = Task.objects.get(title='Nouvelle tâche', assigned_to=user_ids[0])
+        update = self.count_queries('put', f'/api/tasks/{task.pk}/status/', data={'status': 'in_progress'})
+        return len(create.captured_queries), update
+
+    def test_cost_independent_of_assignees(self):
+        self.assertEqual(self.create_and_update(self.assignees(1)), self.create_and_update(self.assignees(10)))
+
+    def test_counters_refreshed(self):
+        user_ids = self.assignees(4)
+        self.create_and_update(user_ids)
+        for counter in UserTaskCounter.objects.filter(user_id__in=user_ids):
+            self.assertEqual(counter.as_summary(), {
+                'total': 1, 'todo': 0, 'in_progress': 1, 'completed': 0, 'overdue': 0
+            })
+
+
+class SearchCursorPaginationTests(TachesTestCase):
+    """?search= combiné à la pagination par curseur (tri par pertinence non encodable)"""
+
+    def test_search_with_cursor(self):
+        expected = {task.pk for task in self.tasks}
+        expected |= {self.create_task(f'Rapport {index}').pk for index in range(12)}
+        self.create_task('Autre sujet')
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks]).update(title='Tâche rapport')
+
+        seen = []
+        url = '/api/tasks/?search=rapport&pagination=cursor&page_size=5'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            seen.extend(task['id'] for task in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), expected)
+
+
+class TasksByStatusTests(TachesTestCase):
+    """Répartition par statut des graphiques : identique au regroupement des tâches par statut"""
+
+    def test_matches_group_by_status(self):
+        self.create_task('Terminée en revue', status='review', is_completed=True)
+        self.create_task('Terminée', status='done', is_completed=True)
+        self.create_task('Bloquée', status='blocked')
+        expected = [
+            {'status': row['status'], 'count': row['count']}
+            for row in Task.objects.values('status').annotate(count=Count('id')).order_by('status')
+        ]
+        self.assertEqual(charts.tasks_by_status(), expected)
+        self.assertEqual(sum(row['count'] for row in expected), Task.objects.count())
+
+
+class VisibilityCacheTagTests(TachesTestCase):
+    """Index de visibilité recalculé : étiquette user:<id> des utilisateurs concernés incrémentée"""
+
+    def test_assignment_bumps_affected_users(self):
+        head = User.objects.create_user(
+            'responsable@example.com', 'secret', role='responsable_section',
+            department=self.department, section=self.section
+        )
+        outsider = User.objects.create_user('externe@example.com', 'secret', role='membre')
+        task = Task.objects.create(
+            title='Nouvelle', description='Description', project=self.project,
+            due_date=timezone.now() + timedelta(days=3), created_by=self.director
+        )
+        tags = [f'user:{head.pk}', f'user:{self.members[0].pk}', f'user:{outsider.pk}']
+        before = caching.tag_versions(tags)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.assigned_to.add(self.members[0])
+        after = caching.tag_versions(tags)
+        # Le responsable de section et l'assigné gagnent la tâche ; l'utilisateur externe, rien
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+        self.assertEqual(after[2], before[2])
+
+
+class LoginCacheTests(TachesTestCase):
+    """Connexion (update_last_login) : tableau Kanban et statistiques en cache restent valides"""
+
+    def test_login_keeps_cache_warm(self):
+        kanban = f'/api/projects/{self.project.pk}/kanban/'
+        self.assertEqual(self.client.get(kanban)['X-Cache'], 'MISS')
+        self.count_queries('get', '/api/dashboard/stats/')
+        warm = self.count_queries('get', '/api/dashboard/stats/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post(
+                '/api/auth/login/', {'email': self.members[0].email, 'password': 'secret'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(self.client.get(kanban)['X-Cache'], 'HIT')
+        self.assertEqual(self.count_queries('get', '/api/dashboard/stats/'), warm)
+
+    def test_profile_change_invalidates_kanban(self):
+        kanban = f'/api/projects/{self.project.pk}/kanban/'
+        self.client.get(kanban)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.members[0].first_name = 'Renommé'
+            self.members[0].save()
+        self.assertEqual(self.client.get(kanban)['X-Cache'], 'MISS')
+
+
+class VisibilityIndexTests(TachesTestCase):
+    """Index de visibilité : mêmes listes que les règles par rôle d'origine (OR + DISTINCT)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        other_department = Department.objects.create(name='Ressources humaines', code='RH')
+        other_section = Section.objects.create(name='Paie', code='PAIE', department=other_department)
+        cls.users = {
+            'coordinateur': User.objects.create_user(
+                'coordinateur@example.com', 'secret', role='coordinateur', department=cls.department
+            ),
+            'coordinateur sans département': User.objects.create_user(
+                'coordinateur-libre@example.com', 'secret', role='coordinateur'
+            ),
+            'responsable_section': User.objects.create_user(
+                'responsable@example.com', 'secret', role='responsable_section',
+                department=cls.department, section=cls.section
+            ),
+            'responsable_section sans section': User.objects.create_user(
+                'responsable-libre@example.com', 'secret', role='responsable_section', department=cls.department
+            ),
+            'membre': cls.members[0],
+            'membre externe': User.objects.create_user(
+                'paie@example.com', 'secret', role='membre', department=other_department, section=other_section
+            ),
+        }
+        today = timezone.now().date()
+        other_project = Project.objects.create(
+            name='Paie', code='PAIE', description='Paie', department=other_department,
+            start_date=today, end_date=today + timedelta(days=30), created_by=cls.director
+        )
+        other_project.coordinators.add(cls.users['coordinateur sans département'])
+        external = Task.objects.create(
+            title='Bulletins', description='Description', project=other_project,
+            due_date=timezone.now() + timedelta(days=3), created_by=cls.director
+        )
+        # Assignations hors du département : membre, responsable, coordinateur
+        external.assigned_to.add(
+            cls.users['membre externe'], cls.members[1], cls.users['responsable_section sans section'],
+            cls.users['coordinateur'],
+        )
+        cls.tasks[0].assigned_to.add(cls.users['responsable_section'])
+        Task.objects.create(
+            title='Sans assigné', description='Description', project=cls.project,
+            due_date=timezone.now() + timedelta(days=3), created_by=cls.director
+        )
+
+    @staticmethod
+    def baseline_projects(user):
+        queryset = Project.objects.all()
+        if user.role == 'coordinateur':
+            if user.department:
+                return queryset.filter(Q(department=user.department) | Q(coordinators=user)).distinct()
+            return queryset.filter(coordinators=user)
+        elif user.role == 'responsable_section' and user.section:
+            return queryset.filter(Q(department=user.department) | Q(tasks__assigned_to=user)).distinct()
+        elif user.role == 'membre':
+            return queryset.filter(tasks__assigned_to=user).distinct()
+        return queryset.none()
+
+    @staticmethod
+    def baseline_tasks(user):
+        queryset = Task.objects.all()
+        if user.role == 'coordinateur':
+            if user.department:
+                return queryset.filter(Q(project__department=user.department) | Q(assigned_to=user)).distinct()
+            return queryset.filter(assigned_to=user)
+        elif user.role == 'responsable_section' and user.section:
+            return queryset.filter(Q(assigned_to__section=user.section) | Q(assigned_to=user)).distinct()
+        elif user.role == 'membre':
+            return queryset.filter(assigned_to=user)
+        return queryset.none()
+
+    def assertIndexMatchesBaseline(self):
+        for label, user in self.users.items():
+            with self.subTest(label):
+                self.assertEqual(
+                    set(visible_projects(Project.objects.all(), user).values_list('pk', flat=True)),
+                    set(self.baseline_projects(user).values_list('pk', flat=True)),
+                )
+                self.assertEqual(
+                    set(visible_tasks(Task.objects.all(), user).values_list('pk', flat=True)),
+                    set(self.baseline_tasks(user).values_list('pk', flat=True)),
+                )
+
+    def test_matches_role_rules(self):
+        self.assertIndexMatchesBaseline()
+
+    def test_migration_backfill(self):
+        expected = (
+            set(ProjectVisibility.objects.values_list('user_id', 'project_id')),
+            set(TaskVisibility.objects.values_list('user_id', 'task_id')),
+        )
+        import_module('taches.migrations.0003_visibility_index').backfill_visibility(apps, None)
+        self.assertEqual((
+            set(ProjectVisibility.objects.values_list('user_id', 'project_id')),
+            set(TaskVisibility.objects.values_list('user_id', 'task_id')),
+        ), expected)
+        self.assertIndexMatchesBaseline()
+
+
+class KanbanMoveTests(TachesTestCase):
+    """Déplacements Kanban : rang au milieu de l'intervalle, renumérotation si trop étroit"""
+
+    def setUp(self):
+        super().setUp()
+        for index, task in enumerate(self.tasks, start=1):
+            Task.objects.filter(pk=task.pk).update(kanban_order=index * kanban.RANK_GAP)
+
+    def move(self, task, after=None, before=None, column='todo', client=None):
+        return (client or self.client).post('/api/tasks/move/', {
+            'moves': [{'task': task.pk, 'column': column, 'after': after and after.pk, 'before': before and before.pk}]
+        }, format='json')
+
+    def column(self):
+        return list(
+            Task.objects.filter(kanban.column_filter('todo'), project=self.project)
+            .order_by(*Task.KANBAN_ORDERING).values_list('pk', 'kanban_order')
+        )
+
+    def test_move_between_neighbors(self):
+        first, second, third = self.tasks
+        with CaptureQueriesContext(connection) as context:
+            response = self.move(third, after=first, before=second)
+        self.assertEqual(response.status_code, 200, response.content)
+        # Un simple reclassement : une seule ligne réécrite
+        updates = [query for query in context.captured_queries if query['sql'].startswith('UPDATE "taches_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.column(), [
+            (first.pk, kanban.RANK_GAP), (third.pk, kanban.RANK_GAP * 3 // 2), (second.pk, 2 * kanban.RANK_GAP),
+        ])
+
+    def test_exhausted_gap_spreads_column(self):
+        first, second, third = self.tasks
+        Task.objects.filter(pk=second.pk).update(kanban_order=kanban.RANK_GAP + 1)
+        response = self.move(third, after=first, before=second)
+        self.assertEqual(response.status_code, 200, response.content)
+        ranks = self.column()
+        self.assertEqual([pk for pk, _ in ranks], [first.pk, third.pk, second.pk])
+        self.assertEqual(ranks[0][1], kanban.RANK_GAP)
+        self.assertEqual(ranks[2][1], 2 * kanban.RANK_GAP)
+
+    def test_tight_gap_rebalanced_after_commit(self):
+        first, second, third = self.tasks
+        Task.objects.filter(pk=second.pk).update(kanban_order=kanban.RANK_GAP + 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.move(third, after=first, before=second)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.column(), [
+            (pk, index * kanban.RANK_GAP) for index, pk in enumerate([first.pk, third.pk, second.pk], start=1)
+        ])
+
+    def test_invisible_neighbor_reported_as_missing(self):
+        member = self.members[0]
+        hidden = Task.objects.create(
+            title='Invisible', description='Description', project=self.project,
+            due_date=timezone.now() + timedelta(days=3), created_by=self.director
+        )
+        client = APIClient()
+        client.force_authenticate(member)
+        missing = Task(pk=hidden.pk + 1000)
+        messages = []
+        for neighbor in (hidden, missing):
+            response = self.move(self.tasks[0], after=neighbor, client=client)
+            self.assertEqual(response.status_code, 400, response.content)
+            messages.append(response.data['message'].replace(str(neighbor.pk), '<id>'))
+        self.assertEqual(messages[0], messages[1])
+
+    def test_migration_spreads_ranks(self):
+        for task, rank in zip(self.tasks, [5, 5, 2]):
+            Task.objects.filter(pk=task.pk).update(kanban_order=rank)
+        import_module('taches.migrations.0004_spread_kanban_order').spread_kanban_order(apps, None)
+        self.assertEqual(self.column(), [
+            (pk, index * kanban.RANK_GAP)
+            for index, pk in enumerate([self.tasks[2].pk, self.tasks[0].pk, self.tasks[1].pk], start=1)
+        ])
+
+
+@override_settings(NOTIFICATIONS_INLINE=False)
+class NotificationQueueTests(TachesTestCase):
+    """File des notifications : un INSERT par événement, fusion des seuls types idempotents"""
+
+    def notify(self, notification_type, title, task=None):
+        notifications.notify(notification_type, title, 'Message', self.members, task=task or self.tasks[0])
+
+    def received(self, user, notification_type):
+        return list(
+            Notification.objects.filter(user=user, notification_type=notification_type)
+            .order_by('id').values_list('title', flat=True)
+        )
+
+    def test_enqueue_single_insert(self):
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.notify('task_assigned', 'Assignation')
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(NotificationEvent.objects.get().user_ids, sorted(member.pk for member in self.members))
+        # Sans worker, rien n'est écrit pendant la requête
+        self.assertFalse(Notification.objects.exists())
+
+    def test_coalesces_idempotent_types_only(self):
+        self.notify('task_assigned', 'Assignation 1')
+        self.notify('task_assigned', 'Assignation 2')
+        self.notify('task_assigned', 'Autre tâche', task=self.tasks[1])
+        self.notify('comment_added', 'Commentaire 1')
+        self.notify('comment_added', 'Commentaire 2')
+        self.assertEqual(notifications.process_all(), 4 * len(self.members))
+        for member in self.members:
+            self.assertEqual(self.received(member, 'task_assigned'), ['Assignation 2', 'Autre tâche'])
+            self.assertEqual(self.received(member, 'comment_added'), ['Commentaire 1', 'Commentaire 2'])
+
+    def test_worker_drains_queue(self):
+        for index in range(3):
+            self.notify('task_updated', f'Mise à jour {index}')
+        deleted = User.objects.create_user('supprime@example.com', 'secret', role='membre')
+        notifications.notify('task_updated', 'Supprimé', 'Message', [deleted], task=self.tasks[0])
+        deleted.delete()
+        call_command('process_notifications', batch_size=2, stdout=StringIO())
+        self.assertFalse(NotificationEvent.objects.exists())
+        self.assertEqual(Notification.objects.count(), 3 * len(self.members))
+
+    @override_settings(NOTIFICATIONS_INLINE=True)
+    def test_inline_mode_writes_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notify('task_assigned', 'Assignation')
+        self.assertFalse(NotificationEvent.objects.exists())
+        self.assertEqual(Notification.objects.filter(notification_type='task_assigned').count(), len(self.members))
+
+
+@override_settings(NOTIFICATIONS_INLINE=False)
+class DeadlineScannerTests(TachesTestCase):
+    """Scanner d'échéances : notifications mises en file, une seule fois par franchissement"""
+
+    def test_rescan_creates_no_duplicates(self):
+        now = timezone.now()
+        # Première passe : initialise les points de reprise sans rien notifier
+        deadlines.scan_deadlines(now)
+        self.assertFalse(NotificationEvent.objects.exists())
+
+        later = now + timedelta(days=4)
+        results = deadlines.scan_deadlines(later, batch_size=2)
+        expected = len(self.tasks) * len(self.members)
+        self.assertEqual(results, {
+            'deadline_passed': (len(self.tasks), expected), 'deadline_approaching': (len(self.tasks), expected),
+        })
+        # Événements passés par la file, comme ceux des vues
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(notifications.process_all(), 2 * expected)
+
+        self.assertEqual(deadlines.scan_deadlines(later), {'deadline_passed': (0, 0), 'deadline_approaching': (0, 0)})
+        self.assertEqual(notifications.process_all(), 0)
+        for member in self.members:
+            for kind in ('deadline_passed', 'deadline_approaching'):
+                self.assertEqual(
+                    Notification.objects.filter(user=member, notification_type=kind).count(), len(self.tasks)
+                )
+
+
+class MyTasksCounterTests(TachesTestCase):
+    """my_tasks : total du compteur égal au nombre de tâches assignées visibles listées"""
+
+    def test_counter_matches_list(self):
+        head = User.objects.create_user(
+            'responsable-libre@example.com', 'secret', role='responsable_section', department=self.department
+        )
+        coordinator = User.objects.create_user(
+            'coordinateur@example.com', 'secret', role='coordinateur', department=self.department
+        )
+        self.create_task('Terminée', is_completed=True, status='done')
+        for task in self.tasks[:2]:
+            task.assigned_to.add(head, coordinator)
+        for user, expected in ((self.members[0], 4), (coordinator, 2), (head, 0), (self.director, 0)):
+            with self.subTest(user.role):
+                self.client.force_authenticate(user)
+                response = self.client.get('/api/tasks/my_tasks/')
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertEqual(len(response.data['results']), expected)
+                self.assertEqual(response.data['count'], expected)
+                self.assertEqual(response.data['stats']['total'], expected)
+
+
+class TaskDecimalSerializer(TaskListSerializer):
+    completion_ratio = serializers.DecimalField(
+        source='completion_percentage', max_digits=5, decimal_places=2, read_only=True
+    )
+
+    class Meta(TaskListSerializer.Meta):
+        fields = TaskListSerializer.Meta.fields + ['completion_ratio']
+
+
+class CompiledSerializerParityTests(TachesTestCase):
+    """CompiledListSerializer : sortie identique, octet pour octet, à celle de DRF"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        today = timezone.now().date()
+        # Clés étrangères nulles, M2M vides, dates et pourcentages variés
+        cls.bare_project = Project.objects.create(
+            name='Sans auteur', code='NULL', description='', department=cls.department,
+            start_date=today, end_date=today + timedelta(days=1)
+        )
+        cls.bare_project.coordinators.add(cls.director)
+        Task.objects.create(
+            title='Orpheline', description='', project=cls.bare_project,
+            due_date=timezone.now() - timedelta(days=2), completion_percentage=33
+        )
+        cls.create_task('Terminée', is_completed=True, status='done')
+        Notification.objects.create(
+            user=cls.members[0], notification_type='task_assigned', title='Tâche', message='Message',
+            task=cls.tasks[0], project=cls.project
+        )
+        Notification.objects.create(
+            user=cls.members[0], notification_type='project_created', title='Libre', message='', is_read=True
+        )
+
+    def assertParity(self, serializer_class, queryset, **kwargs):
+        instances = list(queryset)
+        compiled = serializer_class(instances, many=True, **kwargs).data
+        drf = [serializer_class(instance, **kwargs).data for instance in instances]
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(compiled).decode(), renderer.render(drf).decode())
+
+    def test_tasks(self):
+        self.assertParity(TaskDecimalSerializer, Task.objects.order_by('id'))
+        self.assertParity(
+            TaskListSerializer, Task.objects.order_by('id'), fields=['id', 'due_date'], expand=['project_details']
+        )
+
+    def test_projects(self):
+        self.assertParity(ProjectListSerializer, Project.objects.order_by('id'))
+
+    def test_notifications(self):
+        self.assertParity(NotificationSerializer, Notification.objects.order_by('id'))
+
+
+class TaskBulkTests(TachesTestCase):
+    """Import en lot : limite de taille, erreurs par élément, visibilité, dénormalisations"""
+
+    def item(self, title, **kwargs):
+        return {
+            'title': title, 'description': 'Description', 'project': self.project.pk,
+            'due_date': (timezone.now() + timedelta(days=2)).isoformat(), **kwargs
+        }
+
+    def bulk(self, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/tasks/bulk/', {'tasks': items}, format='json')
+
+    def test_size_cap(self):
+        response = self.bulk([self.item(f'Tâche {index}') for index in range(501)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], '500 tâches au maximum par lot')
+        self.assertEqual(Task.objects.count(), len(self.tasks))
+
+    def test_partial_validation_errors(self):
+        response = self.bulk([
+            self.item('Valide'),
+            {'description': 'Sans titre', 'project': self.project.pk},
+            {'id': self.tasks[0].pk, 'priority': 'inconnue'},
+            {'id': self.tasks[1].pk, 'title': 'Renommée'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('title', errors[1])
+        self.assertIn('priority', errors[2])
+        self.assertEqual(errors[3], {})
+        # Lot refusé en entier
+        self.assertEqual(Task.objects.count(), len(self.tasks))
+        self.assertFalse(Task.objects.filter(title='Renommée').exists())
+
+    def test_per_item_visibility(self):
+        other_department = Department.objects.create(name='Ressources humaines', code='RH')
+        coordinator = User.objects.create_user(
+            'coordinateur@example.com', 'secret', role='coordinateur', department=other_department
+        )
+        self.client.force_authenticate(coordinator)
+        response = self.bulk([self.item('Nouvelle'), {'id': self.tasks[0].pk, 'title': 'Détournée'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [{}, {'id': ['Tâche introuvable']}])
+        self.assertFalse(Task.objects.filter(title='Détournée').exists())
+
+    def test_denormalized_state(self):
+        for member in self.members:
+            UserTaskCounter.for_user(member)
+        members = [member.pk for member in self.members]
+        assigned = TaskEvent.objects.filter(task=self.tasks[0], event_type='assigned').count()
+        response = self.bulk([
+            self.item('Créée', assigned_to=members[:2]),
+            self.item('Créée terminée', assigned_to=members[2:], status='done', is_completed=True),
+            self.item('Créée en retard', due_date=(timezone.now() - timedelta(days=1)).isoformat()),
+            {'id': self.tasks[0].pk, 'status': 'done', 'is_completed': True, 'assigned_to': members[:1]},
+            {'id': self.tasks[1].pk, 'status': 'in_progress'},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['data']['created']), 3)
+        self.assertEqual(len(response.data['data']['updated']), 2)
+
+        self.assertCountersMatch()
+        self.assertRollupsMatch()
+        created = Task.objects.filter(title__startswith='Créée')
+        events = set(TaskEvent.objects.values_list('task__title', 'event_type', 'assignee'))
+        self.assertLessEqual({
+            ('Créée', 'created', None), ('Créée', 'assigned', members[0]), ('Créée', 'assigned', members[1]),
+            ('Créée terminée', 'completed', None), ('Créée en retard', 'created', None),
+            (self.tasks[0].title, 'completed', None), (self.tasks[1].title, 'status_changed', None),
+        }, events)
+        # Réassignation à un assigné existant : ni événement ni notification
+        self.assertEqual(TaskEvent.objects.filter(task=self.tasks[0], event_type='assigned').count(), assigned)
+        self.assertEqual(
+            sorted(NotificationEvent.objects.values_list('task', flat=True)),
+            sorted(created.exclude(assigned_to=None).values_list('pk', flat=True)),
+        )
+        self.assertEqual(set(self.tasks[0].assigned_to.values_list('pk', flat=True)), {members[0]})
+
+
+class CounterParityTests(TachesTestCase):
+    """Compteurs de projets et d'assignés : égaux à un recomptage après chaque type d'écriture"""
+
+    def setUp(self):
+        super().setUp()
+        today = timezone.now().date()
+        self.other_project = Project.objects.create(
+            name='Intranet', code='INTRA', description='Intranet', department=self.department,
+            start_date=today, end_date=today + timedelta(days=30), created_by=self.director
+        )
+        for member in self.members:
+            UserTaskCounter.for_user(member)
+
+    def step(self, label, write):
+        with self.subTest(label):
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            self.assertCountersMatch()
+
+    def test_writes(self):
+        task = self.tasks[0]
+
+        def change_status():
+            task.status = 'review'
+            task.save()
+
+        def complete():
+            task.is_completed = True
+            task.save()
+
+        def move():
+            task.project = self.other_project
+            task.save()
+
+        self.step('création', lambda: self.create_task('Nouvelle', status='blocked'))
+        self.step('changement de statut', change_status)
+        self.step('achèvement', complete)
+        self.step('déplacement', move)
+        self.step('réassignation', lambda: self.tasks[1].assigned_to.set(self.members[:1]))
+        self.step('retrait', lambda: self.tasks[1].assigned_to.remove(self.members[0]))
+        self.step('update() du statut', lambda: Task.objects.filter(project=self.project).update(status='in_progress'))
+        self.step('update() du projet', lambda: Task.objects.filter(pk=self.tasks[2].pk).update(project=self.other_project))
+        self.step('suppression', lambda: Task.objects.get(pk=self.tasks[1].pk).delete())
+        self.step('delete()', lambda: Task.objects.filter(project=self.other_project).delete())
+
+    def test_untracked_save_skips_counters(self):
+        task = Task.objects.get(pk=self.tasks[0].pk)
+        task.title = 'Renommée'
+        with CaptureQueriesContext(connection) as context:
+            task.save()
+        self.assertFalse([query for query in context.captured_queries if 'projecttaskcounter' in query['sql']])
+
+
+class KanbanEndpointTests(TachesTestCase):
+    """Tableau Kanban : cartes limitées par colonne, « voir plus » par curseur sur une colonne"""
+
+    def setUp(self):
+        super().setUp()
+        for index in range(4):
+            self.create_task(f'À faire {index}')
+        self.create_task('En revue', status='review')
+        self.create_task('Terminée', status='done', is_completed=True)
+        self.url = f'/api/projects/{self.project.pk}/kanban/'
+
+    def column_ids(self, column):
+        return list(
+            Task.objects.filter(Task.kanban_column_filter(column), project=self.project)
+            .order_by(*Task.KANBAN_ORDERING).values_list('pk', flat=True)
+        )
+
+    def test_columns_limited(self):
+        response = self.client.get(f'{self.url}?limit=2')
+        self.assertEqual(response.status_code, 200, response.content)
+        data, columns = response.data['data'], response.data['columns']
+        self.assertEqual(list(data), Task.KANBAN_COLUMNS)
+        for column in Task.KANBAN_COLUMNS:
+            expected = self.column_ids(column)
+            self.assertEqual([task['id'] for task in data[column]], expected[:2], column)
+            self.assertEqual(columns[column]['count'], len(expected), column)
+            self.assertEqual(columns[column]['next'] is not None, len(expected) > 2, column)
+
+    def test_column_cursor(self):
+        seen = []
+        url = f'{self.url}?column=todo&limit=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(list(response.data['data']), ['todo'])
+            self.assertNotIn('count', response.data['columns']['todo'])
+            seen.extend(task['id'] for task in response.data['data']['todo'])
+            cursor = response.data['columns']['todo']['next']
+            url = cursor and f'{self.url}?column=todo&limit=3&cursor={cursor}'
+        self.assertEqual(seen, self.column_ids('todo'))
+
+    def test_invalid_column_and_cursor(self):
+        self.assertEqual(self.client.get(f'{self.url}?column=archive').status_code, 400)
+        response = self.client.get(f'{self.url}?column=todo&cursor=invalide')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'error')
+
+
+class TimelineEndpointTests(TachesTestCase):
+    """Timeline d'un projet : fenêtre ?from=&to= et réponse envoyée en flux"""
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/projects/{self.project.pk}/timeline/'
+        self.today = timezone.localdate()
+        now = timezone.now()
+        self.past = self.create_task('Passée', start_date=now - timedelta(days=20), due_date=now - timedelta(days=10))
+        self.future = self.create_task('Future', start_date=now + timedelta(days=20), due_date=now + timedelta(days=25))
+
+    def get_timeline(self, query=''):
+        response = self.client.get(f'{self.url}{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(body['status'], 'success')
+        return body['data']
+
+    def test_full_timeline(self):
+        data = self.get_timeline()
+        expected = Task.objects.filter(project=self.project).order_by('due_date', 'id')
+        self.assertEqual([item['id'] for item in data], [task.pk for task in expected])
+        self.assertEqual(
+            sorted(data[0]['assigned_to']), sorted(f'{user.first_name} {user.last_name}' for user in self.members)
+        )
+
+    def test_window(self):
+        ids = {item['id'] for item in self.get_timeline(f'?from={self.today}&to={self.today + timedelta(days=7)}')}
+        self.assertEqual(ids, {task.pk for task in self.tasks})
+        # Chevauchement : une tâche commencée avant la fenêtre et finissant dedans est incluse
+        ids = {
+            item['id']
+            for item in self.get_timeline(f'?from={self.today - timedelta(days=12)}&to={self.today - timedelta(days=5)}')
+        }
+        self.assertEqual(ids, {self.past.pk})
+        ids = {item['id'] for item in self.get_timeline(f'?from={self.today + timedelta(days=22)}')}
+        self.assertEqual(ids, {self.future.pk})
+
+    def test_invalid_bound(self):
+        response = self.client.get(f'{self.url}?from=hier')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'error')
+
+
+class ProjectStatsEndpointTests(TachesTestCase):
+    """Statistiques des projets : une agrégation, cache par périmètre invalidé par les écritures"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_department = Department.objects.create(name='Ressources humaines', code='RH')
+        today = timezone.localdate()
+        for index, (project_status, department) in enumerate([
+            ('active', cls.department), ('completed', cls.department), ('active', cls.other_department),
+        ]):
+            Project.objects.create(
+                name=f'Projet {index}', code=f'P{index}', description='', department=department,
+                status=project_status, priority=index + 1, start_date=today, end_date=today + timedelta(days=index + 2)
+            )
+        cls.coordinator = User.objects.create_user(
+            'coordinateur@example.com', 'secret', role='coordinateur', department=cls.department
+        )
+
+    def expected(self, projects):
+        return {
+            'total': projects.count(),
+            'active': projects.filter(status='active').count(),
+            'completed': projects.filter(status='completed').count(),
+            'by_status': sorted(
+                ({'status': row['status'], 'count': row['count']}
+                 for row in projects.values('status').annotate(count=Count('id'))),
+                key=lambda row: [key for key, _ in Project.STATUS_CHOICES].index(row['status'])
+            ),
+        }
+
+    def summary(self, data):
+        return {key: data[key] for key in ('total', 'active', 'completed', 'by_status')}
+
+    def test_stats_cached_and_invalidated(self):
+        response = self.client.get('/api/projects/stats/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.summary(response.data['data']), self.expected(Project.objects.all()))
+        self.assertEqual(
+            [project['code'] for project in response.data['data']['upcoming_deadlines']], ['P0', 'P1', 'P2']
+        )
+        self.assertEqual(self.count_queries('get', '/api/projects/stats/'), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.get(code='P0').delete()
+        response = self.client.get('/api/projects/stats/')
+        self.assertEqual(self.summary(response.data['data']), self.expected(Project.objects.all()))
+
+    def test_scoped_stats(self):
+        self.assertNotEqual(
+            project_stats_key(visibility_scope(self.coordinator)), project_stats_key(visibility_scope(self.director))
+        )
+        visible = visible_projects(Project.objects.all(), self.coordinator)
+        self.assertEqual(self.summary(ProjectViewSet().compute_stats(visible)), self.expected(visible))
+        self.assertEqual(visible.count(), Project.objects.filter(department=self.department).count())
+
+    def test_director_only(self):
+        self.client.force_authenticate(self.coordinator)
+        self.assertEqual(self.client.get('/api/projects/stats/').status_code, 403)
+
+
+class SparseFieldsEndpointTests(TachesTestCase):
+    """?fields= et ?expand= : forme des réponses et colonnes ou relations chargées"""
+
+    def get_results(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results'], ' '.join(query['sql'] for query in context.captured_queries)
+
+    def test_task_fields(self):
+        results, sql = self.get_results('/api/tasks/?fields=id,title,status')
+        self.assertEqual(len(results), 3)
+        for task in results:
+            self.assertEqual(set(task), {'id', 'title', 'status'})
+        self.assertNotIn('taches_task_assigned_to', sql)
+        self.assertNotIn('"taches_task"."description"', sql)
+        self.assertNotIn('utilisateurs_user', sql)
+
+    def test_task_expand(self):
+        results, sql = self.get_results('/api/tasks/?fields=id&expand=project_details')
+        for task in results:
+            self.assertEqual(set(task), {'id', 'project_details'})
+            self.assertEqual(task['project_details']['code'], self.project.code)
+        self.assertNotIn('taches_task_assigned_to', sql)
+
+        results, _ = self.get_results('/api/tasks/')
+        self.assertNotIn('project_details', results[0])
+        self.assertIn('assigned_to_list', results[0])
+
+    def test_project_fields(self):
+        results, sql = self.get_results('/api/projects/?fields=id,code,progress')
+        self.assertEqual(
+            results, [{'id': self.project.pk, 'code': self.project.code, 'progress': self.project.get_progress()}]
+        )
+        self.assertNotIn('taches_project_coordinators', sql)
+
+        results, _ = self.get_results('/api/projects/?fields=id&expand=created_by_details')
+        self.assertEqual(results[0]['created_by_details']['id'], self.director.pk)
+
+
+class DeadlineFeedEndpointTests(TachesTestCase):
+    """Flux overdue / upcoming : tâches ouvertes visibles, curseur sur (due_date, id), périmètre"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.late = [
+            cls.create_task(f'En retard {index}', due_date=now - timedelta(days=index + 1)) for index in range(4)
+        ]
+        cls.create_task('Terminée en retard', due_date=now - timedelta(days=2), status='done', is_completed=True)
+        cls.other_department = Department.objects.create(name='Ressources humaines', code='RH')
+        cls.other_project = Project.objects.create(
+            name='Paie', code='PAIE', description='', department=cls.other_department,
+            start_date=now.date(), end_date=now.date(), created_by=cls.director
+        )
+        cls.other_late = [
+            Task.objects.create(
+                title=f'Paie {index}', description='', project=cls.other_project,
+                due_date=now - timedelta(hours=index + 1), created_by=cls.director
+            )
+            for index in range(2)
+        ]
+
+    def get_feed(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids.extend(task['id'] for task in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def expected(self, tasks):
+        return [task.pk for task in sorted(tasks, key=lambda task: (task.due_date, task.pk))]
+
+    def test_overdue(self):
+        self.assertEqual(self.get_feed('/api/tasks/overdue/?page_size=2'), self.expected(self.late + self.other_late))
+        self.assertEqual(
+            self.get_feed(f'/api/tasks/overdue/?page_size=2&project={self.project.pk}'), self.expected(self.late)
+        )
+        self.assertEqual(
+            self.get_feed(f'/api/tasks/overdue/?department={self.other_department.pk}'),
+            self.expected(self.other_late)
+        )
+
+    def test_upcoming(self):
+        self.assertEqual(self.get_feed('/api/tasks/upcoming/?page_size=1'), self.expected(self.tasks))
+
+    def test_member_scope(self):
+        self.client.force_authenticate(self.members[0])
+        self.assertEqual(self.get_feed('/api/tasks/overdue/?page_size=3'), self.expected(self.late))
+
+    def test_invalid_scope(self):
+        response = self.client.get('/api/tasks/overdue/?project=portail')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'error')
+
+
+class GlobalSearchEndpointTests(TachesTestCase):
+    """Recherche unifiée : résultats typés, préfixe, visibilité du rôle"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        today = timezone.localdate()
+        cls.hidden_project = Project.objects.create(
+            name='Orion caché', code='ORH', description='', department=Department.objects.create(name='RH', code='RH'),
+            start_date=today, end_date=today, created_by=cls.director
+        )
+        cls.visible_task = cls.create_task('Orion visible')
+        cls.hidden_task = Task.objects.create(
+            title='Orion confidentiel', description='', project=cls.hidden_project, due_date=timezone.now(),
+            created_by=cls.director
+        )
+        cls.visible_comment = TaskComment.objects.create(task=cls.visible_task, user=cls.director, comment='Orion ok')
+        cls.hidden_comment = TaskComment.objects.create(task=cls.hidden_task, user=cls.director, comment='Orion secret')
+        cls.orion_user = User.objects.create_user(
+            'orion@example.com', 'secret', first_name='Orionne', last_name='Lune', role='membre'
+        )
+
+    def search_results(self, query):
+        response = self.client.get(f'/api/search/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return {(item['type'], item['id']) for item in response.data['data']}
+
+    def test_director_sees_every_type(self):
+        self.assertEqual(self.search_results('q=orio&limit=10'), {
+            ('user', self.orion_user.pk),
+            ('project', self.hidden_project.pk),
+            ('task', self.visible_task.pk), ('task', self.hidden_task.pk),
+            ('comment', self.visible_comment.pk), ('comment', self.hidden_comment.pk),
+        })
+        self.assertEqual(self.search_results('q=orio&types=task'), {
+            ('task', self.visible_task.pk), ('task', self.hidden_task.pk),
+        })
+
+    def test_member_visibility(self):
+        self.client.force_authenticate(self.members[0])
+        self.assertEqual(self.search_results('q=orio&limit=10'), {
+            ('task', self.visible_task.pk), ('comment', self.visible_comment.pk),
+        })
+        self.assertEqual(self.search_results('q=portail'), {('project', self.project.pk)})
+
+    def test_query_too_short(self):
+        response = self.client.get('/api/search/?q=o')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'error')
+
+
+class TaskEventActorTests(TachesTestCase):
+    """Journal TaskEvent : transitions attribuées à l'utilisateur de la requête"""
+
+    def events(self, task, **kwargs):
+        return list(
+            TaskEvent.objects.filter(task=task, **kwargs).order_by('id').values_list('event_type', 'user_id')
+        )
+
+    def test_status_action(self):
+        task = self.tasks[0]
+        self.client.force_authenticate(self.members[0])
+        response = self.client.put(f'/api/tasks/{task.pk}/status/', {'status': 'done'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            self.events(task, event_type__in=['status_changed', 'completed']),
+            [('status_changed', self.members[0].pk), ('completed', self.members[0].pk)]
+        )
+
+    def test_update_and_create(self):
+        task = self.tasks[1]
+        self.client.force_authenticate(self.members[1])
+        response = self.client.patch(f'/api/tasks/{task.pk}/', {'status': 'review'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.events(task, event_type='status_changed'), [('status_changed', self.members[1].pk)])
+
+        self.client.force_authenticate(self.members[2])
+        response = self.client.post('/api/tasks/', {
+            'title': 'Nouvelle', 'description': 'Description', 'project': self.project.pk,
+            'assigned_to': [self.members[0].pk], 'due_date': timezone.now() + timedelta(days=2),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        created = Task.objects.get(title='Nouvelle')
+        self.assertEqual(self.events(created), [('created', self.members[2].pk), ('assigned', self.members[2].pk)])
+
+    def test_actor_reset_after_request(self):
+        self.client.force_authenticate(self.members[0])
+        self.client.put(f'/api/tasks/{self.tasks[0].pk}/status/', {'status': 'review'}, format='json')
+        task = Task.objects.get(pk=self.tasks[2].pk)
+        task.status = 'blocked'
+        task.save()
+        self.assertEqual(self.events(task, event_type='status_changed'), [('status_changed', None)])
+
+
+class ChartRangeEndpointTests(TachesTestCase):
+    """Graphiques du tableau de bord : ?range= et ?granularity=, séries créées / terminées indépendantes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.today = timezone.localdate()
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() - timedelta(days=40)):
+            cls.old_task = cls.create_task('Ancienne')
+        cls.old_task.status = 'done'
+        cls.old_task.is_completed = True
+        cls.old_task.save()
+
+    def get_timeline(self, query=''):
+        response = self.client.get(f'/api/dashboard/charts/{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['data']['tasks_timeline']
+
+    def test_default_range(self):
+        timeline = self.get_timeline()
+        self.assertEqual(len(timeline), 30)
+        self.assertEqual(timeline[-1]['start'], self.today)
+        self.assertEqual(timeline[-1]['date'], self.today.strftime('%d/%m'))
+        # Tâche créée avant la période : absente des créées, terminée aujourd'hui
+        self.assertEqual(sum(point['created'] for point in timeline), 3)
+        self.assertEqual(timeline[-1]['completed'], 1)
+        self.assertEqual(timeline[0]['open'], 1)
+        self.assertEqual(timeline[-1]['open'], 3)
+
+    def test_monthly_range(self):
+        timeline = self.get_timeline('?range=12m&granularity=month')
+        self.assertEqual(len(timeline), 12)
+        self.assertEqual(timeline[-1]['start'], self.today.replace(day=1))
+        self.assertEqual(timeline[-1]['date'], self.today.strftime('%m/%Y'))
+        self.assertEqual(sum(point['created'] for point in timeline), Task.objects.count())
+        self.assertEqual(sum(point['completed'] for point in timeline), 1)
+
+    def test_queries_independent_of_range(self):
+        queries = self.count_queries('get', '/api/dashboard/charts/?range=7d')
+        self.assertEqual(self.count_queries('get', '/api/dashboard/charts/?range=52w&granularity=week'), queries)
+        self.assertEqual(self.count_queries('get', '/api/dashboard/charts/?range=365d'), queries)
+
+    def test_invalid_period(self):
+        for query in ('?range=trente', '?granularity=hour', '?range=1000d'):
+            response = self.client.get(f'/api/dashboard/charts/{query}')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertEqual(response.data['status'], 'error')
+
+
+class ActivityFeedEndpointTests(TachesTestCase):
+    """Flux d'activité : fusion UNION ALL des périmètres, curseur sur (created_at, id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        # Fins de tâches à la même date : le curseur départage par id
+        with mock.patch('django.utils.timezone.now', return_value=now - timedelta(hours=1)):
+            for task in cls.tasks + [cls.create_task(f'Terminée {index}') for index in range(3)]:
+                task.status = 'done'
+                task.is_completed = True
+                task.save()
+        unassigned = Task.objects.create(
+            title='Sans assigné', description='', project=cls.project, due_date=now, created_by=cls.director
+        )
+        unassigned.is_completed = True
+        unassigned.save()
+        for index, user in enumerate([cls.members[0], cls.members[0], cls.members[1]]):
+            Notification.objects.create(
+                user=user, notification_type='task_assigned', title=f'Notification {index}', message=''
+            )
+
+    def get_feed(self, limit):
+        ids, url = [], f'/api/dashboard/activities/?limit={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids.extend(entry['id'] for entry in response.data['data'])
+            url = response.data['next']
+        return ids
+
+    def expected(self, user):
+        return list(
+            ActivityFeedEntry.objects.filter(scope__in=activity.scopes_for(user))
+            .order_by(*activity.ORDERING).values_list('pk', flat=True)
+        )
+
+    def test_member_feed(self):
+        self.client.force_authenticate(self.members[0])
+        expected = self.expected(self.members[0])
+        # Projet créé, six tâches terminées assignées, deux notifications
+        self.assertEqual(len(expected), 9)
+        for limit in (1, 2, 4, 50):
+            self.assertEqual(self.get_feed(limit), expected, limit)
+
+    def test_director_feed(self):
+        expected = self.expected(self.director)
+        self.assertEqual(len(expected), 8)
+        self.assertEqual(self.get_feed(3), expected)
+
+    def test_queries_per_page(self):
+        self.client.force_authenticate(self.members[0])
+        first = self.client.get('/api/dashboard/activities/?limit=2')
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(first.data['next'])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertIn('UNION ALL', context.captured_queries[0]['sql'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/dashboard/activities/?cursor=invalide')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['status'], 'error')
+
+
+class RollupParityTests(TachesTestCase):
+    """Agrégats quotidiens après une suite d'écritures réparties sur plusieurs jours"""
+
+    def test_random_writes(self):
+        rng = random.Random(22)
+        other = Project.objects.create(
+            name='Intranet', code='INTRA', description='', department=self.department,
+            start_date=timezone.localdate(), end_date=timezone.localdate(), created_by=self.director
+        )
+        projects = [self.project, other]
+        start = timezone.now()
+        for step in range(80):
+            # Quatre écritures par jour : les variations tombent sur des jours différents
+            now = start + timedelta(days=step // 4, hours=step % 4)
+            with mock.patch('django.utils.timezone.now', return_value=now), \
+                    self.captureOnCommitCallbacks(execute=True):
+                task_ids = list(Task.objects.values_list('pk', flat=True))
+                action = rng.choice(['create', 'create', 'status', 'status', 'move', 'due_date', 'delete'])
+                if action == 'create' or not task_ids:
+                    status = rng.choice(Task.KANBAN_COLUMNS)
+                    Task.objects.create(
+                        title=f'Tâche {step}', description='', project=rng.choice(projects), status=status,
+                        is_completed=status == 'done', due_date=now + timedelta(days=rng.randint(-3, 6)),
+                        created_by=self.director
+                    )
+                    continue
+                task = Task.objects.get(pk=rng.choice(task_ids))
+                if action == 'status':
+                    task.status = rng.choice(Task.KANBAN_COLUMNS)
+                    task.is_completed = task.status == 'done'
+                elif action == 'move':
+                    task.project = other if task.project_id == self.project.pk else self.project
+                elif action == 'due_date':
+                    task.due_date = now + timedelta(days=rng.randint(-3, 6))
+                else:
+                    task.delete()
+                    continue
+                task.save()
+
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            today = timezone.localdate()
+            for days in range(8):
+                self.assertRollupsMatch(today + timedelta(days=days))
+            # Reconstruction depuis le journal : mêmes niveaux
+            call_command('rebuild_task_rollups', stdout=StringIO())
+            for days in range(8):
+                self.assertRollupsMatch(today + timedelta(days=days))
+
+
+class CountModeTests(TachesTestCase):
+    """Pagination par numéro de page : forme de la réponse et requêtes selon count_mode"""
+
+    def get_page(self, query):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/tasks/?page_size=2&{query}')
+        counts = [query for query in context.captured_queries if 'COUNT(' in query['sql'].upper()]
+        return response, counts
+
+    def test_exact(self):
+        response, counts = self.get_page('count_mode=exact')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['count'], 3)
+        self.assertNotIn('count_estimated', response.data)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(counts), 1)
+
+    def test_estimate_below_threshold(self):
+        response, counts = self.get_page('count_mode=estimate')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['count'], 3)
+        self.assertIs(response.data['count_estimated'], False)
+        self.assertEqual(len(counts), 1)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Estimation lue dans sqlite_stat1')
+    def test_estimate_above_threshold(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = EstimatedCountPaginator(Task.objects.order_by('id'), 2, threshold=1)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.count_estimated)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in context.captured_queries))
+
+    def test_none(self):
+        response, counts = self.get_page('count_mode=none')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn('count', response.data)
+        self.assertIs(response.data['has_next'], True)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(counts, [])
+
+        response, counts = self.get_page('count_mode=none&page=2')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIs(response.data['has_next'], False)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(counts, [])
+
+    def test_none_rejects_last_page(self):
+        response, counts = self.get_page('count_mode=none&page=last')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(counts, [])
+        response, counts = self.get_page('count_mode=exact&page=last')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+@skipUnless(search.get_backend(connection), 'Pas de moteur plein texte')
+class SearchIndexTests(TachesTestCase):
+    """Index plein texte : écritures en masse et suppressions, index GIN déclaré dans Meta.indexes"""
+
+    def found(self, model, text):
+        backend = search.get_backend(connection)
+        return set(backend.search(model.objects.all(), search.get_spec(model), text).values_list('pk', flat=True))
+
+    def test_comment_bulk_writes(self):
+        comments = TaskComment.objects.bulk_create([
+            TaskComment(task=task, user=self.director, comment='Relecture du cahier') for task in self.tasks
+        ])
+        self.assertEqual(self.found(TaskComment, 'relecture'), {comment.pk for comment in comments})
+        TaskComment.objects.filter(pk=comments[0].pk).update(comment='Validation finale')
+        self.assertEqual(self.found(TaskComment, 'validation'), {comments[0].pk})
+        TaskComment.objects.bulk_update(comments[1:], ['comment'])
+        self.assertEqual(self.found(TaskComment, 'relecture'), {comment.pk for comment in comments[1:]})
+
+    def test_user_update(self):
+        User.objects.filter(pk=self.members[0].pk).update(last_name='Zorglub')
+        self.assertEqual(self.found(User, 'zorglub'), {self.members[0].pk})
+
+    @skipUnless(connection.vendor == 'sqlite', 'Table FTS5')
+    def test_queryset_delete(self):
+        TaskComment.objects.bulk_create([
+            TaskComment(task=task, user=self.director, comment='Relecture') for task in self.tasks
+        ])
+        Task.objects.filter(pk__in=[task.pk for task in self.tasks[:2]]).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {search.get_spec(TaskComment).index_table}')
+            indexed = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(indexed, set(TaskComment.objects.values_list('pk', flat=True)))
+        self.assertEqual(len(indexed), 1)
+
+    def test_gin_index_declared(self):
+        for spec in search.registered_specs():
+            with self.subTest(spec.model._meta.label):
+                index = next(index for index in spec.model._meta.indexes if index.name == spec.index_table)
+                self.assertIsInstance(index, search.SearchIndex)
+                vector, = index.expressions
+                self.assertEqual([expression.name for expression in vector.source_expressions], list(spec.fields))
+
+
+@skipUnless(connection.vendor in query_plans.VENDORS, 'EXPLAIN non pris en charge')
+class QueryPlanTests(TestCase):
+    """Requêtes fréquentes : index attendu, ni parcours complet ni tri temporaire (EXPLAIN)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reference = query_plans.seed(1000, random.Random(0))
+
+    def test_plans_use_indexes(self):
+        for label, queryset, index in query_plans.checks(*self.reference):
+            with self.subTest(label):
+                details, problems = query_plans.explain(queryset, index)
+                self.assertEqual(problems, [], '\n'.join(details))
+
+    def test_regression_detected(self):
+        _, problems = query_plans.explain(Task.objects.order_by('title'), 'task_board_idx')
+        self.assertIn('index task_board_idx inutilisé', problems)
+        self.assertTrue({'parcours complet', 'tri temporaire'} & set(problems))
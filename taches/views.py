@@ -24,30 +24,53 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, F, Count, Sum, Avg, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 from datetime import timedelta
-from .models import Project, Task, TaskComment, TaskAttachment, Notification
+from utilisateurs.models import User
+from .models import (
+    Project, Task, TaskComment, TaskAttachment, Notification, UserTaskCounter
+)
+from .caching import project_stats_key
+from .bulk import bulk_write_tasks
+from .events import TaskEventActorMixin
+from .kanban import apply_moves
+from .notifications import notify, notify_many
+from .visibility import sees_assigned_tasks, visibility_scope, visible_projects, visible_tasks
 from .serializers import (
     ProjectListSerializer, ProjectDetailSerializer, ProjectCreateUpdateSerializer,
     TaskListSerializer, TaskDetailSerializer, TaskCreateUpdateSerializer,
-    TaskStatusUpdateSerializer, TaskCommentSerializer, TaskAttachmentSerializer,
-    NotificationSerializer
+    TaskBulkSerializer, TaskStatusUpdateSerializer, TaskMoveSerializer, TaskCommentSerializer,
+    TaskEventSerializer, TaskAttachmentSerializer, NotificationSerializer
 )
 from api.permissions import (
     IsDirector, IsCoordinator, IsDepartmentHead,
     IsSectionHead, CanCreateProject, CanValidateTask
 )
-from core.pagination import StandardResultsSetPagination
-from core.mixins import ActivityLoggerMixin
+from core.pagination import StandardResultsSetPagination, CursorResultsSetPagination, encode_cursor, decode_cursor, keyset_filter
+from core.caching import get_or_set, register_counter
+from core.mixins import ActivityLoggerMixin, CachedResponseMixin, SparseFieldsetMixin
+from core.optimizer import optimize_queryset
+from core.search import FullTextSearchFilter
+from core.streaming import streaming_json_response
+from core.dates import parse_window_bound
 
-class ProjectViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
-    queryset = Project.objects.all().select_related('department', 'created_by')
+class ProjectViewSet(CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet, ActivityLoggerMixin):
+    queryset = Project.objects.all().select_related('department', 'created_by', 'task_counter')
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'priority', 'department']
     search_fields = ['name', 'code', 'description']
     ordering_fields = ['-priority', 'end_date', 'created_at']
+    kanban_page_size = 20
+    kanban_max_page_size = 100
+    timeline_chunk_size = 500
+    stats_cache_timeout = 300
+    stats_cache_name = register_counter('ProjectViewSet.stats')
+    # Kanban : invalidé par toute écriture sur les tâches du projet et par les utilisateurs affichés
+    cache_timeout = 300
+    cache_tags = {'kanban': ['project:{pk}']}
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -68,57 +91,58 @@ class ProjectViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        queryset = super().get_queryset()
-        user = self.request.user
-        
-        if user.role == 'directeur':
-            return queryset
-        elif user.role == 'coordinateur':
-            if user.department:
-                return queryset.filter(
-                    Q(department=user.department) | 
-                    Q(coordinators=user)
-                ).distinct()
-            return queryset.filter(coordinators=user)
-        elif user.role == 'responsable_section' and user.section:
-            return queryset.filter(
-                Q(department=user.department) |
-                Q(tasks__assigned_to=user)
-            ).distinct()
-        elif user.role == 'membre':
-            return queryset.filter(tasks__assigned_to=user).distinct()
-        
-        return queryset.none()
+        # Règles par rôle matérialisées dans l'index de visibilité (voir taches.visibility)
+        return visible_projects(super().get_queryset(), self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Statistiques des projets"""
-        queryset = self.get_queryset()
+        """Statistiques des projets (une agrégation, mise en cache par périmètre de visibilité)"""
+        data = get_or_set(
+            self.stats_cache_name,
+            project_stats_key(visibility_scope(request.user)),
+            lambda: self.compute_stats(self.get_queryset()),
+            self.stats_cache_timeout
+        )
+        return Response({'status': 'success', 'data': data})
+    
+    def compute_stats(self, queryset):
         today = timezone.now().date()
         
-        data = {
-            'total': queryset.count(),
-            'by_status': queryset.values('status').annotate(count=Count('id')),
-            'by_priority': queryset.values('priority').annotate(count=Count('id')),
-            'active': queryset.filter(status='active').count(),
-            'completed': queryset.filter(status='completed').count(),
-            'upcoming_deadlines': ProjectListSerializer(
-                queryset.filter(
-                    end_date__gte=today,
-                    end_date__lte=today + timedelta(days=7)
-                ).order_by('end_date')[:5], many=True
-            ).data,
+        counters = queryset.aggregate(
+            total=Count('id'),
+            **{f'status_{key}': Count('id', filter=Q(status=key)) for key, _ in Project.STATUS_CHOICES},
+            **{f'priority_{key}': Count('id', filter=Q(priority=key)) for key, _ in Project.PRIORITY_CHOICES},
+        )
+        upcoming = queryset.filter(
+            end_date__gte=today,
+            end_date__lte=today + timedelta(days=7)
+        ).prefetch_related(
+            Prefetch('coordinators', queryset=User.objects.select_related('department', 'section', 'poste'))
+        ).order_by('end_date')[:5]
+        
+        return {
+            'total': counters['total'],
+            'by_status': [
+                {'status': key, 'count': counters[f'status_{key}']}
+                for key, _ in Project.STATUS_CHOICES if counters[f'status_{key}']
+            ],
+            'by_priority': [
+                {'priority': key, 'count': counters[f'priority_{key}']}
+                for key, _ in Project.PRIORITY_CHOICES if counters[f'priority_{key}']
+            ],
+            'active': counters['status_active'],
+            'completed': counters['status_completed'],
+            'upcoming_deadlines': list(ProjectListSerializer(upcoming, many=True).data),
         }
-        return Response({'status': 'success', 'data': data})
     
     @action(detail=True, methods=['get'])
     def tasks(self, request, pk=None):
         """Tâches d'un projet"""
         project = self.get_object()
-        tasks = project.tasks.all()
+        tasks = self.optimize_for(project.tasks.all(), TaskListSerializer)
         
         # Filtrer selon les permissions
         if request.user.role == 'membre':
@@ -126,54 +150,125 @@ class ProjectViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
         
         page = self.paginate_queryset(tasks)
         if page is not None:
-            serializer = TaskListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(self.serialize(TaskListSerializer, page, many=True))
         
-        serializer = TaskListSerializer(tasks, many=True)
-        return Response({'status': 'success', 'data': serializer.data})
+        return Response({'status': 'success', 'data': self.serialize(TaskListSerializer, tasks, many=True)})
     
     @action(detail=True, methods=['get'])
     def kanban(self, request, pk=None):
-        """Vue Kanban du projet"""
+        """Vue Kanban du projet (colonnes limitées, « voir plus » par curseur sur une colonne)"""
         project = self.get_object()
         tasks = project.tasks.all()
         
         if request.user.role == 'membre':
             tasks = tasks.filter(assigned_to=request.user)
         
-        kanban_data = {
-            'todo': TaskListSerializer(tasks.filter(status='todo'), many=True).data,
-            'in_progress': TaskListSerializer(tasks.filter(status='in_progress'), many=True).data,
-            'review': TaskListSerializer(tasks.filter(status='review'), many=True).data,
-            'done': TaskListSerializer(tasks.filter(is_completed=True), many=True).data,
-            'blocked': TaskListSerializer(tasks.filter(status='blocked'), many=True).data,
-        }
-        
-        return Response({'status': 'success', 'data': kanban_data})
+        try:
+            limit = int(request.query_params.get('limit', self.kanban_page_size))
+        except ValueError:
+            limit = self.kanban_page_size
+        limit = max(1, min(limit, self.kanban_max_page_size))
+        
+        tasks = tasks.annotate(column=Task.kanban_column_expression()).select_related(
+            'project', 'created_by'
+        ).prefetch_related(
+            Prefetch('assigned_to', queryset=User.objects.select_related('department', 'section', 'poste'))
+        )
+        
+        column = request.query_params.get('column')
+        if column:
+            if column not in Task.KANBAN_COLUMNS:
+                return Response({
+                    'status': 'error',
+                    'message': 'Colonne inconnue'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            tasks = tasks.filter(Task.kanban_column_filter(column)).order_by(*Task.KANBAN_ORDERING)
+            cursor = request.query_params.get('cursor')
+            if cursor:
+                try:
+                    position, _ = decode_cursor(Task, cursor, Task.KANBAN_ORDERING)
+                except ValueError as e:
+                    return Response({
+                        'status': 'error',
+                        'message': str(e)
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                tasks = tasks.filter(keyset_filter(Task.KANBAN_ORDERING, position))
+            
+            cards = {column: list(tasks[:limit + 1])}
+            counts = {}
+        else:
+            # Une seule requête : les limit + 1 premières cartes de chaque colonne
+            tasks = tasks.annotate(
+                row_number=Window(RowNumber(), partition_by=F('column'), order_by=Task.KANBAN_ORDERING),
+                column_count=Window(Count('id'), partition_by=F('column')),
+            ).filter(row_number__lte=limit + 1).order_by(*Task.KANBAN_ORDERING)
+            
+            cards = {name: [] for name in Task.KANBAN_COLUMNS}
+            counts = dict.fromkeys(Task.KANBAN_COLUMNS, 0)
+            for task in tasks:
+                cards[task.column].append(task)
+                counts[task.column] = task.column_count
+        
+        kanban_data = {}
+        columns = {}
+        for name, column_tasks in cards.items():
+            next_cursor = None
+            if len(column_tasks) > limit:
+                column_tasks = column_tasks[:limit]
+                next_cursor = encode_cursor(column_tasks[-1], Task.KANBAN_ORDERING)
+            kanban_data[name] = TaskListSerializer(column_tasks, many=True).data
+            columns[name] = {'next': next_cursor}
+            if name in counts:
+                columns[name]['count'] = counts[name]
+        
+        return Response({'status': 'success', 'data': kanban_data, 'columns': columns})
     
     @action(detail=True, methods=['get'])
     def timeline(self, request, pk=None):
-        """Timeline du projet"""
+        """Timeline du projet, restreinte à la fenêtre ?from=&to= et envoyée en flux"""
         project = self.get_object()
-        tasks = project.tasks.all().order_by('due_date')
+        tasks = project.tasks.all().order_by('due_date', 'id')
+        
+        try:
+            window_start = parse_window_bound(request.query_params.get('from'))
+            window_end = parse_window_bound(request.query_params.get('to'), end=True)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Tâches chevauchant la fenêtre
+        if window_start:
+            tasks = tasks.filter(due_date__gte=window_start)
+        if window_end:
+            tasks = tasks.filter(start_date__lte=window_end)
+        
+        tasks = tasks.only('id', 'project', 'title', 'start_date', 'due_date', 'status').prefetch_related(
+            Prefetch('assigned_to', queryset=User.objects.only('id', 'first_name', 'last_name'))
+        )
         
-        timeline_data = []
-        for task in tasks:
-            timeline_data.append({
+        timeline_data = (
+            {
                 'id': task.id,
                 'title': task.title,
                 'start': task.start_date,
                 'end': task.due_date,
                 'status': task.status,
                 'assigned_to': [f"{u.first_name} {u.last_name}" for u in task.assigned_to.all()]
-            })
+            }
+            for task in tasks.iterator(chunk_size=self.timeline_chunk_size)
+        )
         
-        return Response({'status': 'success', 'data': timeline_data})
+        return streaming_json_response(timeline_data)
 
-class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
+class TaskViewSet(TaskEventActorMixin, SparseFieldsetMixin, viewsets.ModelViewSet, ActivityLoggerMixin):
     queryset = Task.objects.all().select_related('project', 'created_by')
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    deadline_pagination_class = CursorResultsSetPagination
+    bulk_max_size = 500
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'priority', 'complexity', 'is_completed', 'project']
     search_fields = ['title', 'description']
     ordering_fields = ['-priority', 'due_date', 'created_at']
@@ -186,57 +281,108 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
         return TaskDetailSerializer
     
     def get_queryset(self):
-        queryset = super().get_queryset()
-        user = self.request.user
-        
-        if user.role == 'directeur':
-            return queryset
-        elif user.role == 'coordinateur':
-            if user.department:
-                return queryset.filter(
-                    Q(project__department=user.department) |
-                    Q(assigned_to=user)
-                ).distinct()
-            return queryset.filter(assigned_to=user)
-        elif user.role == 'responsable_section' and user.section:
-            return queryset.filter(
-                Q(assigned_to__section=user.section) |
-                Q(assigned_to=user)
-            ).distinct()
-        elif user.role == 'membre':
-            return queryset.filter(assigned_to=user)
-        
-        return queryset.none()
+        return visible_tasks(super().get_queryset(), self.request.user)
+    
+    def task_detail(self, task):
+        """Réponse TaskDetailSerializer des actions d'écriture : tâche relue avec ses relations"""
+        task = self.optimize_for(Task.objects.filter(pk=task.pk), TaskDetailSerializer).get()
+        return self.serialize(TaskDetailSerializer, task)
     
     def perform_create(self, serializer):
         task = serializer.save(created_by=self.request.user)
         
-        # Créer des notifications pour les assignés
-        from .models import Notification
-        for user in task.assigned_to.all():
-            Notification.objects.create(
-                user=user,
-                notification_type='task_assigned',
-                title=f'Nouvelle tâche: {task.title}',
-                message=f'Vous avez été assigné à la tâche "{task.title}" dans le projet {task.project.name}',
-                task=task,
-                project=task.project
+        # Notifier les assignés (mis en file, écrits par le worker)
+        notify(
+            'task_assigned',
+            f'Nouvelle tâche: {task.title}',
+            f'Vous avez été assigné à la tâche "{task.title}" dans le projet {task.project.name}',
+            task.assigned_to.values_list('id', flat=True),
+            task=task,
+            project=task.project
+        )
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Création / mise à jour en lot : {"tasks": [...]}.
+        Un élément sans id crée une tâche, un élément avec id met à jour (partiellement) la tâche.
+        """
+        items = request.data.get('tasks') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({
+                'status': 'error',
+                'message': 'Liste de tâches requise'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(items) > self.bulk_max_size:
+            return Response({
+                'status': 'error',
+                'message': f'{self.bulk_max_size} tâches au maximum par lot'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        groups = {'create': [], 'update': []}
+        for index, item in enumerate(items):
+            key = 'update' if isinstance(item, dict) and item.get('id') is not None else 'create'
+            groups[key].append(index)
+        
+        errors = [{} for _ in items]
+        validated = {}
+        for key, indices in groups.items():
+            serializer = TaskBulkSerializer(
+                data=[items[index] for index in indices], many=True, partial=key == 'update'
             )
+            if not indices or serializer.is_valid():
+                validated[key] = serializer.validated_data if indices else []
+                continue
+            for index, error in zip(indices, serializer.errors):
+                errors[index] = error
+        
+        existing = {}
+        if validated.get('update'):
+            ids = [data['id'] for data in validated['update']]
+            existing = self.get_queryset().select_related('project').in_bulk(ids)
+            for index, data in zip(groups['update'], validated['update']):
+                if data['id'] not in existing:
+                    errors[index] = {'id': ['Tâche introuvable']}
+        
+        if any(errors):
+            return Response({
+                'status': 'error',
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        created, updated = bulk_write_tasks(
+            request.user,
+            validated['create'],
+            [(existing[data['id']], data) for data in validated['update']]
+        )
+        self.log_activities(created, 'created')
+        self.log_activities(updated, 'updated')
+        
+        tasks = optimize_queryset(
+            Task.objects.filter(pk__in=[task.pk for task in created + updated]), TaskListSerializer()
+        ).in_bulk()
+        return Response({
+            'status': 'success',
+            'data': {
+                'created': TaskListSerializer([tasks[task.pk] for task in created], many=True).data,
+                'updated': TaskListSerializer([tasks[task.pk] for task in updated], many=True).data,
+            }
+        })
     
     @action(detail=False, methods=['get'])
     def my_tasks(self, request):
-        """Mes tâches assignées"""
-        tasks = self.get_queryset().filter(assigned_to=request.user)
-        
-        # Statistiques
-        stats = {
-            'total': tasks.count(),
-            'todo': tasks.filter(status='todo').count(),
-            'in_progress': tasks.filter(status='in_progress').count(),
-            'completed': tasks.filter(is_completed=True).count(),
-            'overdue': tasks.filter(due_date__lt=timezone.now(), is_completed=False).count(),
-        }
+        """Mes tâches assignées (statistiques et total lus dans UserTaskCounter)"""
+        tasks = optimize_queryset(self.get_queryset().filter(assigned_to=request.user), TaskListSerializer())
         
+        # Le compteur porte sur toutes les tâches assignées : valable si toutes sont visibles
+        if sees_assigned_tasks(request.user):
+            counter = UserTaskCounter.for_user(request.user)
+        else:
+            counter = UserTaskCounter(user=request.user)
+        stats = counter.as_summary()
+        
+        self.known_count = counter.total
         page = self.paginate_queryset(tasks)
         if page is not None:
             serializer = TaskListSerializer(page, many=True)
@@ -244,22 +390,43 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
                 'status': 'success',
                 'stats': stats,
                 'results': serializer.data,
-                'count': tasks.count()
+                'count': counter.total
             })
         
         serializer = TaskListSerializer(tasks, many=True)
         return Response({'status': 'success', 'stats': stats, 'data': serializer.data})
     
+    def deadline_feed(self, request, tasks):
+        """
+        Flux d'échéances : tâches ouvertes visibles, triées par (due_date, id) et
+        paginées par curseur ; ?project= et ?department= restreignent le périmètre.
+        """
+        scope = {}
+        for param, lookup in (('project', 'project_id'), ('department', 'project__department_id')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    scope[lookup] = int(value)
+                except ValueError:
+                    return Response({
+                        'status': 'error',
+                        'message': f'Paramètre {param} invalide'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Parcours de l'index partiel des tâches ouvertes (due_date, id)
+        tasks = optimize_queryset(
+            tasks.filter(is_completed=False, **scope).order_by('due_date', 'id'), TaskListSerializer()
+        )
+        paginator = self.deadline_pagination_class()
+        page = paginator.paginate_queryset(tasks, request, view=self)
+        serializer = TaskListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Tâches en retard"""
-        tasks = self.get_queryset().filter(
-            due_date__lt=timezone.now(),
-            is_completed=False
-        ).order_by('due_date')
-        
-        serializer = TaskListSerializer(tasks, many=True)
-        return Response({'status': 'success', 'data': serializer.data})
+        tasks = self.get_queryset().filter(due_date__lt=timezone.now())
+        return self.deadline_feed(request, tasks)
     
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
@@ -267,13 +434,8 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
         today = timezone.now()
         next_week = today + timedelta(days=7)
         
-        tasks = self.get_queryset().filter(
-            due_date__range=[today, next_week],
-            is_completed=False
-        ).order_by('due_date')
-        
-        serializer = TaskListSerializer(tasks, many=True)
-        return Response({'status': 'success', 'data': serializer.data})
+        tasks = self.get_queryset().filter(due_date__range=[today, next_week])
+        return self.deadline_feed(request, tasks)
     
     @action(detail=True, methods=['put'])
     def status(self, request, pk=None):
@@ -292,11 +454,11 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
                 task.completion_percentage = 100
                 
                 # Notification pour les créateurs
-                Notification.objects.create(
-                    user=task.created_by,
-                    notification_type='task_completed',
-                    title=f'Tâche terminée: {task.title}',
-                    message=f'La tâche "{task.title}" a été marquée comme terminée',
+                notify(
+                    'task_completed',
+                    f'Tâche terminée: {task.title}',
+                    f'La tâche "{task.title}" a été marquée comme terminée',
+                    [task.created_by_id],
                     task=task,
                     project=task.project
                 )
@@ -305,7 +467,7 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
             
             return Response({
                 'status': 'success',
-                'data': TaskDetailSerializer(task).data
+                'data': self.task_detail(task)
             })
         
         return Response({
@@ -313,6 +475,61 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'])
+    def move(self, request):
+        """
+        Déplacements Kanban en lot : {"moves": [{"task", "column", "after", "before"}]}.
+        after / before désignent les cartes qui encadrent la position cible.
+        """
+        moves = request.data.get('moves') if isinstance(request.data, dict) else request.data
+        serializer = TaskMoveSerializer(data=moves, many=True)
+        
+        if not serializer.is_valid():
+            return Response({
+                'status': 'error',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not serializer.validated_data:
+            return Response({
+                'status': 'error',
+                'message': 'Liste de déplacements requise'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            tasks, completed = apply_moves(self.get_queryset(), serializer.validated_data)
+        except ValueError as e:
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Notification pour les créateurs, comme l'action status
+        notify_many([
+            {
+                'notification_type': 'task_completed',
+                'title': f'Tâche terminée: {task.title}',
+                'message': f'La tâche "{task.title}" a été marquée comme terminée',
+                'users': [task.created_by_id],
+                'task': task.pk,
+                'project': task.project_id,
+            }
+            for task in completed
+        ])
+        
+        return Response({
+            'status': 'success',
+            'data': [
+                {
+                    'id': task.pk,
+                    'status': task.status,
+                    'is_completed': task.is_completed,
+                    'kanban_order': task.kanban_order,
+                }
+                for task in tasks
+            ]
+        })
+    
     @action(detail=True, methods=['post'])
     def assign(self, request, pk=None):
         """Réassigner une tâche"""
@@ -330,19 +547,28 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
         task.assigned_to.set(users)
         
         # Créer des notifications
-        for user in users:
-            Notification.objects.create(
-                user=user,
-                notification_type='task_assigned',
-                title=f'Nouvelle assignation: {task.title}',
-                message=f'Vous avez été assigné à la tâche "{task.title}"',
-                task=task,
-                project=task.project
-            )
+        notify(
+            'task_assigned',
+            f'Nouvelle assignation: {task.title}',
+            f'Vous avez été assigné à la tâche "{task.title}"',
+            users,
+            task=task,
+            project=task.project
+        )
         
         return Response({
             'status': 'success',
-            'data': TaskDetailSerializer(task).data
+            'data': self.task_detail(task)
+        })
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Historique des transitions de la tâche (journal TaskEvent)"""
+        task = self.get_object()
+        events = task.events.select_related('user', 'assignee').order_by('created_at', 'id')
+        return Response({
+            'status': 'success',
+            'data': TaskEventSerializer(events, many=True).data
         })
     
     @action(detail=True, methods=['post'])
@@ -363,27 +589,27 @@ class TaskViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
         task.save()
         
         # Notification pour les assignés
-        for user in task.assigned_to.all():
-            Notification.objects.create(
-                user=user,
-                notification_type='task_completed',
-                title='Tâche validée',
-                message=f'Votre tâche "{task.title}" a été validée',
-                task=task,
-                project=task.project
-            )
+        notify(
+            'task_completed',
+            'Tâche validée',
+            f'Votre tâche "{task.title}" a été validée',
+            task.assigned_to.values_list('id', flat=True),
+            task=task,
+            project=task.project
+        )
         
         return Response({
             'status': 'success',
-            'data': TaskDetailSerializer(task).data
+            'data': self.task_detail(task)
         })
 
-class TaskCommentViewSet(viewsets.ModelViewSet):
+class TaskCommentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = TaskComment.objects.all().select_related('user', 'task')
     serializer_class = TaskCommentSerializer
     permission_classes = []
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['task']
+    search_fields = ['comment']
     ordering_fields = ['-created_at']
     
     def perform_create(self, serializer):
@@ -391,17 +617,16 @@ class TaskCommentViewSet(viewsets.ModelViewSet):
         
         # Notifier les autres personnes assignées
         task = comment.task
-        for user in task.assigned_to.exclude(id=self.request.user.id):
-            Notification.objects.create(
-                user=user,
-                notification_type='comment_added',
-                title=f'Nouveau commentaire sur {task.title}',
-                message=f'{self.request.user.get_full_name()} a commenté la tâche "{task.title}"',
-                task=task,
-                project=task.project
-            )
+        notify(
+            'comment_added',
+            f'Nouveau commentaire sur {task.title}',
+            f'{self.request.user.get_full_name()} a commenté la tâche "{task.title}"',
+            task.assigned_to.exclude(id=self.request.user.id).values_list('id', flat=True),
+            task=task,
+            project=task.project
+        )
 
-class TaskAttachmentViewSet(viewsets.ModelViewSet):
+class TaskAttachmentViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = TaskAttachment.objects.all().select_related('user', 'task')
     serializer_class = TaskAttachmentSerializer
     permission_classes = []
@@ -411,7 +636,7 @@ class TaskAttachmentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+class NotificationViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
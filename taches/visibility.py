@@ -0,0 +1,166 @@
+"""
+Index de visibilité des projets et des tâches.
+
+Les règles d'accès par rôle (voir ProjectViewSet / TaskViewSet) sont matérialisées
+dans ProjectVisibility et TaskVisibility, afin que les listes filtrées par rôle
+soient de simples semi-jointures indexées au lieu de OR sur des tables M2M + DISTINCT.
+Les directeurs voient tout et ne sont pas indexés.
+
+Chaque règle décrit des paires (utilisateur, objet) :
+(modèle, condition, chemin vers l'utilisateur, chemin vers l'objet).
+La condition et le périmètre sont appliqués dans un même filter() pour porter
+sur la même jointure multi-valuée.
+L'index est recalculé par périmètre (objets ou utilisateurs touchés) après chaque écriture.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from .caching import invalidate_project_stats, invalidate_users
+
+SECTION_HEAD = Q(role='responsable_section', section__isnull=False)
+
+
+def _prefixed(condition, prefix):
+    """Préfixe les lookups d'un Q (ex. role -> user__role)"""
+    prefixed = Q()
+    prefixed.connector = condition.connector
+    prefixed.negated = condition.negated
+    for child in condition.children:
+        if isinstance(child, Q):
+            prefixed.children.append(_prefixed(child, prefix))
+        else:
+            lookup, value = child
+            prefixed.children.append((f'{prefix}__{lookup}', value))
+    return prefixed
+
+
+def project_rules(Project, Task):
+    Coordinators = Project.coordinators.through
+    Assignments = Task.assigned_to.through
+    return [
+        # Coordinateurs et responsables de section du département du projet
+        (
+            Project, _prefixed(Q(role='coordinateur') | SECTION_HEAD, 'department__utilisateurs'),
+            'department__utilisateurs', 'pk'
+        ),
+        # Coordinateurs désignés du projet
+        (Coordinators, Q(user__role='coordinateur'), 'user', 'project'),
+        # Membres et responsables de section assignés à une tâche du projet
+        (Assignments, _prefixed(Q(role='membre') | SECTION_HEAD, 'user'), 'user', 'task__project'),
+    ]
+
+
+def task_rules(Project, Task):
+    Assignments = Task.assigned_to.through
+    return [
+        # Coordinateurs du département du projet
+        (
+            Task, Q(project__department__utilisateurs__role='coordinateur'),
+            'project__department__utilisateurs', 'pk'
+        ),
+        # Assignés (hors directeurs et responsables sans section)
+        (Assignments, _prefixed(Q(role__in=['coordinateur', 'membre']) | SECTION_HEAD, 'user'), 'user', 'task'),
+        # Responsables de la section d'un des assignés
+        (
+            Assignments, Q(user__section__utilisateurs__role='responsable_section'),
+            'user__section__utilisateurs', 'task'
+        ),
+    ]
+
+
+def visibility_scope(user):
+    """Clé du périmètre de visibilité d'un utilisateur (partagée par tous les directeurs)"""
+    if user.role == 'directeur':
+        return 'directeur'
+    return f'{user.role}:{user.department_id}:{user.section_id}:{user.pk}'
+
+
+def sees_assigned_tasks(user):
+    """Toutes les tâches assignées à l'utilisateur lui sont-elles visibles (task_rules) ?"""
+    return user.role in ('directeur', 'coordinateur', 'membre') or (
+        user.role == 'responsable_section' and user.section_id is not None
+    )
+
+
+def visible_projects(queryset, user, project_ref='pk'):
+    """Restreint `queryset` aux lignes dont le projet (`project_ref`) est visible par l'utilisateur"""
+    from .models import ProjectVisibility
+    if user.role == 'directeur':
+        return queryset
+    return queryset.filter(Exists(ProjectVisibility.objects.filter(user=user, project=OuterRef(project_ref))))
+
+
+def visible_tasks(queryset, user, task_ref='pk'):
+    """Restreint `queryset` aux lignes dont la tâche (`task_ref`) est visible par l'utilisateur"""
+    from .models import TaskVisibility
+    if user.role == 'directeur':
+        return queryset
+    return queryset.filter(Exists(TaskVisibility.objects.filter(user=user, task=OuterRef(task_ref))))
+
+
+def _compute(rules, scope_path, ids):
+    pairs = set()
+    for model, condition, user_path, object_path in rules:
+        path = user_path if scope_path == 'user' else object_path
+        pairs.update(
+            model.objects.filter(condition, **{f'{path}__in': ids})
+            .order_by()
+            .values_list(user_path, object_path)
+        )
+    return pairs
+
+
+def _refresh(index_model, object_field, rules, scope_path, ids):
+    ids = {pk for pk in ids if pk is not None}
+    if not ids:
+        return
+    pairs = _compute(rules, scope_path, ids)
+    scope_field = 'user_id' if scope_path == 'user' else f'{object_field}_id'
+    with transaction.atomic():
+        existing = index_model.objects.filter(**{f'{scope_field}__in': ids})
+        previous = set(existing.values_list('user_id', f'{object_field}_id'))
+        existing.delete()
+        index_model.objects.bulk_create(
+            [index_model(user_id=user_id, **{f'{object_field}_id': object_id}) for user_id, object_id in pairs],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+    # Utilisateurs ayant gagné ou perdu un objet : leurs réponses en cache sont périmées
+    invalidate_users({user_id for user_id, _ in previous ^ pairs})
+
+
+def refresh_project_visibility(project_ids):
+    from .models import Project, Task, ProjectVisibility
+    project_ids = set(Project.objects.filter(pk__in=set(project_ids)).values_list('pk', flat=True))
+    _refresh(ProjectVisibility, 'project', project_rules(Project, Task), 'object', project_ids)
+    invalidate_project_stats()
+
+
+def refresh_task_visibility(task_ids):
+    from .models import Project, Task, TaskVisibility
+    task_ids = set(Task.objects.filter(pk__in=set(task_ids)).values_list('pk', flat=True))
+    _refresh(TaskVisibility, 'task', task_rules(Project, Task), 'object', task_ids)
+
+
+def refresh_user_visibility(user_ids):
+    from .models import Project, Task, ProjectVisibility, TaskVisibility
+    _refresh(ProjectVisibility, 'project', project_rules(Project, Task), 'user', user_ids)
+    _refresh(TaskVisibility, 'task', task_rules(Project, Task), 'user', user_ids)
+    invalidate_project_stats()
+
+
+def rebuild_visibility(Project, Task, ProjectVisibility, TaskVisibility, batch_size=1000):
+    """Reconstruction complète de l'index (migration, commande rebuild_visibility)"""
+    for index_model, object_field, rules in (
+        (ProjectVisibility, 'project', project_rules(Project, Task)),
+        (TaskVisibility, 'task', task_rules(Project, Task)),
+    ):
+        index_model.objects.all().delete()
+        for model, condition, user_path, object_path in rules:
+            pairs = model.objects.filter(condition).order_by().values_list(user_path, object_path).distinct().iterator(chunk_size=batch_size)
+            batch = []
+            for user_id, object_id in pairs:
+                batch.append(index_model(user_id=user_id, **{f'{object_field}_id': object_id}))
+                if len(batch) >= batch_size:
+                    index_model.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+            index_model.objects.bulk_create(batch, ignore_conflicts=True)
@@ -4,3 +4,6 @@ class UtilisateursConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'utilisateurs'
     verbose_name = 'Gestion des utilisateurs'
+
+    def ready(self):
+        from . import caching, search  # noqa: F401
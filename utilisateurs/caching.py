@@ -0,0 +1,35 @@
+"""
+Étiquettes de cache des utilisateurs et des données de référence (voir core.caching).
+
+- Utilisateur : model:utilisateurs.user, user:<id>, department:<département> (et l'ancien) ;
+- département : department:<id> ; section : department:<département> ;
+- postes et compétences : étiquette de modèle seule.
+
+Une connexion (update_last_login, update_fields=['last_login']) n'invalide rien :
+last_login affiché par les listes en cache peut retarder d'au plus leur durée de vie.
+
+Importé par UtilisateursConfig.ready(), avant taches.signals qui remplace l'état
+d'origine des utilisateurs.
+"""
+from core.caching import register
+from .models import Competence, Department, Poste, Section, User
+
+USER_IGNORED_FIELDS = frozenset({'last_login'})
+
+
+def _user_tags(user):
+    original = getattr(user, '_original_scope', None)
+    departments = {user.department_id, original[1] if original else None} - {None}
+    return [f'user:{user.pk}'] + [f'department:{department_id}' for department_id in departments]
+
+
+CACHE_TAGS = {
+    User: _user_tags,
+    Department: lambda department: [f'department:{department.pk}'],
+    Section: lambda section: [f'department:{section.department_id}'],
+    Poste: None,
+    Competence: None,
+}
+
+for model, tags in CACHE_TAGS.items():
+    register(model, tags, ignore_fields=USER_IGNORED_FIELDS if model is User else ())
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:55
+
+from django.db import migrations
+from core.search import install_index, uninstall_index
+
+# Copie figée de utilisateurs.search.SEARCH_FIELDS
+USER_SEARCH_FIELDS = {'email': 'A', 'first_name': 'A', 'last_name': 'A'}
+
+
+def install_search_index(apps, schema_editor):
+    install_index(schema_editor, apps.get_model('utilisateurs', 'User'), USER_SEARCH_FIELDS)
+
+
+def uninstall_search_index(apps, schema_editor):
+    uninstall_index(schema_editor, apps.get_model('utilisateurs', 'User'), USER_SEARCH_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utilisateurs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
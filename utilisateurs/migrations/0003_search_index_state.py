@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:52
+
+import core.search
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index GIN déjà créé sur PostgreSQL par 0002 : déclaration dans l'état seulement"""
+
+    dependencies = [
+        ('utilisateurs', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AddIndex(
+                model_name='user',
+                index=core.search.SearchIndex(django.contrib.postgres.search.SearchVector('email', 'first_name', 'last_name', config='french'), name='utilisateurs_user_search'),
+            ),
+        ]),
+    ]
@@ -2,8 +2,9 @@ from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils import timezone
 from colorfield.fields import ColorField
+from core.search import IndexedQuerySet, SearchIndex
 
-class CustomUserManager(BaseUserManager):
+class CustomUserManager(BaseUserManager.from_queryset(IndexedQuerySet)):
     """Gestionnaire personnalisé pour l'authentification par email"""
     
     def create_user(self, email, password=None, **extra_fields):
@@ -276,11 +277,24 @@ class User(AbstractUser):
             models.Index(fields=['email']),
             models.Index(fields=['role']),
             models.Index(fields=['department', 'section']),
+            # Recherche PostgreSQL : mêmes champs que utilisateurs.search.SEARCH_FIELDS
+            SearchIndex.for_fields(['email', 'first_name', 'last_name'], name='utilisateurs_user_search'),
         ]
 
     def __str__(self):
         return f"{self.get_full_name()} <{self.email}>"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Périmètre d'origine (rôle, département, section), pour l'index de visibilité
+        instance._original_scope = instance.get_scope()
+        return instance
+    
+    def get_scope(self):
+        """Champs déterminant ce que l'utilisateur peut voir"""
+        return (self.__dict__.get('role'), self.__dict__.get('department_id'), self.__dict__.get('section_id'))
+    
     def get_full_name(self):
         """Retourne le nom complet"""
         return f"{self.first_name} {self.last_name}".strip()
@@ -0,0 +1,12 @@
+"""
+Utilisateurs indexés pour la recherche plein texte (voir core.search).
+"""
+from core.search import register
+from .models import User
+
+SEARCH_FIELDS = {
+    User: {'email': 'A', 'first_name': 'A', 'last_name': 'A'},
+}
+
+for model, fields in SEARCH_FIELDS.items():
+    register(model, fields)
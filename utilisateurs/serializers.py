@@ -1,42 +1,55 @@
+from django.db.models import Count
 from rest_framework import serializers
+from core.serializers import CompiledListSerializer, DynamicFieldsModelSerializer
 from .models import User, Poste, Department, Section, Competence, UserActivity
 
-class PosteSerializer(serializers.ModelSerializer):
+class PosteSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Poste
         fields = '__all__'
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(DynamicFieldsModelSerializer):
     user_count = serializers.SerializerMethodField()
     project_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Department
         fields = '__all__'
+        field_annotations = {
+            'user_count': Count('utilisateurs', distinct=True),
+            'project_count': Count('projects', distinct=True),
+        }
     
     def get_user_count(self, obj):
+        if hasattr(obj, 'user_count'):
+            return obj.user_count
         return obj.utilisateurs.count()
     
     def get_project_count(self, obj):
+        if hasattr(obj, 'project_count'):
+            return obj.project_count
         return obj.projects.count()
 
-class SectionSerializer(serializers.ModelSerializer):
+class SectionSerializer(DynamicFieldsModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     user_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Section
         fields = '__all__'
+        field_annotations = {'user_count': Count('utilisateurs', distinct=True)}
     
     def get_user_count(self, obj):
+        if hasattr(obj, 'user_count'):
+            return obj.user_count
         return obj.utilisateurs.count()
 
-class CompetenceSerializer(serializers.ModelSerializer):
+class CompetenceSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Competence
         fields = '__all__'
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(DynamicFieldsModelSerializer):
     full_name = serializers.SerializerMethodField()
     department_name = serializers.CharField(source='department.name', read_only=True)
     section_name = serializers.CharField(source='section.name', read_only=True)
@@ -52,6 +65,12 @@ class UserListSerializer(serializers.ModelSerializer):
             'department', 'department_name', 'section', 'section_name',
             'phone', 'ville', 'is_active', 'last_login', 'date_joined'
         ]
+        list_serializer_class = CompiledListSerializer
+        field_sources = {
+            'full_name': ['first_name', 'last_name'],
+            'initials': ['first_name', 'last_name', 'email'],
+            'avatar_url': ['profile_photo'],
+        }
     
     def get_full_name(self, obj):
         return obj.get_full_name()
@@ -62,7 +81,7 @@ class UserListSerializer(serializers.ModelSerializer):
     def get_avatar_url(self, obj):
         return obj.get_avatar_url()
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(DynamicFieldsModelSerializer):
     full_name = serializers.SerializerMethodField()
     department_name = serializers.CharField(source='department.name', read_only=True)
     section_name = serializers.CharField(source='section.name', read_only=True)
@@ -74,6 +93,10 @@ class UserDetailSerializer(serializers.ModelSerializer):
         model = User
         fields = '__all__'
         read_only_fields = ['id', 'email', 'date_joined', 'last_active', 'created_by']
+        field_sources = {
+            'full_name': ['first_name', 'last_name'],
+            'permissions': ['role', 'poste'],
+        }
     
     def get_full_name(self, obj):
         return obj.get_full_name()
@@ -113,7 +136,7 @@ class UserCreateUpdateSerializer(serializers.ModelSerializer):
             user.save()
         return user
 
-class UserActivitySerializer(serializers.ModelSerializer):
+class UserActivitySerializer(DynamicFieldsModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
     
     class Meta:
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .models import Department, Section, User
+
+
+@override_settings(QUERYSET_OPTIMIZER_STRICT=True)
+class CustomActionQueriesTests(TestCase):
+    """Listes d'utilisateurs des actions personnalisées : aucune requête pendant la sérialisation"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Informatique', code='IT')
+        cls.section = Section.objects.create(name='Développement', code='DEV', department=cls.department)
+        cls.director = User.objects.create_user(
+            'directeur@example.com', 'secret', first_name='Dir', last_name='Ecteur', role='directeur'
+        )
+        cls.coordinator = User.objects.create_user(
+            'coordinateur@example.com', 'secret', first_name='Coo', last_name='Rdinateur',
+            role='coordinateur', department=cls.department
+        )
+        for index in range(3):
+            User.objects.create_user(
+                f'membre{index}@example.com', 'secret', first_name='Membre', last_name=str(index),
+                role='membre', department=cls.department, section=cls.section
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.director)
+
+    def assertListed(self, url, count):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.data['data']), count)
+
+    def test_team(self):
+        self.assertListed(f'/api/users/{self.coordinator.pk}/team/', 4)
+
+    def test_me_team(self):
+        self.assertListed('/api/users/me_team/', 5)
+
+    def test_section_users(self):
+        self.assertListed(f'/api/sections/{self.section.pk}/users/', 3)
+
+    def test_department_users(self):
+        self.assertListed(f'/api/departments/{self.department.pk}/users/', 4)
+
+
+class CachedResponseAccessTests(TestCase):
+    """Lecture en cache (CachedResponseMixin) : accès à l'objet vérifié avant un HIT"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Informatique', code='IT')
+        cls.other_department = Department.objects.create(name='Ressources humaines', code='RH')
+        cls.section = Section.objects.create(name='Développement', code='DEV', department=cls.department)
+        cls.coordinator = User.objects.create_user(
+            'coordinateur@example.com', 'secret', first_name='Coo', last_name='Rdinateur',
+            role='coordinateur', department=cls.department
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.coordinator)
+
+    def test_revoked_access_not_served_from_cache(self):
+        url = f'/api/sections/{self.section.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        # Écriture en masse : aucune invalidation, seul get_object() refuse l'accès
+        User.objects.filter(pk=self.coordinator.pk).update(department=self.other_department)
+        self.coordinator.refresh_from_db()
+        self.client.force_authenticate(self.coordinator)
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -11,9 +11,9 @@ from .serializers import (
 )
 from api.permissions import IsDirector, IsCoordinator, IsDepartmentHead
 from core.pagination import StandardResultsSetPagination
-from core.mixins import ActivityLoggerMixin
+from core.mixins import ActivityLoggerMixin, CachedResponseMixin, SparseFieldsetMixin
 
-class UserViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
+class UserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet, ActivityLoggerMixin):
     queryset = User.objects.all().select_related('department', 'section', 'poste')
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -70,40 +70,56 @@ class UserViewSet(viewsets.ModelViewSet, ActivityLoggerMixin):
     def team(self, request, pk=None):
         """Récupérer l'équipe d'un utilisateur"""
         user = self.get_object()
-        team = user.get_team_members()
-        serializer = UserListSerializer(team, many=True)
-        return Response({'status': 'success', 'data': serializer.data})
+        team = self.optimize_for(user.get_team_members(), UserListSerializer)
+        return Response({'status': 'success', 'data': self.serialize(UserListSerializer, team, many=True)})
     
     @action(detail=False, methods=['get'])
     def me_team(self, request):
         """Récupérer mon équipe"""
-        team = request.user.get_team_members()
-        serializer = UserListSerializer(team, many=True)
-        return Response({'status': 'success', 'data': serializer.data})
+        team = self.optimize_for(request.user.get_team_members(), UserListSerializer)
+        return Response({'status': 'success', 'data': self.serialize(UserListSerializer, team, many=True)})
 
-class PosteViewSet(viewsets.ModelViewSet):
+class PosteViewSet(CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Poste.objects.all()
     serializer_class = PosteSerializer
     permission_classes = [IsDirector|IsCoordinator]
+    cache_timeout = 3600
+    cache_tags = ['model:utilisateurs.poste']
+    cache_per_user = False
     filter_backends = [filters.SearchFilter]
     search_fields = ['titre', 'code']
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all().annotate(
         user_count=Count('utilisateurs', distinct=True),
         project_count=Count('projects', distinct=True)
     )
     serializer_class = DepartmentSerializer
     permission_classes = [IsDirector|IsCoordinator]
+    # Un département : department:<id>, incrémentée par ses utilisateurs, sections et projets
+    cache_timeout = 3600
+    cache_tags = {
+        'list': ['model:utilisateurs.department', 'model:taches.project'],
+        'retrieve': ['department:{pk}'],
+        'stats': ['department:{pk}'],
+        'users': ['department:{pk}', 'model:utilisateurs.poste'],
+    }
+    cache_per_user = False
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'code']
     
+    def get_cache_tags(self, request):
+        tags = super().get_cache_tags(request)
+        if tags is not None and self.action == 'list':
+            # Effectifs de chaque département
+            tags += [f'department:{pk}' for pk in Department.objects.values_list('pk', flat=True)]
+        return tags
+    
     @action(detail=True, methods=['get'])
     def users(self, request, pk=None):
         department = self.get_object()
-        users = department.utilisateurs.all()
-        serializer = UserListSerializer(users, many=True)
-        return Response({'status': 'success', 'data': serializer.data})
+        users = self.optimize_for(department.utilisateurs.all(), UserListSerializer)
+        return Response({'status': 'success', 'data': self.serialize(UserListSerializer, users, many=True)})
     
     @action(detail=True, methods=['get'])
     def stats(self, request, pk=None):
@@ -118,10 +134,13 @@ class DepartmentViewSet(viewsets.ModelViewSet):
         }
         return Response({'status': 'success', 'data': data})
 
-class SectionViewSet(viewsets.ModelViewSet):
+class SectionViewSet(CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Section.objects.all().select_related('department')
     serializer_class = SectionSerializer
     permission_classes = [IsDirector|IsCoordinator|IsDepartmentHead]
+    cache_timeout = 3600
+    # Utilisateurs des sections lues : department:<id> de leurs départements
+    cache_tags = ['model:utilisateurs.section', 'model:utilisateurs.department', 'model:utilisateurs.poste']
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['department']
     search_fields = ['name', 'code']
@@ -136,19 +155,33 @@ class SectionViewSet(viewsets.ModelViewSet):
             return queryset.filter(department=user.department)
         return queryset
     
+    def get_cache_tags(self, request):
+        tags = super().get_cache_tags(request)
+        sections = self.get_queryset()
+        if 'pk' in self.kwargs:
+            try:
+                sections = sections.filter(pk=self.kwargs['pk'])
+            except ValueError:
+                # Identifiant invalide : get_object() répondra 404
+                return tags
+        department_ids = sections.order_by().values_list('department_id', flat=True).distinct()
+        return tags + [f'department:{department_id}' for department_id in department_ids]
+    
     @action(detail=True, methods=['get'])
     def users(self, request, pk=None):
         section = self.get_object()
-        users = section.utilisateurs.all()
-        serializer = UserListSerializer(users, many=True)
-        return Response({'status': 'success', 'data': serializer.data})
+        users = self.optimize_for(section.utilisateurs.all(), UserListSerializer)
+        return Response({'status': 'success', 'data': self.serialize(UserListSerializer, users, many=True)})
 
-class CompetenceViewSet(viewsets.ModelViewSet):
+class CompetenceViewSet(CachedResponseMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Competence.objects.all()
     serializer_class = CompetenceSerializer
     permission_classes = [IsDirector|IsCoordinator]
+    cache_timeout = 3600
+    cache_tags = ['model:utilisateurs.competence']
+    cache_per_user = False
 
-class UserActivityViewSet(viewsets.ReadOnlyModelViewSet):
+class UserActivityViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = UserActivity.objects.all().select_related('user')
     serializer_class = UserActivitySerializer
     permission_classes = [IsDirector|IsCoordinator]